@@ -1,4 +1,4 @@
-# Create Orchestra repository from the Unified repository files created by basic2orchestra (runs several minutes without any output)
+# Create Orchestra repository from the Unified repository files created by basic2orchestra (runs without any output)
 # Not required if Orchestra repository file is copied from GitHub (https://github.com/FIXTradingCommunity/unified2orchestra/actions)
 echo "\nConverting Unified created from Basic with XSLT to Orchestra repository files..."
 #python3 ../orchestratransposer.py ../diff-unified/FixRepository-xslt.xml ../diff-unified/FixPhrases_en-xslt.xml --from unif --to orch -o orchestra-python.xml
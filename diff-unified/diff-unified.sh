@@ -1,4 +1,4 @@
-# Create unified repository and phrases file from the Orchestra file created by unified2orchestra (runs several minutes without any output)
+# Create unified repository and phrases file from the Orchestra file created by unified2orchestra (runs without any output)
 # Not required if Unified repository files are copied from GitHub (https://github.com/FIXTradingCommunity/unified2orchestra/actions)
 echo "\nConverting FIX Latest to Unified repository and phrases files..."
 #python3 ../orchestratransposer.py ../diff-orchestra/orchestra-python.xml --to unif -o FixRepository-python.xml FixPhrases_en-python.xml
@@ -2,16 +2,12 @@
 
 import argparse
 import logging
-import os
 import sys
+import time
 
-from orchestra2sbe import Orchestra2SBE
-from orchestra2unified import Orchestra2Unified
-from orchestraupdater import Orchestra10_11Updater
-from sbe2orchestra import SBE2Orchestra, SBE2Orchestra20_10
-from unified2orchestra import Unified2Orchestra
-
-FORMATS = ['orch', 'orch11', 'unif', 'sbe', 'sbe2']
+# translators and schemas are imported by the functions that convert, so that a client of a daemon starts quickly
+from conversionoptions import FORMATS, LOG_FORMAT, check_conversion, log_path
+from daemonclient import ConversionClient
 
 
 def init_argparse() -> argparse.ArgumentParser:
@@ -23,13 +19,41 @@ def init_argparse() -> argparse.ArgumentParser:
         '-v', '--version', action='version',
         version=f'{parser.prog} version 1.0.0'
     )
-    parser.add_argument(dest="input", nargs="+", help="Name of input file(s)")
+    parser.add_argument(dest="input", nargs="*",
+                        help='Name of input file(s); several SBE files are merged into one Orchestra file')
     parser.add_argument('-o', '--output', nargs="+",
                         help='name of output file(s)')
     parser.add_argument('-f', '--from', choices=FORMATS, default='orch', dest='input_format',
-                        help='format of source file: Orchestra 1.0, Unified Repository, or SBE 1.0')
+                        help='format of source file: Orchestra 1.0, Unified Repository, SBE 1.0, or SQLite database')
     parser.add_argument('-t', '--to', choices=FORMATS, default='orch', dest='output_format',
-                        help='format of output file: Orchestra 1.0, Orchestra 1.1, Unified Repository, or SBE 1.0')
+                        help='format of output file: Orchestra 1.0, Orchestra 1.1, Unified Repository, SBE 1.0, '
+                             'SQLite database, or JSON Lines')
+    parser.add_argument('--fix-versions', nargs='*', dest='fix_versions', metavar='VERSION',
+                        help='fix versions of a Unified Repository to convert, each to its own output file; '
+                             'all versions if none are listed')
+    parser.add_argument('-j', '--workers', type=int, dest='workers',
+                        help='maximum number of worker processes for batch conversions, SBE message translation '
+                             'and SBE schema merges')
+    parser.add_argument('-m', '--messages', action='append', dest='messages', metavar='SELECTOR',
+                        help='convert only messages selected by name, msgType, category or section '
+                             'and the elements they depend upon; may be repeated; "sbe" output format only')
+    parser.add_argument('--reorder-fields', type=int, dest='reorder_fields', metavar='ALIGNMENT',
+                        help='reorder fixed-length fields to minimize padding when aligned to ALIGNMENT bytes; '
+                             '"sbe" output format only')
+    parser.add_argument('--narrow-enums', action='store_true', dest='narrow_enums',
+                        help='encode enums by the narrowest type that holds their values; "sbe" output format only')
+    parser.add_argument('--dedup-codesets', action='store_true', dest='deduplicate_codesets',
+                        help='fields with identical enums share a single codeset; "unif" input format and "orch" '
+                             'output format only')
+    parser.add_argument('--batch', dest='batch', metavar='MANIFEST',
+                        help='run the conversions listed in a JSON or CSV manifest in parallel instead of converting '
+                             'input; exits with status 1 if any conversion has errors')
+    parser.add_argument('--serve', dest='serve', metavar='ADDRESS',
+                        help='run a daemon that keeps schemas and recently read files in memory and converts for '
+                             'clients on ADDRESS, a Unix socket path or localhost:PORT; any local user may connect to '
+                             'localhost:PORT and read or write files as the user of the daemon')
+    parser.add_argument('--server', dest='server', metavar='ADDRESS',
+                        help='send the conversion to the daemon on ADDRESS instead of converting in this process')
 
     return parser
 
@@ -41,89 +65,147 @@ usage: python -m orchestratransposer [OPTION]...
 Convert an Orchestra version 1.0 XML file to or from another schema
 
 positional arguments:
-  input                 Name of input file(s)
+  input                 Name of input file(s); several SBE files are merged
+                        into one Orchestra file
 
 options:
   -h, --help            show this help message and exit
   -v, --version         show program's version number and exit
   -o OUTPUT [OUTPUT ...], --output OUTPUT [OUTPUT ...]
                         name of output file(s)
-  -f {orch,orch11,unif,sbe,sbe2}, --from {orch,orch11,unif,sbe,sbe2}
+  -f {orch,orch11,unif,sbe,sbe2,sqlite,jsonl}, --from {orch,orch11,unif,sbe,sbe2,sqlite,jsonl}
                         format of source file: Orchestra 1.0, Unified
-                        Repository, or SBE 1.0
-  -t {orch,orch11,unif,sbe,sbe2}, --to {orch,orch11,unif,sbe,sbe2}
+                        Repository, SBE 1.0, or SQLite database
+  -t {orch,orch11,unif,sbe,sbe2,sqlite,jsonl}, --to {orch,orch11,unif,sbe,sbe2,sqlite,jsonl}
                         format of output file: Orchestra 1.0, Orchestra 1.1,
-                        Unified Repository, or SBE 1.0
+                        Unified Repository, SBE 1.0, SQLite database, or JSON
+                        Lines
+  --fix-versions [VERSION ...]
+                        fix versions of a Unified Repository to convert, each
+                        to its own output file; all versions if none are
+                        listed
+  -j WORKERS, --workers WORKERS
+                        maximum number of worker processes for batch
+                        conversions, SBE message translation and SBE schema
+                        merges
+  -m SELECTOR, --messages SELECTOR
+                        convert only messages selected by name, msgType,
+                        category or section and the elements they depend upon;
+                        may be repeated; "sbe" output format only
+  --reorder-fields ALIGNMENT
+                        reorder fixed-length fields to minimize padding when
+                        aligned to ALIGNMENT bytes; "sbe" output format only
+  --narrow-enums        encode enums by the narrowest type that holds their
+                        values; "sbe" output format only
+  --dedup-codesets      fields with identical enums share a single codeset;
+                        "unif" input format and "orch" output format only
+  --batch MANIFEST      run the conversions listed in a JSON or CSV manifest
+                        in parallel instead of converting input; exits with
+                        status 1 if any conversion has errors
+  --serve ADDRESS       run a daemon that keeps schemas and recently read
+                        files in memory and converts for clients on ADDRESS, a
+                        Unix socket path or localhost:PORT; any local user may
+                        connect to localhost:PORT and read or write files as
+                        the user of the daemon
+  --server ADDRESS      send the conversion to the daemon on ADDRESS instead
+                        of converting in this process
 
   Log messages are written to a file with the same path as the output file but with '.log' extension.
     """
     parser = init_argparse()
     args = parser.parse_args()
     d = vars(args)
-    input_format = d['input_format']
-    output_format = d['output_format']
+    if d['batch']:
+        if d['input'] or d['output']:
+            parser.error('input and output files are listed in the manifest of "--batch"')
+        sys.exit(run_batch(d['batch'], d['workers']))
+    if d['serve']:
+        if d['input'] or d['output']:
+            parser.error('input and output files are sent by clients of "--serve"')
+        from daemon import ConversionDaemon
+        logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+        try:
+            ConversionDaemon(d['serve'], d['workers']).serve()
+        except (OSError, ValueError) as e:
+            print(f'ERROR: {e}', file=sys.stderr)
+            sys.exit(1)
+        return
+    if not d['input']:
+        parser.error('the following arguments are required: input')
     input_files = d['input']
     output_files = d['output']
-    is_valid = True
-    
-    # Validate orch11 format requirements
-    if output_format == 'orch11' and input_format != 'orch':
-        print(f'ERROR: "orch11" output format can only be used with "orch" input format',
-              file=sys.stderr)
-        is_valid = False
-    if input_format == 'orch11':
-        print(f'ERROR: "orch11" only supported as upgrade from "orch" format',
-              file=sys.stderr)
-        is_valid = False
-    if input_format == output_format:
-        print(f'ERROR: Input format "{input_format}" same as output format; nothing to do.',
-              file=sys.stderr)
-        is_valid = False
-    if 'orch' not in [input_format, output_format]:
-        print(f'ERROR: One of input format "{input_format}" or output format "{output_format}" must be "orch"',
-              file=sys.stderr)
-        is_valid = False
-    if input_format == 'unif' and not len(input_files) == 2:
-        print(f'ERROR: Two input files must be provided for "unif" format',
-              file=sys.stderr)
-        is_valid = False
-    if output_format == 'unif' and not len(output_files) == 2:
-        print(f'ERROR: Two output files must be provided for "unif" format',
-              file=sys.stderr)
-        is_valid = False
-    if is_valid:
+    problems = check_conversion(d['input_format'], d['output_format'], input_files, output_files,
+                                fix_versions=d['fix_versions'], messages=d['messages'],
+                                reorder_fields=d['reorder_fields'], narrow_enums=d['narrow_enums'],
+                                deduplicate_codesets=d['deduplicate_codesets'])
+    for problem in problems:
+        print(f'ERROR: {problem}', file=sys.stderr)
+    if not problems and d['server']:
+        sys.exit(run_client(d['server'], d))
+    elif not problems:
+        from conversions import convert
         logging.basicConfig(level=logging.INFO,
-                            format='%(asctime)s %(levelname)s %(message)s',
-                            filename=os.path.splitext(output_files[0])[0] + '.log',
+                            format=LOG_FORMAT,
+                            filename=log_path(output_files),
                             filemode='w')
-        if input_format == 'orch':
-            if output_format == 'unif':
-                translator = Orchestra2Unified()
-                with open(output_files[0], 'wb') as unified_stream, open(output_files[1], 'wb') as phrases_stream:
-                    errors = translator.orch2unified_xml(input_files[0], unified_stream, phrases_stream)
-            elif output_format == 'sbe':
-                translator = Orchestra2SBE()
-                with open(output_files[0], 'wb') as f:
-                    errors = translator.orch2sbe_xml(input_files[0], f)
-            elif output_format == 'orch11':
-                translator = Orchestra10_11Updater()
-                with open(output_files[0], 'wb') as f:
-                    errors = translator.update_xml(input_files[0], f)
-        elif output_format == 'orch':
-            if input_format == 'unif':
-                translator = Unified2Orchestra()
-                with open(output_files[0], 'wb') as f:
-                    errors = translator.unified2orch_xml(input_files[0], input_files[1], f)
-            elif input_format == 'sbe':
-                translator = SBE2Orchestra()
-                with open(output_files[0], 'wb') as f:
-                    errors = translator.sbe2orch_xml(input_files[0], f)
-            elif input_format == 'sbe2':
-                translator = SBE2Orchestra20_10()
-                with open(output_files[0], 'wb') as f:
-                    errors = translator.sbe2orch_xml(input_files[0], f)
+        errors = convert(d['input_format'], d['output_format'], input_files, output_files,
+                         fix_versions=d['fix_versions'], messages=d['messages'], reorder_fields=d['reorder_fields'],
+                         narrow_enums=d['narrow_enums'], workers=d['workers'],
+                         deduplicate_codesets=d['deduplicate_codesets'])
         print(f'{len(errors)} errors')
 
 
+def run_client(address: str, d: dict) -> int:
+    """
+    Sends a conversion to a daemon and prints its output as it is received
+    :return: exit status, 1 if the daemon cannot be reached or rejects the conversion
+    """
+    try:
+        with ConversionClient(address) as client:
+            for event in client.convert(d['input_format'], d['output_format'], d['input'], d['output'],
+                                        fix_versions=d['fix_versions'], messages=d['messages'],
+                                        reorder_fields=d['reorder_fields'], narrow_enums=d['narrow_enums'],
+                                        deduplicate_codesets=d['deduplicate_codesets'], workers=d['workers']):
+                if 'output' in event:
+                    print(event['output'])
+                elif event['result']['log'] is None:
+                    # rejected by the daemon; errors of a conversion are in its log file, as in this process
+                    for message in event['result']['messages']:
+                        print(f'ERROR: {message}', file=sys.stderr)
+                    return 1
+                else:
+                    print(f'{event["result"]["errors"]} errors')
+    except (OSError, ValueError) as e:
+        print(f'ERROR: daemon on {address} not available: {e}', file=sys.stderr)
+        return 1
+    return 0
+
+
+def run_batch(manifest_path: str, workers) -> int:
+    """
+    Runs the conversions of a manifest and prints the result of each
+    :return: exit status, 1 if any conversion has errors
+    """
+    from conversions import BatchConverter
+    batch = BatchConverter()
+    try:
+        jobs = batch.read_manifest(manifest_path)
+    except (OSError, ValueError) as e:
+        print(f'ERROR: {e}', file=sys.stderr)
+        return 1
+    start = time.perf_counter()
+    results = batch.run(jobs, workers)
+    for (number, result) in enumerate(results, 1):
+        job = result['job']
+        print(f'{number}: {job["from"]} {" ".join(job["input"])} -> {job["to"]} {" ".join(job["output"])}: '
+              f'{result["errors"]} errors in {result["seconds"]:.1f}s' +
+              (f', log {result["log"]}' if result['log'] else ''))
+        for message in result['messages']:
+            print(f'  {message}', file=sys.stderr)
+    failed = sum(1 for result in results if result['errors'])
+    print(f'{len(results)} conversions, {failed} with errors, in {time.perf_counter() - start:.1f}s')
+    return 1 if failed else 0
+
+
 if __name__ == '__main__':
     main()
@@ -0,0 +1,214 @@
+import gc
+import json
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+from orchestra.orchestrainstance import OrchestraInstance10, OrchestraInstance11
+from sbe.sbeinstance import SBEInstance10, SBEInstance20
+from unified.unifiedinstance import UnifiedInstanceWithPhrases, UnifiedMainInstance, UnifiedPhrasesInstance
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+FORMAT = 'compact-jsonml'
+"""Name of the compact format, stored in its header"""
+
+FORMAT_VERSION = 1
+
+STREAM_DEPTH = 2
+"""Depth of elements written one at a time; elements below are encoded with their parent, e.g. a whole field"""
+
+INSTANCE_KINDS = [('orchestra11', OrchestraInstance11), ('orchestra10', OrchestraInstance10),
+                  ('sbe20', SBEInstance20), ('sbe10', SBEInstance10),
+                  ('unified', UnifiedInstanceWithPhrases), ('unifiedMain', UnifiedMainInstance),
+                  ('unifiedPhrases', UnifiedPhrasesInstance)]
+"""Kind of instance stored in the header of each class of instance, subclasses first"""
+
+
+class CompactCodec10:
+    """
+    Exports Orchestra, SBE and Unified Repository instances to compact JSON or MessagePack, and imports them back
+
+    The compact format is JsonML, as returned by root() of an instance, with the name of each element replaced by its
+    index in a table of names. Element names are repeated thousands of times in a repository, so this roughly halves the
+    size of a document. A JSON document is an object:
+
+    .. code-block:: python
+
+        {"format": "compact-jsonml", "version": 1, "instance": "orchestra10",
+         "tags": ["fixr:repository", "fixr:metadata", "fixr:fields", "fixr:field", ...],
+         "roots": [[0, {"name": "FIX.Latest", "version": "FIX.Latest_EP269"}, [1, ...], [2, [3, {"id": 1, ...}]]]]}
+
+    An element is a list of the index of its name, its attributes if any, then its children, which are elements or text.
+    instance is one of orchestra10, orchestra11, sbe10, sbe20, unified, unifiedMain or unifiedPhrases. roots holds
+    root() of the instance, except for unifiedPhrases, whose root is phrases_root(), and for unified, whose roots are
+    the repository and its phrases.
+
+    A MessagePack document holds the same object with roots replaced by their count, followed by each root. MessagePack
+    requires the optional package msgpack.
+
+    Both formats are written element by element down to STREAM_DEPTH, without building the whole document in memory.
+    Values that are neither numbers nor strings are written as strings.
+    """
+
+    def dump_json(self, instance, stream):
+        """
+        Exports an instance to compact JSON
+        :param instance: an Orchestra, SBE or Unified Repository instance
+        :param stream: a binary output stream
+        """
+        (header, roots, tags) = CompactCodec10._header(instance)
+        encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=str)
+        stream.write(encoder.encode(header)[:-1].encode('utf-8'))
+        stream.write(b',"roots":[')
+        for (i, root) in enumerate(roots):
+            if i:
+                stream.write(b',')
+            CompactCodec10._write_json(root, tags, encoder, stream, 0)
+        stream.write(b']}')
+
+    @staticmethod
+    def _write_json(element: list, tags: Dict[str, int], encoder: json.JSONEncoder, stream, depth: int):
+        if depth >= STREAM_DEPTH:
+            stream.write(encoder.encode(CompactCodec10._compact(element, tags)).encode('utf-8'))
+            return
+        stream.write(b'[%d' % tags[element[0]])
+        for child in element[1:]:
+            stream.write(b',')
+            if isinstance(child, list):
+                CompactCodec10._write_json(child, tags, encoder, stream, depth + 1)
+            else:
+                stream.write(encoder.encode(child).encode('utf-8'))
+        stream.write(b']')
+
+    def load_json(self, stream):
+        """
+        Imports an instance from compact JSON
+        :param stream: a binary or text input stream
+        :return: an instance of the kind that was exported
+        :raises ValueError: if the stream does not hold a compact document
+        """
+        with _gc_paused():
+            document = json.load(stream)
+            CompactCodec10._check(document)
+            return CompactCodec10._instance(document, document['roots'])
+
+    def dump_msgpack(self, instance, stream):
+        """
+        Exports an instance to MessagePack
+        :param instance: an Orchestra, SBE or Unified Repository instance
+        :param stream: a binary output stream
+        """
+        if msgpack is None:
+            raise ImportError('msgpack is required for MessagePack export')
+        (header, roots, tags) = CompactCodec10._header(instance)
+        header['roots'] = len(roots)
+        packer = msgpack.Packer(use_bin_type=True, default=str)
+        stream.write(packer.pack(header))
+        for root in roots:
+            CompactCodec10._write_msgpack(root, tags, packer, stream, 0)
+
+    @staticmethod
+    def _write_msgpack(element: list, tags: Dict[str, int], packer, stream, depth: int):
+        if depth >= STREAM_DEPTH:
+            stream.write(packer.pack(CompactCodec10._compact(element, tags)))
+            return
+        stream.write(packer.pack_array_header(len(element)) + packer.pack(tags[element[0]]))
+        for child in element[1:]:
+            if isinstance(child, list):
+                CompactCodec10._write_msgpack(child, tags, packer, stream, depth + 1)
+            else:
+                stream.write(packer.pack(child))
+
+    def load_msgpack(self, stream):
+        """
+        Imports an instance from MessagePack
+        :param stream: a binary input stream
+        :return: an instance of the kind that was exported
+        :raises ValueError: if the stream does not hold a compact document
+        """
+        if msgpack is None:
+            raise ImportError('msgpack is required for MessagePack import')
+        unpacker = msgpack.Unpacker(stream, raw=False)
+        with _gc_paused():
+            document = next(unpacker, None)
+            CompactCodec10._check(document)
+            roots = [next(unpacker) for _ in range(document['roots'])]
+            return CompactCodec10._instance(document, roots)
+
+    @staticmethod
+    def _check(document):
+        if not isinstance(document, dict) or document.get('format', None) != FORMAT:
+            raise ValueError('Not a %s document' % FORMAT)
+        if document.get('version', None) != FORMAT_VERSION:
+            raise ValueError('Unsupported %s version %s' % (FORMAT, document.get('version', None)))
+
+    @staticmethod
+    def _header(instance) -> Tuple[dict, List[list], Dict[str, int]]:
+        kind = next((kind for (kind, cls) in INSTANCE_KINDS if isinstance(instance, cls)), None)
+        if kind is None:
+            raise TypeError('Unsupported instance %s' % type(instance).__name__)
+        if kind == 'unified':
+            roots = [instance.root(), instance.phrases.phrases_root()]
+        elif kind == 'unifiedPhrases':
+            roots = [instance.phrases_root()]
+        else:
+            roots = [instance.root()]
+        tags = {}
+        for root in roots:
+            CompactCodec10._collect_tags(root, tags)
+        header = {'format': FORMAT, 'version': FORMAT_VERSION, 'instance': kind, 'tags': list(tags)}
+        return header, roots, tags
+
+    @staticmethod
+    def _collect_tags(element: list, tags: Dict[str, int]):
+        tags.setdefault(element[0], len(tags))
+        for child in element:
+            if isinstance(child, list):
+                CompactCodec10._collect_tags(child, tags)
+
+    @staticmethod
+    def _compact(element: list, tags: Dict[str, int]) -> list:
+        compact = [tags[element[0]]]
+        for child in element[1:]:
+            compact.append(CompactCodec10._compact(child, tags) if isinstance(child, list) else child)
+        return compact
+
+    @staticmethod
+    def _expand(element: list, tags: List[str]):
+        """ Replaces the index of the name of an element and of its descendants by the name, in place """
+        element[0] = tags[element[0]]
+        for child in element:
+            if isinstance(child, list):
+                CompactCodec10._expand(child, tags)
+
+    @staticmethod
+    def _instance(document: dict, roots: List[list]):
+        tags = document['tags']
+        for root in roots:
+            CompactCodec10._expand(root, tags)
+        kind = document.get('instance', None)
+        if kind == 'unified':
+            return UnifiedInstanceWithPhrases(UnifiedMainInstance(roots[0]), UnifiedPhrasesInstance(roots[1]))
+        cls = next((cls for (name, cls) in INSTANCE_KINDS if name == kind), None)
+        if cls is None:
+            raise ValueError('Unsupported instance %s' % kind)
+        return cls(roots[0])
+
+
+@contextmanager
+def _gc_paused():
+    """ Pauses cyclic garbage collection, which would otherwise run many times while a document is built """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+CompactCodec = CompactCodec10
+"""Exports instances to compact JSON or MessagePack, format version 1"""
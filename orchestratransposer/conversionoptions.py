@@ -0,0 +1,55 @@
+import os
+from typing import List, Optional
+
+FORMATS = ['orch', 'orch11', 'unif', 'sbe', 'sbe2', 'sqlite', 'jsonl']
+
+JOB_OPTIONS = ['fix_versions', 'messages', 'reorder_fields', 'narrow_enums', 'deduplicate_codesets', 'workers']
+"""Options of a conversion that may be given in a manifest"""
+
+LOG_FORMAT = '%(asctime)s %(levelname)s %(message)s'
+
+
+def check_conversion(input_format: str, output_format: str, input_files: List[str], output_files: List[str],
+                     fix_versions: Optional[List[str]] = None, messages: Optional[List[str]] = None,
+                     reorder_fields: Optional[int] = None, narrow_enums: bool = False,
+                     deduplicate_codesets: bool = False) -> List[str]:
+    """
+    Checks that a conversion is supported
+    :return: a list of problems, empty if the conversion can be run
+    """
+    problems = []
+    if input_format not in FORMATS or output_format not in FORMATS:
+        problems.append(f'Unknown format "{input_format if input_format not in FORMATS else output_format}"')
+        return problems
+    if output_format == 'orch11' and input_format != 'orch':
+        problems.append('"orch11" output format can only be used with "orch" input format')
+    if input_format == 'jsonl':
+        problems.append('"jsonl" only supported as output format')
+    if input_format == 'orch11':
+        problems.append('"orch11" only supported as upgrade from "orch" format')
+    if input_format == output_format:
+        problems.append(f'Input format "{input_format}" same as output format; nothing to do.')
+    if 'orch' not in [input_format, output_format]:
+        problems.append(f'One of input format "{input_format}" or output format "{output_format}" must be "orch"')
+    if input_format == 'unif' and not len(input_files) == 2:
+        problems.append('Two input files must be provided for "unif" format')
+    if fix_versions is not None and input_format != 'unif':
+        problems.append('"--fix-versions" can only be used with "unif" input format')
+    if messages is not None and output_format != 'sbe':
+        problems.append('"--messages" can only be used with "sbe" output format')
+    if reorder_fields is not None and output_format != 'sbe':
+        problems.append('"--reorder-fields" can only be used with "sbe" output format')
+    if narrow_enums and output_format != 'sbe':
+        problems.append('"--narrow-enums" can only be used with "sbe" output format')
+    if deduplicate_codesets and (input_format != 'unif' or output_format != 'orch'):
+        problems.append('"--dedup-codesets" can only be used with "unif" input format and "orch" output format')
+    if not output_files:
+        problems.append('An output file must be provided')
+    elif output_format == 'unif' and not len(output_files) == 2:
+        problems.append('Two output files must be provided for "unif" format')
+    return problems
+
+
+def log_path(output_files: List[str]) -> str:
+    """ Returns the path of the log of a conversion: the path of its first output file with extension '.log' """
+    return os.path.splitext(output_files[0])[0] + '.log'
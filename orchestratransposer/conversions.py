@@ -0,0 +1,294 @@
+import csv
+import glob
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from conversionoptions import JOB_OPTIONS, LOG_FORMAT, check_conversion, log_path
+from orchestra.orchestra import Orchestra10, Orchestra10WithAppinfo, Orchestra11
+from orchestra2jsonl import Orchestra2JSONL
+from orchestra2sbe import Orchestra2SBE, Orchestra2SBE10_20
+from orchestra2sqlite import Orchestra2SQLite
+from orchestra2unified import Orchestra2Unified
+from orchestraupdater import Orchestra10_11Updater
+from sbe.sbe import SBE10, SBE20
+from sbe2orchestra import SBE2Orchestra, SBE2Orchestra20_10
+from unified.unified import UnifiedMain, UnifiedPhrases, UnifiedWithPhrases
+from unified2orchestra import Unified2Orchestra
+
+FORMAT_SCHEMAS = {'orch': [Orchestra10], 'orch11': [Orchestra11], 'unif': [Orchestra10WithAppinfo, UnifiedMain,
+                                                                           UnifiedPhrases],
+                  'sbe': [SBE10], 'sbe2': [SBE20], 'sqlite': [], 'jsonl': []}
+"""Schemas used by conversions to or from each format, compiled by each worker of a batch before its first job"""
+
+
+INSTANCE_READERS = {('orch', 'sbe'): Orchestra10, ('orch', 'sbe2'): Orchestra10, ('orch', 'orch11'): Orchestra10,
+                    ('orch', 'jsonl'): Orchestra10, ('orch', 'unif'): Orchestra10WithAppinfo, ('sbe', 'orch'): SBE10,
+                    ('sbe2', 'orch'): SBE20}
+"""Reader of the input of each conversion of a single file that convert() translates from its decoded instance"""
+
+
+def read_xml(reader_class: type, path: str) -> Tuple[object, List[Exception]]:
+    """ Decodes a file by a new instance of a schema class; the default reader of convert() """
+    return reader_class().read_xml(path)
+
+
+def convert(input_format: str, output_format: str, input_files: List[str], output_files: List[str],
+            fix_versions: Optional[List[str]] = None, messages: Optional[List[str]] = None,
+            reorder_fields: Optional[int] = None, narrow_enums: bool = False,
+            workers: Optional[int] = None, deduplicate_codesets: bool = False,
+            read: Callable[[type, str], Tuple[object, List[Exception]]] = read_xml) -> List[Exception]:
+    """
+    Runs a conversion that passed check_conversion()
+    :param read: function that decodes the input file of a conversion in INSTANCE_READERS by its reader class, e.g.
+        from a cache of decoded files
+    :return: a list of errors, if any
+    """
+    reader_class = INSTANCE_READERS.get((input_format, output_format), None)
+    if reader_class is not None and len(input_files) == 1:
+        with open(output_files[0], 'wb') as f:
+            (instance, errors) = read(reader_class, input_files[0])
+            if not errors:
+                errors = convert_instance(instance, input_format, output_format, output_files, f, messages,
+                                          reorder_fields, narrow_enums, workers)
+        for error in errors:
+            logging.getLogger('conversions').error(error)
+        return errors
+    errors = []
+    if input_format == 'orch' and output_format == 'sqlite':
+        translator = Orchestra2SQLite()
+        errors = translator.orch2sqlite_xml(input_files[0], output_files[0])
+    elif output_format == 'orch':
+        if input_format == 'unif' and fix_versions is not None:
+            translator = Unified2Orchestra()
+            results = translator.unified2orch_versions_xml(input_files[0], input_files[1], output_files[0],
+                                                           fix_versions, workers, deduplicate_codesets)
+            for version, version_errors in results.items():
+                print(f'{version}: {len(version_errors)} errors')
+            errors = [error for version_errors in results.values() for error in version_errors]
+            if deduplicate_codesets:
+                print(f'{sum(translator.codesets_merged.values())} duplicate codesets merged')
+        elif input_format == 'unif':
+            translator = Unified2Orchestra()
+            with open(output_files[0], 'wb') as f:
+                errors = translator.unified2orch_xml(input_files[0], input_files[1], f,
+                                                     deduplicate_codesets=deduplicate_codesets)
+            if deduplicate_codesets:
+                print(f'{sum(translator.codesets_merged.values())} duplicate codesets merged')
+        elif input_format in ['sbe', 'sbe2']:
+            translator = SBE2Orchestra()
+            with open(output_files[0], 'wb') as f:
+                errors = translator.sbe2orch_merge_xml(input_files, f, workers)
+        elif input_format == 'sqlite':
+            translator = Orchestra2SQLite()
+            with open(output_files[0], 'wb') as f:
+                errors = translator.sqlite2orch_xml(input_files[0], f)
+    return errors
+
+
+def convert_instance(instance, input_format: str, output_format: str, output_files: List[str], stream,
+                     messages: Optional[List[str]] = None, reorder_fields: Optional[int] = None,
+                     narrow_enums: bool = False, workers: Optional[int] = None) -> List[Exception]:
+    """
+    Translates the decoded input of a conversion in INSTANCE_READERS and writes its output
+    :param instance: input decoded by the reader of the conversion
+    :param stream: binary stream of the first output file
+    :return: a list of errors, if any
+    """
+    errors = []
+    if output_format in ['sbe', 'sbe2']:
+        translator = Orchestra2SBE() if output_format == 'sbe' else Orchestra2SBE10_20()
+        sbe_instance = translator.orch2sbe_dict(instance, messages=messages, workers=workers,
+                                                reorder_fields=reorder_fields, narrow_enums=narrow_enums)
+        errors = (SBE10() if output_format == 'sbe' else SBE20()).write_xml(sbe_instance, stream)
+        if reorder_fields:
+            print(f'{sum(translator.block_length_saved.values())} bytes of blockLength saved')
+        if narrow_enums:
+            print(f'{sum(translator.enum_bytes_saved.values())} bytes saved by narrowed enums')
+    elif output_format == 'orch11':
+        errors = Orchestra11().write_xml(Orchestra10_11Updater().update_dict(instance), stream)
+    elif output_format == 'jsonl':
+        count = Orchestra2JSONL().orch2jsonl_dict(instance, stream)
+        logging.getLogger('conversions').info('Exported %d records', count)
+    elif output_format == 'unif':
+        with open(output_files[1], 'wb') as phrases_stream:
+            errors = UnifiedWithPhrases().write_xml_all(Orchestra2Unified().orch2unified_dict(instance), stream,
+                                                        phrases_stream)
+    elif input_format == 'sbe':
+        errors = Orchestra10().write_xml(SBE2Orchestra().sbe2orch_dict(instance), stream)
+    elif input_format == 'sbe2':
+        errors = Orchestra10().write_xml(SBE2Orchestra20_10().sbe2orch_dict(instance), stream)
+    return errors
+
+
+class BatchConverter10:
+    """
+    Runs the conversions listed in a manifest in a pool of worker processes
+
+    A manifest is a JSON list of jobs, or a CSV file with a header row, where each job has these keys:
+
+    - from, to: input and output formats, as the options --from and --to
+    - input, output: a path, or a list of paths. In CSV, paths are separated by ';'.
+    - optionally fix_versions, messages, reorder_fields, narrow_enums, deduplicate_codesets and workers, as the
+      command line options. In CSV, values of fix_versions and messages are separated by spaces.
+
+    An input path may be a glob pattern, e.g. "schemas/*.xml". The job is then repeated for each matching file, and
+    output paths are formatted with the file name without extension as {stem}, e.g. "orchestra/{stem}.xml". Relative
+    paths are relative to the directory of the manifest.
+
+    Each worker compiles the schemas used by the batch once, so jobs after the first in a worker do not pay for schema
+    compilation. Jobs are started in decreasing size of input, so that long jobs do not finish last. Each job writes
+    its own log file, as a single conversion does. Conversions within a job run in the worker itself unless the job
+    sets workers.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger('conversions')
+
+    def read_manifest(self, manifest_path: str) -> List[dict]:
+        """
+        Reads the jobs of a manifest and expands glob patterns
+        :param manifest_path: path of a JSON or CSV manifest; CSV if its extension is '.csv'
+        :return: jobs with keys from, to, input and output, input and output as lists of paths, and options
+        :raises ValueError: if the manifest is malformed
+        """
+        base_dir = os.path.dirname(os.path.abspath(manifest_path))
+        with open(manifest_path, newline='') as f:
+            if manifest_path.lower().endswith('.csv'):
+                entries = [BatchConverter10._csv_entry(row) for row in csv.DictReader(f)]
+            else:
+                entries = json.load(f)
+        if not isinstance(entries, list):
+            raise ValueError('A manifest must be a list of jobs')
+        jobs = []
+        for (index, entry) in enumerate(entries):
+            if not isinstance(entry, dict) or not all(key in entry for key in ['from', 'to', 'input', 'output']):
+                raise ValueError(f'Job {index + 1} of manifest must have from, to, input and output')
+            inputs = [os.path.join(base_dir, path) for path in BatchConverter10._paths(entry['input'])]
+            outputs = [os.path.join(base_dir, path) for path in BatchConverter10._paths(entry['output'])]
+            options = {key: entry[key] for key in JOB_OPTIONS if entry.get(key, None) not in [None, '']}
+            pattern = next((path for path in inputs if glob.escape(path) != path), None)
+            if pattern is None:
+                jobs.append(dict(options, **{'from': entry['from'], 'to': entry['to'], 'input': inputs,
+                                             'output': outputs}))
+                continue
+            matches = sorted(glob.glob(pattern))
+            if not matches:
+                self.logger.warning('No input matches %s', pattern)
+            for match in matches:
+                stem = os.path.splitext(os.path.basename(match))[0]
+                jobs.append(dict(options, **{'from': entry['from'], 'to': entry['to'],
+                                             'input': [match if path == pattern else path for path in inputs],
+                                             'output': [path.format(stem=stem) for path in outputs]}))
+            if len(matches) > 1 and len({tuple(job['output']) for job in jobs[-len(matches):]}) < len(matches):
+                raise ValueError(f'Outputs of job {index + 1} of manifest must contain {{stem}} to be distinct')
+        return jobs
+
+    @staticmethod
+    def _csv_entry(row: Dict[str, str]) -> dict:
+        entry = {key.strip(): value.strip() for (key, value) in row.items() if key is not None and value is not None}
+        for key in ['input', 'output']:
+            if key in entry:
+                entry[key] = [path.strip() for path in entry[key].split(';') if path.strip()]
+        for key in ['fix_versions', 'messages']:
+            if entry.get(key, None):
+                entry[key] = entry[key].split()
+        for key in ['reorder_fields', 'workers']:
+            if entry.get(key, None):
+                entry[key] = int(entry[key])
+        for key in ['narrow_enums', 'deduplicate_codesets']:
+            if key in entry:
+                entry[key] = entry[key].lower() in ['1', 'true', 'yes']
+        return entry
+
+    @staticmethod
+    def _paths(paths) -> List[str]:
+        return [paths] if isinstance(paths, str) else list(paths)
+
+    def run(self, jobs: List[dict], workers: Optional[int] = None) -> List[dict]:
+        """
+        Runs jobs as read by read_manifest()
+        :param jobs: conversions to run
+        :param workers: maximum number of worker processes; by default, one per CPU. If 1, jobs run in this process.
+        :return: the result of each job in the order of jobs: the job, its number of errors, the text of its errors or
+            problems, its log file, None if it has none, and its duration in seconds
+        """
+        results: List[Optional[dict]] = [None] * len(jobs)
+        runnable = []
+        for (index, job) in enumerate(jobs):
+            problems = check_conversion(job['from'], job['to'], job['input'], job['output'],
+                                        **{key: job[key] for key in JOB_OPTIONS if key in job and key != 'workers'})
+            if problems:
+                results[index] = {'job': job, 'errors': len(problems), 'messages': problems, 'log': None,
+                                  'seconds': 0.0}
+            else:
+                runnable.append(index)
+        # longest jobs first, estimated by size of input
+        runnable.sort(key=lambda i: -sum(os.path.getsize(path) for path in jobs[i]['input'] if os.path.isfile(path)))
+        if workers is None:
+            workers = min(len(runnable), os.cpu_count() or 1)
+        formats = sorted({fmt for i in runnable for fmt in [jobs[i]['from'], jobs[i]['to']]})
+        if workers <= 1 or len(runnable) <= 1:
+            warm_schemas(formats)
+            for index in runnable:
+                results[index] = run_job(jobs[index])
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=warm_schemas, initargs=(formats,)) \
+                    as executor:
+                futures = {index: executor.submit(run_job, jobs[index]) for index in runnable}
+                for (index, future) in futures.items():
+                    try:
+                        results[index] = future.result()
+                    except Exception as e:
+                        # e.g. a worker that died, or a result that could not be pickled
+                        self.logger.error('Job %d failed: %s', index + 1, e)
+                        results[index] = {'job': jobs[index], 'errors': 1, 'messages': [str(e)], 'log': None,
+                                          'seconds': 0.0}
+        return results
+
+
+BatchConverter = BatchConverter10
+"""Runs conversions of a manifest in parallel"""
+
+
+def warm_schemas(formats: List[str]):
+    """ Compiles the schemas of formats in this process, so that conversions do not pay for it """
+    for fmt in formats:
+        for schema_class in FORMAT_SCHEMAS.get(fmt, []):
+            schema_class()
+
+
+def run_job(job: dict, converter: Callable[..., List[Exception]] = convert) -> dict:
+    """
+    Runs a job that passed check_conversion() in this process, with its own log file
+    :param job: a job as read by BatchConverter.read_manifest()
+    :param converter: function that runs the conversion, with the arguments of convert()
+    :return: the result of the job, as returned by BatchConverter.run()
+    """
+    path = log_path(job['output'])
+    root_logger = logging.getLogger()
+    level = root_logger.level
+    handler = None
+    start = time.perf_counter()
+    try:
+        # in the try, so that a log that cannot be created, e.g. in a missing directory, fails only this job
+        handler = logging.FileHandler(path, mode='w')
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        root_logger.addHandler(handler)
+        root_logger.setLevel(logging.INFO)
+        options = {key: job[key] for key in JOB_OPTIONS if key in job}
+        options.setdefault('workers', 1)
+        errors = converter(job['from'], job['to'], job['input'], job['output'], **options)
+    except Exception as e:
+        logging.getLogger('conversions').exception('Conversion of %s failed', ', '.join(job['input']))
+        errors = [e]
+    finally:
+        root_logger.setLevel(level)
+        if handler is not None:
+            root_logger.removeHandler(handler)
+            handler.close()
+    return {'job': job, 'errors': len(errors), 'messages': [str(error) for error in errors[:10]],
+            'log': path if handler is not None else None, 'seconds': time.perf_counter() - start}
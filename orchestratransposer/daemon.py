@@ -0,0 +1,293 @@
+import contextlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import socket
+import socketserver
+import stat
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.managers import SyncManager
+from typing import Iterator, List, Optional, Tuple
+
+from conversionoptions import FORMATS, JOB_OPTIONS, check_conversion
+from conversions import convert, read_xml, run_job, warm_schemas
+from daemonclient import parse_address
+from sbe.sbe import SBE10, SBE20
+from sbe.sbeinclude import XINCLUDE_NAMESPACE
+
+INSTANCE_CACHE_SIZE = 8
+"""Number of decoded input files kept by each worker of a daemon"""
+
+MAX_REQUEST_SIZE = 1 << 20
+"""Maximum length in bytes of a request line"""
+
+
+class InstanceCache10:
+    """
+    Decoded instances of input files, keyed by reader class and path, least recently used discarded first
+
+    An instance is reused until the size or modification time of its file changes. Each read returns a copy, as
+    translators may modify their input. SBE message schemas with XIncludes are not kept, since a change of an included
+    file would not be noticed.
+    """
+
+    def __init__(self, size: int = INSTANCE_CACHE_SIZE):
+        self.size = size
+        self._instances = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def read(self, reader_class: type, path: str) -> Tuple[object, List[Exception]]:
+        """
+        Reads an input file, decoded once until it is modified
+        :param reader_class: Orchestra, SBE or Unified Repository schema class
+        :param path: path of the file
+        :return: a copy of the instance and validation errors, if any
+        """
+        key = (reader_class, os.path.abspath(path))
+        file_stat = os.stat(path)
+        version = (file_stat.st_size, file_stat.st_mtime_ns)
+        entry = self._instances.get(key, None)
+        if entry is not None and entry[0] == version:
+            self._instances.move_to_end(key)
+            self.hits += 1
+            return type(entry[1])(InstanceCache10._copy(entry[1].root())), []
+        self.misses += 1
+        (instance, errors) = reader_class().read_xml(path)
+        if not errors and instance.root() is not None and not InstanceCache10._has_includes(reader_class, path):
+            self._instances[key] = (version, type(instance)(InstanceCache10._copy(instance.root())))
+            self._instances.move_to_end(key)
+            while len(self._instances) > self.size:
+                self._instances.popitem(last=False)
+        return instance, errors
+
+    @staticmethod
+    def _copy(element: list) -> list:
+        return [InstanceCache10._copy(child) if isinstance(child, list) else
+                (dict(child) if isinstance(child, dict) else child) for child in element]
+
+    @staticmethod
+    def _has_includes(reader_class: type, path: str) -> bool:
+        if reader_class not in [SBE10, SBE20]:
+            return False
+        with open(path, 'rb') as f:
+            return XINCLUDE_NAMESPACE.encode() in f.read()
+
+
+InstanceCache = InstanceCache10
+"""Decoded instances of recently converted files"""
+
+_instances: Optional[InstanceCache10] = None
+"""Instance cache of a worker process of a daemon"""
+
+
+def convert_cached(input_format: str, output_format: str, input_files: List[str], output_files: List[str],
+                   **options) -> List[Exception]:
+    """
+    Runs a conversion by convert(), reading its input from the instance cache of this worker
+    :return: a list of errors, if any
+    """
+    read = _instances.read if _instances is not None else read_xml
+    return convert(input_format, output_format, input_files, output_files, read=read, **options)
+
+
+def _init_daemon_worker(cache_size: int):
+    global _instances
+    _instances = InstanceCache10(cache_size)
+    warm_schemas(FORMATS)
+
+
+class _LineWriter(io.TextIOBase):
+    """ Text stream that puts each line written to it, without its end, to a queue """
+
+    def __init__(self, lines):
+        self.lines = lines
+        self._partial = ''
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        lines = (self._partial + text).split('\n')
+        self._partial = lines.pop()
+        for line in lines:
+            self.lines.put(line)
+        return len(text)
+
+    def close(self):
+        if self._partial:
+            self.lines.put(self._partial)
+            self._partial = ''
+        super().close()
+
+
+def _daemon_job_worker(job: dict, lines) -> dict:
+    """ Runs one job in a worker of a daemon; puts each line that it prints to the queue lines, then None """
+    output = _LineWriter(lines)
+    try:
+        with contextlib.redirect_stdout(output):
+            return run_job(job, convert_cached)
+    finally:
+        output.close()
+        lines.put(None)
+
+
+class ConversionDaemon10:
+    """
+    Serves conversions to clients over a local socket, from a pool of worker processes that stay warm
+
+    Each worker compiles all schemas when it starts and keeps the decoded instances of the last INSTANCE_CACHE_SIZE
+    files that it read, so that a conversion only pays for translating and writing, not for interpreter startup,
+    imports, schema compilation or, when its input did not change, decoding.
+
+    The protocol is JSON Lines. A client sends a request per line, a job with keys from, to, input, output and
+    optionally the options of JOB_OPTIONS, as a manifest of BatchConverter, with absolute paths. The daemon answers
+    each request, in order, with an event per line printed by the conversion, {"output": line}, sent as it is printed,
+    then its result, {"result": {"errors": count, "messages": [...], "log": path, "seconds": duration}}. A
+    connection may send any number of requests. The request {"stop": true} stops the daemon.
+
+    Conversions read and write any path that the user running the daemon may. A Unix socket may only be connected to
+    by that user, but any local user may connect to localhost:PORT, and so read and write files as that user.
+    """
+
+    def __init__(self, address: str, workers: Optional[int] = None, cache_size: int = INSTANCE_CACHE_SIZE):
+        """
+        :param address: path of a Unix socket, or localhost:PORT, which lets any local user convert as this user
+        :param workers: number of worker processes; by default, one per CPU
+        :param cache_size: number of decoded input files kept by each worker
+        """
+        self.logger = logging.getLogger('daemon')
+        self.address = address
+        self.workers = workers or os.cpu_count() or 1
+        self.cache_size = cache_size
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.manager: Optional[SyncManager] = None
+        self.server: Optional[socketserver.BaseServer] = None
+        self.ready = threading.Event()
+        """Set when the daemon accepts connections"""
+
+    def serve(self):
+        """ Starts the workers and serves requests until a client stops the daemon, or SIGTERM or SIGINT """
+        (family, address) = parse_address(self.address)
+        if family == socket.AF_UNIX and os.path.exists(address):
+            if not stat.S_ISSOCK(os.stat(address).st_mode):
+                raise FileExistsError(f'{address} exists and is not a socket')
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                if probe.connect_ex(address) == 0:
+                    raise OSError(f'A daemon is already serving on {address}')
+            # left by a daemon that was killed
+            os.unlink(address)
+        # queues of the lines printed by conversions, passed to workers
+        self.manager = multiprocessing.Manager()
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_daemon_worker,
+                                            initargs=(self.cache_size,))
+        # a process is started for each task submitted while no worker is idle
+        for future in [self.executor.submit(os.getpid) for _ in range(self.workers)]:
+            future.result()
+        if family == socket.AF_UNIX:
+            self.server = socketserver.ThreadingUnixStreamServer(address, _ConversionHandler)
+            os.chmod(address, 0o600)
+        else:
+            server_class = type('ConversionServer', (socketserver.ThreadingTCPServer,),
+                                {'address_family': family, 'allow_reuse_address': True})
+            self.server = server_class(address, _ConversionHandler)
+        self.server.daemon_threads = True
+        self.server.conversion_daemon = self
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda signum, frame: self.stop())
+        self.logger.info('Serving on %s with %d workers', self.address, self.workers)
+        self.ready.set()
+        try:
+            self.server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.server.server_close()
+            self.executor.shutdown(cancel_futures=True)
+            self.manager.shutdown()
+            if family == socket.AF_UNIX and os.path.exists(address):
+                os.unlink(address)
+
+    def stop(self):
+        """ Stops serving; requests being converted are answered first """
+        if self.server is not None:
+            threading.Thread(target=self.server.shutdown).start()
+
+    def handle(self, request: dict) -> Iterator[dict]:
+        """
+        Runs a request
+        :return: the events of the request
+        """
+        problems = []
+        if not all(key in request for key in ['from', 'to', 'input', 'output']):
+            problems.append('A request must have from, to, input and output')
+        elif not all(isinstance(request[key], list) and all(isinstance(path, str) and os.path.isabs(path)
+                                                            for path in request[key]) for key in ['input', 'output']):
+            problems.append('Input and output of a request must be lists of absolute paths')
+        else:
+            problems = check_conversion(request['from'], request['to'], request['input'], request['output'],
+                                        **{key: request[key] for key in JOB_OPTIONS
+                                           if key in request and key != 'workers'})
+        if problems:
+            yield {'result': {'errors': len(problems), 'messages': problems, 'log': None, 'seconds': 0.0}}
+            return
+        job = {key: request[key] for key in ['from', 'to', 'input', 'output'] + JOB_OPTIONS if key in request}
+        start = time.perf_counter()
+        try:
+            lines = self.manager.Queue()
+            future = self.executor.submit(_daemon_job_worker, job, lines)
+            while True:
+                try:
+                    line = lines.get(timeout=0.1)
+                except queue.Empty:
+                    # a worker that died does not end its lines
+                    if future.done():
+                        break
+                    continue
+                if line is None:
+                    break
+                yield {'output': line}
+            result = future.result()
+        except Exception as e:
+            self.logger.exception('Conversion of %s failed', ', '.join(job['input']))
+            result = {'errors': 1, 'messages': [str(e)], 'log': None, 'seconds': time.perf_counter() - start}
+        result.pop('job', None)
+        yield {'result': result}
+
+
+ConversionDaemon = ConversionDaemon10
+"""Serves conversions over a Unix socket or localhost TCP"""
+
+
+class _ConversionHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        daemon = self.server.conversion_daemon
+        while True:
+            line = self.rfile.readline(MAX_REQUEST_SIZE)
+            if not line:
+                return
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError('A request must be a JSON object')
+            except ValueError as e:
+                self._send({'result': {'errors': 1, 'messages': [f'Invalid request: {e}'], 'log': None,
+                                       'seconds': 0.0}})
+                continue
+            if request.get('stop', False):
+                self._send({'result': {'errors': 0, 'messages': [], 'log': None, 'seconds': 0.0}})
+                daemon.stop()
+                return
+            for event in daemon.handle(request):
+                self._send(event)
+
+    def _send(self, event: dict):
+        self.wfile.write(json.dumps(event).encode('utf-8') + b'\n')
+        self.wfile.flush()
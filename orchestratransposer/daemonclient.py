@@ -0,0 +1,87 @@
+import json
+import os
+import socket
+from typing import Iterator, List, Optional, Tuple
+
+from conversionoptions import JOB_OPTIONS
+
+
+def parse_address(address: str) -> Tuple[int, object]:
+    """
+    Parses the address of a daemon
+    :param address: path of a Unix socket, or localhost:PORT for TCP
+    :return: the socket family and the address as accepted by socket
+    :raises ValueError: if a TCP host is not a loopback address
+    """
+    (host, sep, port) = address.rpartition(':')
+    if sep and port.isdigit() and os.sep not in host:
+        if host not in ['localhost', '127.0.0.1', '::1', '[::1]']:
+            raise ValueError(f'A daemon only listens on localhost, not "{host}"')
+        host = '127.0.0.1' if host == 'localhost' else host.strip('[]')
+        return socket.AF_INET6 if ':' in host else socket.AF_INET, (host, int(port))
+    if not hasattr(socket, 'AF_UNIX'):
+        raise ValueError('Unix sockets are not supported on this platform; use localhost:PORT')
+    return socket.AF_UNIX, address
+
+
+class ConversionClient10:
+    """
+    Sends conversions to a daemon; one connection is reused by all requests of a client
+    """
+
+    def __init__(self, address: str, timeout: Optional[float] = None):
+        """
+        :param address: path of the Unix socket of the daemon, or localhost:PORT
+        :param timeout: timeout in seconds of each operation on the socket; none by default
+        :raises OSError: if the daemon cannot be reached
+        """
+        (family, address) = parse_address(address)
+        self.socket = socket.socket(family, socket.SOCK_STREAM)
+        self.socket.settimeout(timeout)
+        self.socket.connect(address)
+        self.stream = self.socket.makefile('rwb')
+
+    def close(self):
+        self.stream.close()
+        self.socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def convert(self, input_format: str, output_format: str, input_files: List[str], output_files: List[str],
+                **options) -> Iterator[dict]:
+        """
+        Runs a conversion in the daemon
+        :param options: options of JOB_OPTIONS; None values are omitted
+        :return: the events of the conversion as they are received, the last being its result
+        """
+        request = {'from': input_format, 'to': output_format, 'input': [os.path.abspath(path) for path in input_files],
+                   'output': [os.path.abspath(path) for path in output_files or []]}
+        request.update({key: value for (key, value) in options.items() if key in JOB_OPTIONS and value is not None})
+        return self._send(request)
+
+    def stop(self) -> Iterator[dict]:
+        """ Stops the daemon """
+        return self._send({'stop': True})
+
+    def _send(self, request: dict) -> Iterator[dict]:
+        self.stream.write(json.dumps(request).encode('utf-8') + b'\n')
+        self.stream.flush()
+        return self._events()
+
+    def _events(self) -> Iterator[dict]:
+        while True:
+            line = self.stream.readline()
+            if not line:
+                raise ConnectionError('Daemon closed the connection')
+            event = json.loads(line)
+            yield event
+            if 'result' in event:
+                return
+
+
+ConversionClient = ConversionClient10
+"""Sends conversions to a daemon"""
@@ -1,2 +1,5 @@
 from .orchestra import Orchestra
 from .orchestrainstance import OrchestraInstance
+from .orchestratags import OrchestraTagDictionary, OrchestraTagExporter
+from .orchestravalidator import OrchestraValidator
+from .orchestraquery import OrchestraQuery
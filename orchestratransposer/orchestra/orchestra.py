@@ -2,10 +2,16 @@ import os
 from typing import List, Tuple
 from xml.etree import ElementTree
 
-from xmlschema import JsonMLConverter, XMLSchema
+from xmlschema import JsonMLConverter
 
 from .orchestrainstance import OrchestraInstance10, OrchestraInstance11
 
+try:
+    from ..schemacache import cached_schema
+except ImportError:
+    # imported as a top-level package, as by the translators
+    from schemacache import cached_schema
+
 SCHEMAS_DIR = 'schemas'
 """Directory name for schema files"""
 
@@ -21,7 +27,7 @@ class Orchestra10:
     """Namespace for FIX Orchestra elements"""
 
     def __init__(self):
-        self.xsd = XMLSchema(Orchestra10.get_xsd_path())
+        self.xsd = cached_schema(Orchestra10.get_xsd_path())
 
     @classmethod
     def get_xsd_path(cls):
@@ -88,7 +94,7 @@ class FixmlAppinfo:
     """Directory name for appinfo schema files"""
 
     def __init__(self):
-        self.xsd = XMLSchema(FixmlAppinfo.get_xsd_path())
+        self.xsd = cached_schema(FixmlAppinfo.get_xsd_path())
 
     @classmethod
     def get_xsd_path(cls):
@@ -105,7 +111,7 @@ class Orchestra10WithAppinfo(Orchestra10):
     def __init__(self):
         orch_xsd_path = Orchestra10WithAppinfo.get_xsd_path()
         fixml_xsd_path = FixmlAppinfo.get_xsd_path()
-        self.xsd = XMLSchema([orch_xsd_path, fixml_xsd_path])
+        self.xsd = cached_schema([orch_xsd_path, fixml_xsd_path])
 
     def write_xml(self, instance: OrchestraInstance10, stream) -> List[Exception]:
         """
@@ -148,7 +154,7 @@ class Orchestra11(Orchestra10):
     """Namespace for FIX Orchestra v1.1 RC2 elements"""
 
     def __init__(self):
-        self.xsd = XMLSchema(Orchestra11.get_xsd_path())
+        self.xsd = cached_schema(Orchestra11.get_xsd_path())
 
     @classmethod
     def get_xsd_path(cls):
@@ -1,5 +1,127 @@
 from pprint import pformat
-from typing import List, Optional, Tuple, Union
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class CodesetTable:
+    """
+    Compiled lookup tables of the codes of a codeset, by value and by name in both directions
+
+    Codes with integer values from 0 to DENSE_LIMIT are also held in a list indexed by value, and single-character codes
+    in a list indexed by character code, so that columns of values can be translated by indexing. The table is a
+    snapshot of the codeset when it was compiled.
+    """
+
+    DENSE_LIMIT = 4096
+    """Upper bound of integer values held in a dense table"""
+
+    def __init__(self, codeset: list):
+        """
+        :param codeset: an Orchestra codeset
+        """
+        self.name: str = codeset[1].get('name', None)
+        self.type: str = codeset[1].get('type', None)
+        self.codes: List[list] = [code for code in codeset if isinstance(code, list) and len(code) > 1 and
+                                  code[0] == 'fixr:code']
+        self.code_by_value: Dict[str, list] = {}
+        self.code_by_name: Dict[str, list] = {}
+        for code in self.codes:
+            self.code_by_value.setdefault(str(code[1]['value']), code)
+            self.code_by_name.setdefault(code[1]['name'], code)
+        self.name_by_value: Dict[str, str] = {value: code[1]['name'] for (value, code) in self.code_by_value.items()}
+        self.value_by_name: Dict[str, str] = {name: str(code[1]['value']) for (name, code) in
+                                              self.code_by_name.items()}
+        self.int_names: Optional[List[Optional[str]]] = None
+        """Names of codes indexed by integer value, if all values are integers from 0 to DENSE_LIMIT"""
+        self.char_names: Optional[List[Optional[str]]] = None
+        """Names of codes indexed by character code, if all values are single characters up to U+00FF"""
+        values = list(self.name_by_value)
+        if values and all(value.isdecimal() and value.isascii() and int(value) <= CodesetTable.DENSE_LIMIT for
+                          value in values):
+            self.int_names = [None] * (max(int(value) for value in values) + 1)
+            for (value, name) in self.name_by_value.items():
+                self.int_names[int(value)] = name
+        if values and all(len(value) == 1 and ord(value) < 256 for value in values):
+            self.char_names = [None] * 256
+            for (value, name) in self.name_by_value.items():
+                self.char_names[ord(value)] = name
+        self._lookups = {}
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def code(self, value) -> Optional[list]:
+        """ Returns the code of a value, or None if the value is not a code of the codeset """
+        name = self.code_name(value)
+        return self.code_by_name.get(name, None) if name is not None else None
+
+    def code_name(self, value) -> Optional[str]:
+        """
+        Returns the name of the code of a value
+        :param value: a value as str, as bytes such as a decoded SBE char, or as int. An int is an integer value if the
+        codeset has integer values, else a character code.
+        :return: the name of the code, or None if the value is not a code of the codeset
+        """
+        if isinstance(value, str):
+            return self.name_by_value.get(value, None)
+        if isinstance(value, int):
+            if self.int_names is not None:
+                return self.int_names[value] if 0 <= value < len(self.int_names) else None
+            if self.char_names is not None:
+                return self.char_names[value] if 0 <= value < 256 else None
+            return self.name_by_value.get(str(value), None)
+        if isinstance(value, (bytes, bytearray)):
+            return self.name_by_value.get(bytes(value).rstrip(b'\0').decode('latin-1'), None)
+        return self.name_by_value.get(str(value), None) if value is not None else None
+
+    def code_value(self, name: str) -> Optional[str]:
+        """ Returns the value of a code by its name, or None if the codeset has no code of that name """
+        return self.value_by_name.get(name, None)
+
+    def code_names(self, values: Iterable):
+        """
+        Translates a column of values to the names of their codes; values that are not codes translate to None
+        :param values: a sequence of values as accepted by code_name(), or a NumPy array. An array of integers or of
+        single bytes is translated by indexing a dense table, if the codeset has one.
+        :return: a list of names, or a NumPy array of objects if values is an array
+        """
+        if np is not None and isinstance(values, np.ndarray):
+            lookup = None
+            if values.dtype.kind in 'iu':
+                lookup = self._dense_lookup('int' if self.int_names is not None else 'char')
+            elif values.dtype.kind == 'S' and values.dtype.itemsize == 1:
+                lookup = self._dense_lookup('char')
+                values = values.view(np.uint8)
+            if lookup is not None:
+                indexes = values.astype(np.int64, copy=False)
+                indexes = np.where((indexes >= 0) & (indexes < len(lookup) - 1), indexes, len(lookup) - 1)
+                return lookup[indexes]
+            return np.array([self.code_name(value) for value in values.tolist()], dtype=object)
+        if isinstance(values, (list, tuple)) and all(isinstance(value, str) for value in values):
+            get = self.name_by_value.get
+            return [get(value, None) for value in values]
+        return [self.code_name(value) for value in values]
+
+    def code_values(self, names: Iterable[str]) -> List[Optional[str]]:
+        """ Translates a column of names of codes to their values; unknown names translate to None """
+        get = self.value_by_name.get
+        return [get(name, None) for name in names]
+
+    def _dense_lookup(self, kind: str) -> Optional['np.ndarray']:
+        """ A dense table as a NumPy array of objects with a trailing None for values out of range """
+        names = self.int_names if kind == 'int' else self.char_names
+        if names is None:
+            return None
+        lookup = self._lookups.get(kind, None)
+        if lookup is None:
+            lookup = np.empty(len(names) + 1, dtype=object)
+            lookup[:len(names)] = names
+            self._lookups[kind] = lookup
+        return lookup
 
 
 class OrchestraInstance10:
@@ -10,6 +132,10 @@ class OrchestraInstance10:
 
     def __init__(self, obj=None):
         self.obj = obj if obj is not None else ['fixr:repository', {}]
+        # lookup indexes keyed by (category, index name), each a tuple of indexed list, count indexed, dictionary
+        self._indexes = {}
+        # compiled codesets keyed by name, each a tuple of codeset, count of its children compiled, table
+        self._codeset_tables = {}
 
     def __str__(self):
         return pformat(self.obj, width=120)
@@ -20,6 +146,54 @@ class OrchestraInstance10:
         """
         return self.obj
 
+    def _index(self, category: str, name: str, key: Callable[[dict], object]) -> dict:
+        """
+        Returns an index of the elements of a category, built on first access
+
+        Elements appended to the category since the last access are added to the index. The index is rebuilt if the
+        category was replaced or has fewer elements. Other changes in place, such as removing an element and appending
+        another, are not detected; call invalidate() after them. If keys are duplicated, the first element wins.
+        :param category: the element name of a category, e.g. 'fixr:fields'
+        :param name: name of the index
+        :param key: a function returning the key of an element from its attributes, or None to exclude it
+        """
+        elements = self._types(category)
+        (indexed, count, index) = self._indexes.get((category, name), (None, 0, None))
+        if indexed is not elements or count > len(elements):
+            count = 0
+            index = {}
+        for element in elements[count:]:
+            if isinstance(element, list) and len(element) > 1 and isinstance(element[1], dict):
+                k = key(element[1])
+                if k is not None:
+                    index.setdefault(k, element)
+        self._indexes[(category, name)] = (elements, len(elements), index)
+        return index
+
+    def _lookup(self, category: str, name: str, key: Callable[[dict], object], value) -> Optional[list]:
+        """ Returns the element of an index with a key, checking that the key of the element has not changed since """
+        element = self._index(category, name, key).get(value, None)
+        if element is not None and key(element[1]) != value:
+            # renamed or re-identified in place
+            del self._indexes[(category, name)]
+            element = self._index(category, name, key).get(value, None)
+        return element
+
+    def invalidate(self):
+        """
+        Discards lookup indexes and compiled codesets, which are built again on next access
+
+        Indexes follow elements appended to this instance. Call this after any other change of elements or codes in
+        place, such as removing one or changing its name or id.
+        """
+        self._indexes.clear()
+        self._codeset_tables.clear()
+
+    @staticmethod
+    def _casefold_name(attr: dict) -> Optional[str]:
+        name = attr.get('name', None)
+        return name.casefold() if name is not None else None
+
     def repository(self) -> dict:
         """ Returns attributes of a repository """
         try:
@@ -71,9 +245,7 @@ class OrchestraInstance10:
         """
         :return: a category by name
         """
-        categories = self.categories()
-        return next((category for category in categories if isinstance(category, list) and category[1]['name'] == name),
-                    None)
+        return self._lookup('fixr:categories', 'name', lambda attr: attr.get('name', None), name)
 
     def datatypes(self) -> list:
         """
@@ -314,13 +486,10 @@ class OrchestraInstance10:
         return list(filter(lambda l: isinstance(l, list) and l[0] == 'fixr:groupRef', structure))
 
     def field(self, field_id: int) -> Optional[list]:
-        fields: list = self.fields()
-        return next((field for field in fields if isinstance(field, list) and field[1]['id'] == field_id), None)
+        return self._lookup('fixr:fields', 'id', lambda attr: attr.get('id', None), field_id)
 
     def field_by_name(self, field_name: str) -> Optional[list]:
-        fields: list = self.fields()
-        return next((field for field in fields if isinstance(field, list) and field[1]['name'].casefold() ==
-                     field_name.casefold()), None)
+        return self._lookup('fixr:fields', 'name', self._casefold_name, field_name.casefold())
 
     def field_data_field(self, length_id: int) -> Optional[list]:
         """
@@ -328,35 +497,71 @@ class OrchestraInstance10:
         :param length_id: tag of a length field
         :return: a data field if found, or None
         """
-        fields: list = self.fields()
-        return next((field for field in fields if isinstance(field, list) and field[1].get('lengthId', None) ==
-                     length_id), None)
+        return self._lookup('fixr:fields', 'lengthId', lambda attr: attr.get('lengthId', None), length_id)
 
     def component(self, component_id: int) -> Optional[list]:
-        components: list = self.components()
-        return next((component for component in components if
-                     isinstance(component, list) and component[1]['id'] == component_id), None)
+        return self._lookup('fixr:components', 'id', lambda attr: attr.get('id', None), component_id)
 
     def component_by_name(self, component_name: str) -> Optional[list]:
-        components: list = self.components()
-        return next((component for component in components if
-                     isinstance(component, list) and component[1]['name'].casefold() == component_name.casefold()),
-                    None)
+        return self._lookup('fixr:components', 'name', self._casefold_name, component_name.casefold())
 
     def group(self, group_id: int) -> Optional[list]:
-        groups: list = self.groups()
-        return next((group for group in groups if isinstance(group, list) and group[1]['id'] == group_id), None)
+        return self._lookup('fixr:groups', 'id', lambda attr: attr.get('id', None), group_id)
 
     def group_by_name(self, group_name: str) -> Optional[list]:
-        groups: list = self.groups()
-        return next((group for group in groups if
-                     isinstance(group, list) and group[1]['name'].casefold() == group_name.casefold()), None)
+        return self._lookup('fixr:groups', 'name', self._casefold_name, group_name.casefold())
 
     def codeset_by_name(self, codeset_name: str) -> Optional[list]:
-        codesets: list = self.codesets()
-        return next(
-            (codeset for codeset in codesets if
-             isinstance(codeset, list) and codeset[1]['name'].casefold() == codeset_name.casefold()), None)
+        return self._lookup('fixr:codeSets', 'name', self._casefold_name, codeset_name.casefold())
+
+    def codeset_table(self, codeset_name: str) -> Optional[CodesetTable]:
+        """
+        Returns compiled lookup tables of a codeset, built on first access
+
+        The table is compiled again if codes were appended to or removed from the codeset since. Changes to codes in
+        place are not detected; call invalidate() after them.
+        :param codeset_name: name of a codeset
+        :return: lookup tables of the codeset, or None if not found
+        """
+        codeset = self.codeset_by_name(codeset_name)
+        if codeset is None:
+            return None
+        (compiled, count, table) = self._codeset_tables.get(codeset[1]['name'], (None, 0, None))
+        if compiled is not codeset or count != len(codeset):
+            table = CodesetTable(codeset)
+            self._codeset_tables[codeset[1]['name']] = (codeset, len(codeset), table)
+        return table
+
+    def field_codeset_table(self, field_key: Union[int, str]) -> Optional[CodesetTable]:
+        """
+        Returns compiled lookup tables of the codeset of a field
+        :param field_key: tag or name of a field
+        :return: lookup tables of the codeset, or None if the field is not found or has no codeset
+        """
+        field = self.field(field_key) if isinstance(field_key, int) else self.field_by_name(field_key)
+        if field is None or not field[1].get('type', None):
+            return None
+        return self.codeset_table(field[1]['type'])
+
+    def translate_columns(self, columns: Dict[str, Iterable]) -> Dict[str, Iterable]:
+        """
+        Translates columns of coded values, such as those of a decoded message log, to the names of their codes
+
+        Each column is keyed by the name of its field, optionally preceded by the names of its enclosing groups or
+        composite and a '.' as in the columns of SBEBatchDecoder10. Columns of fields without a codeset are returned
+        unchanged.
+        :param columns: columns of values keyed by field name
+        :return: columns of names of codes, or of the original values, keyed as in columns
+        """
+        translated = {}
+        for (key, values) in columns.items():
+            table = None
+            for name in [key, key.rsplit('.', 1)[-1]]:
+                table = self.field_codeset_table(name)
+                if table is not None:
+                    break
+            translated[key] = table.code_names(values) if table is not None else values
+        return translated
 
     @staticmethod
     def append_field_ref(structure: list, field_ref):
@@ -408,9 +613,7 @@ class OrchestraInstance11(OrchestraInstance10):
         :param scenario_id: numeric ID of the scenario
         :return: a scenario if found, or None
         """
-        scenarios: list = self.scenarios()
-        return next((scenario for scenario in scenarios if 
-                    isinstance(scenario, list) and scenario[1]['id'] == scenario_id), None)
+        return self._lookup('fixr:scenarios', 'id', lambda attr: attr.get('id', None), scenario_id)
 
     def scenario_by_name(self, scenario_name: str) -> Optional[list]:
         """
@@ -418,9 +621,7 @@ class OrchestraInstance11(OrchestraInstance10):
         :param scenario_name: name of the scenario
         :return: a scenario if found, or None
         """
-        scenarios: list = self.scenarios()
-        return next((scenario for scenario in scenarios if 
-                    isinstance(scenario, list) and scenario[1]['name'].casefold() == scenario_name.casefold()), None)
+        return self._lookup('fixr:scenarios', 'name', self._casefold_name, scenario_name.casefold())
 
     def append_scenario(self, scenario: list):
         """
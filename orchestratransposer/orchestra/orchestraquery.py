@@ -0,0 +1,172 @@
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+from .orchestrainstance import OrchestraInstance10
+
+INDEXED_ATTRIBUTES = ['name', 'type', 'baseType', 'category', 'msgType', 'scenario', 'value', 'added', 'addedEP',
+                      'updated', 'updatedEP', 'deprecated', 'deprecatedEP', 'issue']
+"""Attributes of elements that may be queried"""
+
+REF_KINDS = {'fixr:fieldRef': 'field', 'fixr:numInGroup': 'field', 'fixr:componentRef': 'component',
+             'fixr:groupRef': 'group'}
+"""Kind of element referenced by each member of a structure"""
+
+
+class OrchestraQuery10:
+    """
+    Queries the elements of an Orchestra repository by inverted indexes
+
+    The indexes are built in a single pass over the repository. Each maps a value of an attribute, the kind of an
+    element, the section of its category, or an element that it contains, to the set of elements that match. A query
+    intersects the sets of its predicates, smallest first, so its cost depends on the number of matches rather than on
+    the size of the repository.
+
+    The indexes are a snapshot of the repository when the query was created. Create a new one after changing the
+    repository. Containment is by id of the contained element; the scenario of a ref is not distinguished.
+    """
+
+    def __init__(self, orch: OrchestraInstance10):
+        """
+        :param orch: an Orchestra version 1.0 or 1.1 repository
+        """
+        self.orch = orch
+        self.elements: List[list] = []
+        """Indexed elements, in document order; each element is identified by its position in this list"""
+        self.kinds: Dict[str, Set[int]] = {}
+        """Elements keyed by kind: datatype, codeSet, code, field, component, group or message"""
+        self.attributes: Dict[str, Dict[object, Set[int]]] = {attribute: {} for attribute in INDEXED_ATTRIBUTES}
+        """Elements keyed by attribute, then by value"""
+        self.sections: Dict[str, Set[int]] = {}
+        """Elements keyed by the section of their category"""
+        self.contains: Dict[Tuple[str, object], Set[int]] = {}
+        """Components, groups and messages that directly contain an element, keyed by its kind and id"""
+        self._build()
+
+    def _build(self):
+        sections = {}
+        for category in filter(lambda l: isinstance(l, list) and len(l) > 1 and isinstance(l[1], dict),
+                               self.orch.categories()):
+            if 'section' in category[1]:
+                sections[category[1].get('name', None)] = category[1]['section']
+        for elements in [self.orch.datatypes(), self.orch.codesets(), self.orch.fields(), self.orch.components(),
+                         self.orch.groups(), self.orch.messages()]:
+            for element in filter(lambda l: isinstance(l, list) and len(l) > 1 and isinstance(l[1], dict), elements):
+                key = self._add(element, sections)
+                if element[0] == 'fixr:codeSet':
+                    for code in filter(lambda l: isinstance(l, list) and len(l) > 1 and l[0] == 'fixr:code' and
+                                       isinstance(l[1], dict), element):
+                        self._add(code, sections)
+                elif element[0] in ['fixr:component', 'fixr:group', 'fixr:message']:
+                    members = OrchestraQuery10._members(element)
+                    for member in filter(lambda l: isinstance(l, list) and len(l) > 1 and l[0] in REF_KINDS and
+                                         isinstance(l[1], dict), members):
+                        self.contains.setdefault((REF_KINDS[member[0]], member[1].get('id', None)), set()).add(key)
+
+    def _add(self, element: list, sections: Dict[str, str]) -> int:
+        key = len(self.elements)
+        self.elements.append(element)
+        attributes = element[1]
+        kind = element[0][5:]
+        self.kinds.setdefault(kind, set()).add(key)
+        for attribute in INDEXED_ATTRIBUTES:
+            if attribute in attributes:
+                self.attributes[attribute].setdefault(attributes[attribute], set()).add(key)
+        if 'scenario' not in attributes and kind != 'code':
+            self.attributes['scenario'].setdefault('base', set()).add(key)
+        section = sections.get(attributes.get('category', None), None)
+        if section is not None:
+            self.sections.setdefault(section, set()).add(key)
+        return key
+
+    @staticmethod
+    def _members(element: list) -> list:
+        if element[0] == 'fixr:message':
+            return next((l for l in element if isinstance(l, list) and l[0] == 'fixr:structure'), [])
+        return element
+
+    def keys(self, kind: Optional[str] = None, section: Optional[str] = None, contains_field=None,
+             contains_component=None, contains_group=None, transitive: bool = False, **attributes) -> FrozenSet[int]:
+        """
+        Returns the keys of elements that match all predicates
+        :param kind: kind of elements: datatype, codeSet, code, field, component, group or message
+        :param section: section of the category of elements
+        :param contains_field: id of a field referenced by elements, as fieldRef or numInGroup
+        :param contains_component: id of a component referenced by elements
+        :param contains_group: id of a group referenced by elements
+        :param transitive: if True, elements also contain the members of components and groups that they contain
+        :param attributes: values of attributes of elements, e.g. type='Price' or addedEP=269. The scenario of elements
+            without one is 'base'. Any of a list, tuple or set of values matches.
+        :return: keys of elements, which index the list elements
+        :raises KeyError: if an attribute is not indexed
+        """
+        candidates = []
+        if kind is not None:
+            candidates.append(OrchestraQuery10._union(self.kinds, kind))
+        if section is not None:
+            candidates.append(OrchestraQuery10._union(self.sections, section))
+        for (ref_kind, ref_ids) in [('field', contains_field), ('component', contains_component),
+                                    ('group', contains_group)]:
+            if ref_ids is not None:
+                candidates.append(self._containers(ref_kind, ref_ids, transitive))
+        for (attribute, values) in attributes.items():
+            if attribute not in self.attributes:
+                raise KeyError('Attribute %s not indexed' % attribute)
+            candidates.append(OrchestraQuery10._union(self.attributes[attribute], values))
+        if not candidates:
+            return frozenset(range(len(self.elements)))
+        candidates.sort(key=len)
+        result = set(candidates[0])
+        for candidate in candidates[1:]:
+            if not result:
+                break
+            result.intersection_update(candidate)
+        return frozenset(result)
+
+    def select(self, kind: Optional[str] = None, section: Optional[str] = None, contains_field=None,
+               contains_component=None, contains_group=None, transitive: bool = False, **attributes) -> List[list]:
+        """
+        Returns the elements that match all predicates, in document order; see keys() for predicates
+        """
+        return [self.elements[key] for key in sorted(self.keys(kind, section, contains_field, contains_component,
+                                                               contains_group, transitive, **attributes))]
+
+    def changed_in(self, ep) -> List[list]:
+        """
+        Returns the elements added, updated or deprecated in an extension pack, in document order
+        :param ep: number of an extension pack
+        """
+        return [self.elements[key] for key in sorted(self.keys(addedEP=ep) | self.keys(updatedEP=ep) |
+                                                     self.keys(deprecatedEP=ep))]
+
+    def _containers(self, ref_kind: str, ref_ids, transitive: bool) -> Set[int]:
+        containers = OrchestraQuery10._union(self.contains, [(ref_kind, ref_id) for ref_id in
+                                                             OrchestraQuery10._values(ref_ids)])
+        if not transitive:
+            return containers
+        result = set(containers)
+        pending = list(containers)
+        while pending:
+            element = self.elements[pending.pop()]
+            if element[0] in ['fixr:component', 'fixr:group']:
+                for key in self.contains.get((element[0][5:], element[1].get('id', None)), ()):
+                    if key not in result:
+                        result.add(key)
+                        pending.append(key)
+        return result
+
+    @staticmethod
+    def _union(index: dict, values) -> Set[int]:
+        values = OrchestraQuery10._values(values)
+        if len(values) == 1:
+            return index.get(values[0], set())
+        result = set()
+        for value in values:
+            result.update(index.get(value, ()))
+        return result
+
+    @staticmethod
+    def _values(values) -> list:
+        return list(values) if isinstance(values, (list, tuple, set, frozenset)) else [values]
+
+
+OrchestraQuery = OrchestraQuery10
+"""Queries Orchestra version 1.0 or 1.1 repositories"""
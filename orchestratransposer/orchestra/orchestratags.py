@@ -0,0 +1,360 @@
+import logging
+import struct
+import sys
+from array import array
+from typing import Dict, List, Optional, Tuple, Union
+
+from .orchestrainstance import OrchestraInstance10
+
+MAGIC = b'FXTD'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4s9I')
+"""magic, format version, direct table size, hash table size, bucket count, field count, codeset count, code count,
+string count, string data size"""
+
+
+def _bucket(tag: int, count: int) -> int:
+    """ Bucket of a tag, by the high bits of a multiplicative hash so that tags in arithmetic progression spread """
+    return (((tag * 0x9E3779B1) & 0xFFFFFFFF) * count) >> 32
+
+
+def _slot(tag: int, displacement: int, size: int) -> int:
+    """ Slot of a tag in the hash table for the displacement of its bucket, by the 32-bit finalizer of MurmurHash3 """
+    h = (tag ^ (displacement * 0x9E3779B1)) & 0xFFFFFFFF
+    h = ((h ^ (h >> 16)) * 0x85EBCA6B) & 0xFFFFFFFF
+    h = ((h ^ (h >> 13)) * 0xC2B2AE35) & 0xFFFFFFFF
+    return (h ^ (h >> 16)) % size
+
+
+class OrchestraTagDictionary10:
+    """
+    A compact dictionary of FIX tags, exported from the fields, datatypes and codesets of an Orchestra repository
+
+    The dictionary is a set of flat arrays of 32-bit integers and a table of strings, so that it can be written to a
+    binary file and loaded without parsing: loading only wraps the file content in memoryviews. Tags below a limit are
+    looked up by indexing a direct table; sparse high tags, such as user-defined tags, are looked up in a perfect hash
+    table built by hash and displace, so a lookup never probes more than one slot. Strings are decoded on first
+    use, and the codes of a codeset are indexed on first use.
+
+    For each field the dictionary holds its name, its type as in the repository (a datatype or a codeset), its datatype
+    (the type of its codeset, if any) and its base datatype, following baseType to a datatype without a base.
+    """
+
+    def __init__(self, buffer: Union[bytes, bytearray, memoryview]):
+        """
+        Wraps an exported dictionary without copying it
+        :param buffer: content of a dictionary as produced by to_bytes()
+        :raises ValueError: if the buffer is not a tag dictionary of a supported version
+        """
+        view = memoryview(buffer).cast('B')
+        if len(view) < HEADER.size:
+            raise ValueError('Tag dictionary is truncated')
+        (magic, version, direct_size, hash_size, bucket_count, field_count, codeset_count, code_count, string_count,
+         data_size) = HEADER.unpack_from(view)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError('Not a tag dictionary of version %d' % FORMAT_VERSION)
+        self.buffer = buffer
+        offset = HEADER.size
+        sections = []
+        for (code, count) in [('I', direct_size), ('I', hash_size), ('I', hash_size), ('I', bucket_count),
+                              ('I', field_count), ('I', field_count), ('I', field_count), ('I', field_count),
+                              ('I', field_count), ('i', field_count), ('I', codeset_count), ('I', codeset_count),
+                              ('I', codeset_count + 1), ('I', code_count), ('I', code_count),
+                              ('I', string_count + 1)]:
+            end = offset + 4 * count
+            if end > len(view):
+                raise ValueError('Tag dictionary is truncated')
+            section = view[offset:end].cast(code)
+            if sys.byteorder == 'big':
+                section = array(code, section)
+                section.byteswap()
+            sections.append(section)
+            offset = end
+        (self._direct, self._hash_keys, self._hash_values, self._displacements, self._field_tags, self._field_names,
+         self._field_types, self._field_datatypes, self._field_base_types, self._field_codesets, self._codeset_names,
+         self._codeset_types, self._codeset_codes, self._code_values, self._code_names,
+         self._string_offsets) = sections
+        self._strings = view[offset:offset + data_size]
+        self._direct_size = direct_size
+        self._hash_size = hash_size
+        self._bucket_count = bucket_count
+        self._decoded: Dict[int, str] = {}
+        self._code_indexes: Dict[int, Dict[str, str]] = {}
+
+    @staticmethod
+    def load(path: str) -> 'OrchestraTagDictionary10':
+        """
+        Loads a dictionary from a binary file written by write()
+        :param path: path of the file
+        """
+        with open(path, 'rb') as f:
+            return OrchestraTagDictionary10(f.read())
+
+    def write(self, path: str):
+        """
+        Writes the dictionary to a binary file
+        :param path: path of the file
+        """
+        with open(path, 'wb') as f:
+            f.write(self.buffer)
+
+    def to_bytes(self) -> bytes:
+        """ Returns the content of the dictionary, as written by write() """
+        return bytes(self.buffer)
+
+    def __len__(self) -> int:
+        return len(self._field_tags)
+
+    def __contains__(self, tag: int) -> bool:
+        return self.field_index(tag) >= 0
+
+    def tags(self) -> List[int]:
+        """ Returns the tags of all fields in ascending order """
+        return sorted(self._field_tags)
+
+    def field_index(self, tag: int) -> int:
+        """ Returns the index of the field of a tag, or -1 if the tag is not defined """
+        if 0 <= tag < self._direct_size:
+            return self._direct[tag] - 1
+        if self._hash_size:
+            slot = _slot(tag, self._displacements[_bucket(tag, self._bucket_count)], self._hash_size)
+            if self._hash_keys[slot] == tag:
+                return self._hash_values[slot] - 1
+        return -1
+
+    def name(self, tag: int) -> Optional[str]:
+        """ Returns the name of the field of a tag, or None if the tag is not defined """
+        index = self.field_index(tag)
+        return self._string(self._field_names[index]) if index >= 0 else None
+
+    def field_type(self, tag: int) -> Optional[str]:
+        """ Returns the type of a field as in the repository, the name of a datatype or a codeset """
+        index = self.field_index(tag)
+        return self._string(self._field_types[index]) if index >= 0 else None
+
+    def datatype(self, tag: int) -> Optional[str]:
+        """ Returns the datatype of a field, which is the type of its codeset if it has one """
+        index = self.field_index(tag)
+        return self._string(self._field_datatypes[index]) if index >= 0 else None
+
+    def base_type(self, tag: int) -> Optional[str]:
+        """ Returns the base datatype of a field, e.g. float for a field of datatype Qty """
+        index = self.field_index(tag)
+        return self._string(self._field_base_types[index]) if index >= 0 else None
+
+    def codeset(self, tag: int) -> Optional[str]:
+        """ Returns the name of the codeset of a field, or None if it has none """
+        index = self.field_index(tag)
+        if index < 0 or self._field_codesets[index] < 0:
+            return None
+        return self._string(self._codeset_names[self._field_codesets[index]])
+
+    def codes(self, tag: int) -> Dict[str, str]:
+        """ Returns the names of the codes of the codeset of a field keyed by value; empty if it has no codeset """
+        index = self.field_index(tag)
+        if index < 0 or self._field_codesets[index] < 0:
+            return {}
+        codeset_index = self._field_codesets[index]
+        codes = self._code_indexes.get(codeset_index, None)
+        if codes is None:
+            codes = {self._string(self._code_values[i]): self._string(self._code_names[i]) for i in
+                     range(self._codeset_codes[codeset_index], self._codeset_codes[codeset_index + 1])}
+            self._code_indexes[codeset_index] = codes
+        return codes
+
+    def code_name(self, tag: int, value: str) -> Optional[str]:
+        """ Returns the name of a code of the codeset of a field, or None if the value is not a code """
+        return self.codes(tag).get(value, None)
+
+    def _string(self, string_id: int) -> str:
+        string = self._decoded.get(string_id, None)
+        if string is None:
+            string = bytes(self._strings[self._string_offsets[string_id]:
+                                         self._string_offsets[string_id + 1]]).decode('utf-8')
+            self._decoded[string_id] = string
+        return string
+
+
+class OrchestraTagExporter10:
+    """
+    Exports the fields, datatypes and codesets of an Orchestra repository to an OrchestraTagDictionary10
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger('orchestratags')
+
+    def export_dict(self, orch: OrchestraInstance10, direct_size: Optional[int] = None) -> OrchestraTagDictionary10:
+        """
+        Exports a tag dictionary from an Orchestra repository
+        :param orch: an Orchestra version 1.0 repository
+        :param direct_size: tags below this limit are looked up in the direct table and others in the hash table. If
+        not provided, the limit is set after the highest tag below which at least one in four tags is defined.
+        :return: a tag dictionary
+        """
+        return OrchestraTagDictionary10(self.export_bytes(orch, direct_size))
+
+    def export_file(self, orch: OrchestraInstance10, path: str, direct_size: Optional[int] = None):
+        """
+        Exports a tag dictionary from an Orchestra repository to a binary file
+        :param orch: an Orchestra version 1.0 repository
+        :param path: path of the file
+        :param direct_size: limit of the direct table, as for export_dict()
+        """
+        with open(path, 'wb') as f:
+            f.write(self.export_bytes(orch, direct_size))
+
+    def export_bytes(self, orch: OrchestraInstance10, direct_size: Optional[int] = None) -> bytes:
+        """
+        Exports a tag dictionary from an Orchestra repository
+        :param orch: an Orchestra version 1.0 repository
+        :param direct_size: limit of the direct table, as for export_dict()
+        :return: content of a tag dictionary
+        """
+        strings = _StringTable()
+        datatypes = {datatype[1]['name']: datatype[1] for datatype in orch.datatypes() if
+                     isinstance(datatype, list) and len(datatype) > 1}
+        codesets = []
+        codeset_indexes = {}
+        codeset_names = array('I')
+        codeset_types = array('I')
+        codeset_codes = array('I', [0])
+        code_values = array('I')
+        code_names = array('I')
+        for codeset in filter(lambda l: isinstance(l, list) and len(l) > 1, orch.codesets()):
+            name = codeset[1]['name']
+            if name in codeset_indexes:
+                continue
+            codeset_indexes[name] = len(codesets)
+            codesets.append(codeset)
+            codeset_names.append(strings.id(name))
+            codeset_types.append(strings.id(codeset[1].get('type', '')))
+            for code in filter(lambda l: isinstance(l, list) and l[0] == 'fixr:code', codeset):
+                code_values.append(strings.id(str(code[1]['value'])))
+                code_names.append(strings.id(code[1].get('name', '')))
+            codeset_codes.append(len(code_values))
+        fields = {}
+        for field in filter(lambda l: isinstance(l, list) and len(l) > 1, orch.fields()):
+            tag = field[1]['id']
+            if tag in fields:
+                self.logger.warning('Duplicate field tag %d %s', tag, field[1].get('name', ''))
+            elif not 0 < tag <= 0xFFFFFFFF:
+                self.logger.error('Field %s has invalid tag %d', field[1].get('name', ''), tag)
+            else:
+                fields[tag] = field
+        tags = sorted(fields)
+        field_names = array('I')
+        field_types = array('I')
+        field_datatypes = array('I')
+        field_base_types = array('I')
+        field_codesets = array('i')
+        for tag in tags:
+            attributes = fields[tag][1]
+            field_type = attributes.get('type', '')
+            codeset_index = codeset_indexes.get(field_type, -1)
+            datatype = codesets[codeset_index][1].get('type', '') if codeset_index >= 0 else field_type
+            field_names.append(strings.id(attributes.get('name', '')))
+            field_types.append(strings.id(field_type))
+            field_datatypes.append(strings.id(datatype))
+            field_base_types.append(strings.id(OrchestraTagExporter10._base_type(datatype, datatypes)))
+            field_codesets.append(codeset_index)
+        if direct_size is None:
+            direct_size = OrchestraTagExporter10._direct_size(tags)
+        direct = array('I', bytes(4 * direct_size))
+        sparse = []
+        for (index, tag) in enumerate(tags):
+            if tag < direct_size:
+                direct[tag] = index + 1
+            else:
+                sparse.append((tag, index + 1))
+        (hash_keys, hash_values, displacements) = OrchestraTagExporter10._perfect_hash(sparse)
+        (string_offsets, string_data) = strings.arrays()
+        sections = [direct, hash_keys, hash_values, displacements, array('I', tags), field_names, field_types,
+                    field_datatypes, field_base_types, field_codesets, codeset_names, codeset_types, codeset_codes,
+                    code_values, code_names, string_offsets]
+        if sys.byteorder == 'big':
+            for section in sections:
+                section.byteswap()
+        header = HEADER.pack(MAGIC, FORMAT_VERSION, direct_size, len(hash_keys), len(displacements), len(tags),
+                             len(codesets), len(code_values), len(string_offsets) - 1, len(string_data))
+        self.logger.info('Exported %d tags, %d in hash table', len(tags), len(sparse))
+        return b''.join([header] + [section.tobytes() for section in sections] + [string_data])
+
+    @staticmethod
+    def _base_type(datatype: str, datatypes: Dict[str, dict]) -> str:
+        visited = set()
+        while datatype not in visited and datatypes.get(datatype, {}).get('baseType', None):
+            visited.add(datatype)
+            datatype = datatypes[datatype]['baseType']
+        return datatype
+
+    @staticmethod
+    def _direct_size(tags: List[int]) -> int:
+        direct_size = 0
+        for (index, tag) in enumerate(tags):
+            if (index + 1) * 4 >= tag:
+                direct_size = tag + 1
+        return direct_size
+
+    @staticmethod
+    def _perfect_hash(entries: List[Tuple[int, int]]) -> Tuple[array, array, array]:
+        """
+        Builds a perfect hash table by hash and displace: keys are distributed to buckets, then for each bucket,
+        largest first, a displacement is searched that sends all of its keys to free slots. One slot in five is left
+        free so that the search for the last buckets stays short.
+        :param entries: (tag, value) tuples
+        :return: arrays of keys and values by slot, and of displacements by bucket
+        """
+        if not entries:
+            return array('I'), array('I'), array('I')
+        size = len(entries) * 5 // 4 + 1
+        bucket_count = (len(entries) + 3) // 4
+        buckets = [[] for _ in range(bucket_count)]
+        for entry in entries:
+            buckets[_bucket(entry[0], bucket_count)].append(entry)
+        keys = array('I', bytes(4 * size))
+        values = array('I', bytes(4 * size))
+        occupied = [False] * size
+        displacements = array('I', bytes(4 * bucket_count))
+        for bucket_index in sorted(range(bucket_count), key=lambda b: (-len(buckets[b]), b)):
+            bucket = buckets[bucket_index]
+            if not bucket:
+                continue
+            displacement = 0
+            while True:
+                slots = [_slot(tag, displacement, size) for (tag, _) in bucket]
+                if len(set(slots)) == len(slots) and not any(occupied[slot] for slot in slots):
+                    break
+                displacement += 1
+            displacements[bucket_index] = displacement
+            for ((tag, value), slot) in zip(bucket, slots):
+                keys[slot] = tag
+                values[slot] = value
+                occupied[slot] = True
+        return keys, values, displacements
+
+
+class _StringTable:
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._strings: List[bytes] = []
+
+    def id(self, string: str) -> int:
+        string_id = self._ids.get(string, None)
+        if string_id is None:
+            string_id = len(self._strings)
+            self._ids[string] = string_id
+            self._strings.append(string.encode('utf-8'))
+        return string_id
+
+    def arrays(self) -> Tuple[array, bytes]:
+        offsets = array('I', [0])
+        for string in self._strings:
+            offsets.append(offsets[-1] + len(string))
+        return offsets, b''.join(self._strings)
+
+
+OrchestraTagDictionary = OrchestraTagDictionary10
+"""Dictionary of FIX tags exported from Orchestra version 1.0"""
+
+OrchestraTagExporter = OrchestraTagExporter10
+"""Exports a tag dictionary from Orchestra version 1.0"""
@@ -0,0 +1,262 @@
+import logging
+import re
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple, Union
+
+from .orchestrainstance import OrchestraInstance10
+
+DATATYPE_PATTERNS = {
+    'int': r'-?[0-9]+',
+    'float': r'-?([0-9]+(\.[0-9]*)?|\.[0-9]+)',
+    'char': r'[\x21-\x7e\x80-\xff]',
+    'Boolean': r'[YN]',
+    'DayOfMonth': r'([1-9]|[12][0-9]|3[01])',
+    'MonthYear': r'[0-9]{4}(0[1-9]|1[0-2])([0-9]{2}|w[1-5])?',
+    'UTCTimestamp': r'[0-9]{8}-[0-9]{2}:[0-9]{2}:[0-9]{2}(\.[0-9]{1,9})?',
+    'UTCTimeOnly': r'[0-9]{2}:[0-9]{2}:[0-9]{2}(\.[0-9]{1,9})?',
+    'UTCDateOnly': r'[0-9]{8}',
+    'LocalMktDate': r'[0-9]{8}',
+    'TZTimeOnly': r'[0-9]{2}:[0-9]{2}(:[0-9]{2}(\.[0-9]{1,9})?)?(Z|[+-][0-9]{2}(:[0-9]{2})?)',
+    'TZTimestamp': r'[0-9]{8}-[0-9]{2}:[0-9]{2}(:[0-9]{2}(\.[0-9]{1,9})?)?(Z|[+-][0-9]{2}(:[0-9]{2})?)',
+    'Currency': r'[A-Z]{3}',
+    'Country': r'[A-Z]{2}',
+}
+"""Patterns of FIX tag=value datatypes. Datatypes not listed are checked by their baseType, if any, or not at all."""
+
+MULTIPLE_VALUE_TYPES = {'MultipleCharValue', 'MultipleStringValue'}
+"""Datatypes of codesets whose fields may hold several codes separated by spaces"""
+
+SESSION_TAGS = frozenset([8, 9, 35, 10])
+"""Tags accepted at the root of any message, even if a repository does not define a header and trailer"""
+
+
+class _BlockRules:
+    """ Rules of the fields of a message or of an entry of a repeating group """
+    __slots__ = ('name', 'allowed', 'required', 'groups', 'delimiter')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.allowed: FrozenSet[int] = frozenset()
+        self.required: FrozenSet[int] = frozenset()
+        self.groups: Dict[int, _BlockRules] = {}
+        """Rules of each repeating group keyed by its NumInGroup tag"""
+        self.delimiter: Optional[int] = None
+        """First tag of an entry of a repeating group"""
+
+
+class OrchestraValidator10:
+    """
+    Validates FIX tag=value messages against an Orchestra repository
+
+    The repository is compiled once into rule tables: for each msgType the sets of allowed and required tags, and for
+    each repeating group its delimiter and member sets. Each field is compiled to a single check of its value, either
+    membership in the set of codes of its codeset or a match of the pattern of its datatype. A message is then validated
+    in a single pass over its fields with set and dictionary lookups, without walking the repository.
+
+    Fields of a component are required only if the component and all components that contain it are required.
+    Conditional rules and scenarios other than base are not evaluated.
+    """
+
+    def __init__(self, orch: OrchestraInstance10):
+        """
+        :param orch: an Orchestra version 1.0 repository
+        """
+        self.logger = logging.getLogger('orchestravalidator')
+        self.orch = orch
+        self.field_names: Dict[int, str] = {}
+        self.field_checks: Dict[int, Optional[Callable[[str], object]]] = {}
+        """A function of each field that returns a false value if a value is invalid, or None if values are not
+        checked, keyed by tag"""
+        self.message_rules: Dict[str, _BlockRules] = {}
+        """Rules of each message keyed by msgType"""
+        self._compile_fields()
+        self._compile_messages()
+
+    def _compile_fields(self):
+        datatypes = {datatype[1]['name']: datatype[1] for datatype in self.orch.datatypes() if
+                     isinstance(datatype, list) and len(datatype) > 1}
+        patterns = {}
+        for field in filter(lambda l: isinstance(l, list) and len(l) > 1, self.orch.fields()):
+            tag = field[1]['id']
+            self.field_names[tag] = field[1].get('name', str(tag))
+            type_name = field[1].get('type', None)
+            codeset_table = self.orch.codeset_table(type_name) if type_name else None
+            if codeset_table is not None:
+                codes = frozenset(codeset_table.name_by_value)
+                if codeset_table.type in MULTIPLE_VALUE_TYPES:
+                    self.field_checks[tag] = lambda value, c=codes: all(v in c for v in value.split(' '))
+                else:
+                    self.field_checks[tag] = codes.__contains__
+                continue
+            pattern_name = OrchestraValidator10._pattern_name(type_name, datatypes)
+            if pattern_name not in patterns:
+                patterns[pattern_name] = re.compile(DATATYPE_PATTERNS[pattern_name]).fullmatch if pattern_name else None
+            self.field_checks[tag] = patterns[pattern_name]
+
+    @staticmethod
+    def _pattern_name(type_name: Optional[str], datatypes: Dict[str, dict]) -> Optional[str]:
+        """ Returns the datatype of a pattern, following baseType of datatypes without their own pattern """
+        visited = set()
+        while type_name and type_name not in visited:
+            if type_name in DATATYPE_PATTERNS:
+                return type_name
+            visited.add(type_name)
+            type_name = datatypes.get(type_name, {}).get('baseType', None)
+        return None
+
+    def _compile_messages(self):
+        for message in filter(lambda l: isinstance(l, list) and len(l) > 1, self.orch.messages()):
+            msg_type = message[1].get('msgType', None)
+            if msg_type is None:
+                continue
+            if msg_type in self.message_rules:
+                self.logger.warning('Duplicate msgType %s of message %s', msg_type, message[1].get('name', ''))
+                continue
+            rules = self._compile_block(message[1].get('name', msg_type), OrchestraInstance10.structure(message))
+            rules.allowed = rules.allowed | SESSION_TAGS
+            self.message_rules[msg_type] = rules
+
+    def _compile_block(self, name: str, members: list) -> _BlockRules:
+        rules = _BlockRules(name)
+        allowed = []
+        required = []
+        self._compile_members(members, True, (), rules, allowed, required)
+        rules.allowed = frozenset(allowed)
+        rules.required = frozenset(required)
+        if allowed and members[0] == 'fixr:group':
+            rules.delimiter = allowed[0]
+        return rules
+
+    def _compile_members(self, members: list, required_context: bool, components: Tuple[int, ...],
+                         rules: _BlockRules, allowed: list, required: list):
+        for member in filter(lambda l: isinstance(l, list) and len(l) > 1 and isinstance(l[1], dict), members):
+            presence = member[1].get('presence', 'optional')
+            if presence == 'forbidden':
+                continue
+            is_required = required_context and presence in ['required', 'constant']
+            member_id = member[1].get('id', None)
+            if member[0] == 'fixr:fieldRef':
+                allowed.append(member_id)
+                if is_required:
+                    required.append(member_id)
+            elif member[0] == 'fixr:componentRef':
+                component = self.orch.component(member_id)
+                if component is None or member_id in components:
+                    self.logger.error('Component %s not found or recursive in %s', member_id, rules.name)
+                    continue
+                self._compile_members(component, is_required, components + (member_id,), rules, allowed, required)
+            elif member[0] == 'fixr:groupRef':
+                group = self.orch.group(member_id)
+                num_in_group = next((m for m in group if isinstance(m, list) and m[0] == 'fixr:numInGroup'),
+                                    None) if group else None
+                if num_in_group is None:
+                    self.logger.error('Group %s not found or without numInGroup in %s', member_id, rules.name)
+                    continue
+                tag = num_in_group[1]['id']
+                allowed.append(tag)
+                if is_required:
+                    required.append(tag)
+                rules.groups[tag] = self._compile_block(group[1].get('name', str(member_id)), group)
+
+    def validate_message(self, message: Union[bytes, str], separator: str = '\x01') -> List[Exception]:
+        """
+        Validates a FIX tag=value message
+        :param message: a message, as bytes or str
+        :param separator: field separator, SOH by default
+        :return: a list of errors, if any
+        """
+        try:
+            fields = OrchestraValidator10.parse(message, separator)
+        except ValueError as e:
+            return [e]
+        return self.validate(fields)
+
+    @staticmethod
+    def parse(message: Union[bytes, str], separator: str = '\x01') -> List[Tuple[int, str]]:
+        """
+        Parses a FIX tag=value message into its fields
+        :param message: a message, as bytes or str
+        :param separator: field separator, SOH by default
+        :return: a list of (tag, value) tuples in message order
+        :raises ValueError: if a field is not of the form tag=value
+        """
+        if isinstance(message, (bytes, bytearray, memoryview)):
+            message = bytes(message).decode('latin-1')
+        fields = []
+        for field in message.split(separator):
+            if field:
+                (tag, sep, value) = field.partition('=')
+                if not sep or not tag.isdigit():
+                    raise ValueError('Malformed field %r' % field)
+                fields.append((int(tag), value))
+        return fields
+
+    def validate(self, fields: List[Tuple[int, str]]) -> List[Exception]:
+        """
+        Validates the fields of a parsed message in a single pass
+        :param fields: (tag, value) tuples in message order, as returned by parse()
+        :return: a list of errors, if any
+        """
+        msg_type = next((value for (tag, value) in fields if tag == 35), None)
+        rules = self.message_rules.get(msg_type, None)
+        if rules is None:
+            return [ValueError('Unknown MsgType %s' % msg_type)]
+        errors = []
+        field_checks = self.field_checks
+        # the block of the message or group entry being read, the tags seen in it, None before the first entry of a
+        # group, and for each enclosing block its rules, tags seen, number of entries declared and number read
+        block = rules
+        seen = set()
+        stack = []
+        for (tag, value) in fields:
+            if tag in field_checks:
+                check = field_checks[tag]
+                if check is not None and not check(value):
+                    errors.append(ValueError('Invalid value %r of %s(%d)' % (value, self.field_names[tag], tag)))
+            elif tag not in SESSION_TAGS:
+                errors.append(ValueError('Undefined tag %d' % tag))
+                continue
+            while stack and tag not in block.allowed:
+                (block, seen) = self._close_group(block, seen, stack, errors)
+            if stack and tag == block.delimiter:
+                if seen is not None:
+                    self._check_required(block, seen, errors)
+                seen = {tag}
+                stack[-1][3] += 1
+                continue
+            if tag not in block.allowed:
+                errors.append(ValueError('Tag %d not allowed in %s' % (tag, block.name)))
+                continue
+            if seen is None:
+                errors.append(ValueError('Group %s does not start with delimiter %d' % (block.name, block.delimiter)))
+                seen = set()
+            if tag in seen:
+                errors.append(ValueError('Duplicate tag %d in %s' % (tag, block.name)))
+            seen.add(tag)
+            group = block.groups.get(tag, None)
+            if group is not None:
+                count = int(value) if value.isdigit() else 0
+                stack.append([block, seen, count, 0])
+                (block, seen) = (group, None)
+        while stack:
+            (block, seen) = self._close_group(block, seen, stack, errors)
+        self._check_required(block, seen, errors)
+        return errors
+
+    def _close_group(self, block: _BlockRules, seen: Optional[set], stack: list,
+                     errors: List[Exception]) -> Tuple[_BlockRules, set]:
+        if seen is not None:
+            self._check_required(block, seen, errors)
+        (parent, parent_seen, count, entries) = stack.pop()
+        if count != entries:
+            errors.append(ValueError('Group %s has %d entries but NumInGroup is %d' % (block.name, entries, count)))
+        return parent, parent_seen
+
+    def _check_required(self, block: _BlockRules, seen: set, errors: List[Exception]):
+        if not block.required <= seen:
+            for tag in sorted(block.required - seen):
+                errors.append(ValueError('Missing required %s(%d) in %s' % (self.field_names.get(tag, ''), tag,
+                                                                            block.name)))
+
+
+OrchestraValidator = OrchestraValidator10
+"""Validates FIX tag=value messages against an Orchestra version 1.0 repository"""
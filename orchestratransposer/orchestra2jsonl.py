@@ -0,0 +1,176 @@
+import json
+import logging
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from orchestra.orchestra import Orchestra10
+from orchestra.orchestrainstance import OrchestraInstance10
+
+RECORD_KINDS = ['datatype', 'codeSet', 'code', 'field', 'component', 'group', 'message']
+"""Kinds of records, in the order in which they are exported"""
+
+WRITE_BUFFER_SIZE = 1 << 16
+"""Number of characters of records joined before each write to the output stream"""
+
+
+class Orchestra2JSONL10:
+    """
+    Exports an Orchestra repository to JSON Lines, one record per element
+
+    Each record is a JSON object with the kind of the element, its attributes and its documentation, if any:
+
+    - A code also has the name and id of its codeset.
+    - A component, group or message has its members resolved: each fieldRef, componentRef and groupRef is replaced by
+      the referenced element with the presence of the ref, and components and groups are expanded recursively.
+      A group also has its numInGroup field.
+
+    Records are produced lazily by a generator and written as they are produced, so memory use does not grow with the
+    size of the output. Resolved members of each component and group are computed once and shared by all records that
+    contain them.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger('orchestra2jsonl')
+
+    def orch2jsonl_xml(self, orch_xml, jsonl_stream, kinds: Optional[Iterable[str]] = None) -> List[Exception]:
+        """
+        Export an Orchestra file to JSON Lines
+        :param orch_xml: path of an Orchestra file
+        :param jsonl_stream: a binary output stream
+        :param kinds: kinds of records to export; all of RECORD_KINDS if not provided
+        :return: a list of errors, if any
+        """
+        orchestra = Orchestra10()
+        (orch_instance, errors) = orchestra.read_xml(orch_xml)
+        if errors:
+            for error in errors:
+                self.logger.error(error)
+            return errors
+        count = self.orch2jsonl_dict(orch_instance, jsonl_stream, kinds)
+        self.logger.info('Exported %d records', count)
+        return []
+
+    def orch2jsonl_dict(self, orch: OrchestraInstance10, jsonl_stream, kinds: Optional[Iterable[str]] = None) -> int:
+        """
+        Export an Orchestra dictionary to JSON Lines
+        :param orch: an Orchestra data dictionary
+        :param jsonl_stream: a binary output stream
+        :param kinds: kinds of records to export; all of RECORD_KINDS if not provided
+        :return: the number of records written
+        """
+        encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=str).encode
+        count = 0
+        lines = []
+        size = 0
+        for record in self.records(orch, kinds):
+            line = encode(record)
+            lines.append(line)
+            size += len(line)
+            count += 1
+            if size >= WRITE_BUFFER_SIZE:
+                jsonl_stream.write(('\n'.join(lines) + '\n').encode('utf-8'))
+                lines = []
+                size = 0
+        if lines:
+            jsonl_stream.write(('\n'.join(lines) + '\n').encode('utf-8'))
+        return count
+
+    def records(self, orch: OrchestraInstance10, kinds: Optional[Iterable[str]] = None) -> Iterator[dict]:
+        """
+        Generates a record of each element of a repository
+        :param orch: an Orchestra data dictionary
+        :param kinds: kinds of records to generate; all of RECORD_KINDS if not provided
+        :return: an iterator of records in the order of RECORD_KINDS, then in document order
+        """
+        kinds = set(kinds) if kinds is not None else set(RECORD_KINDS)
+        unknown = kinds - set(RECORD_KINDS)
+        if unknown:
+            raise ValueError('Unknown record kinds %s' % ', '.join(sorted(unknown)))
+        # resolved members of components and groups keyed by element name and id
+        self._resolved: Dict[tuple, list] = {}
+        self._resolving = set()
+        if 'datatype' in kinds:
+            yield from map(lambda e: Orchestra2JSONL10._record('datatype', e), Orchestra2JSONL10._elements(
+                orch.datatypes()))
+        if kinds & {'codeSet', 'code'}:
+            for codeset in Orchestra2JSONL10._elements(orch.codesets()):
+                if 'codeSet' in kinds:
+                    yield Orchestra2JSONL10._record('codeSet', codeset)
+                if 'code' in kinds:
+                    for code in filter(lambda l: l[0] == 'fixr:code', Orchestra2JSONL10._elements(codeset)):
+                        record = Orchestra2JSONL10._record('code', code)
+                        record['codeSet'] = codeset[1].get('name', None)
+                        record['codeSetId'] = codeset[1].get('id', None)
+                        yield record
+        if 'field' in kinds:
+            yield from map(lambda e: Orchestra2JSONL10._record('field', e), Orchestra2JSONL10._elements(orch.fields()))
+        for (kind, elements) in [('component', orch.components), ('group', orch.groups), ('message', orch.messages)]:
+            if kind in kinds:
+                for element in Orchestra2JSONL10._elements(elements()):
+                    record = Orchestra2JSONL10._record(kind, element)
+                    members = OrchestraInstance10.structure(element) if kind == 'message' else element
+                    if kind == 'group':
+                        record['numInGroup'] = self._num_in_group(orch, element)
+                    record['members'] = self._members(orch, members, (element[0], element[1].get('id', None)))
+                    yield record
+
+    @staticmethod
+    def _elements(elements: list) -> Iterator[list]:
+        return filter(lambda l: isinstance(l, list) and len(l) > 1 and isinstance(l[1], dict), elements)
+
+    @staticmethod
+    def _record(kind: str, element: list) -> dict:
+        record = {'kind': kind}
+        record.update(element[1])
+        documentation = OrchestraInstance10.documentation(element)
+        if documentation:
+            record['documentation'] = [{'purpose': purpose, 'text': text} for (purpose, text) in documentation]
+        return record
+
+    def _num_in_group(self, orch: OrchestraInstance10, group: list) -> Optional[dict]:
+        num_in_group = next((l for l in group if isinstance(l, list) and l[0] == 'fixr:numInGroup'), None)
+        if num_in_group is None:
+            return None
+        field = orch.field(num_in_group[1].get('id', None))
+        return {'id': num_in_group[1].get('id', None), 'name': field[1].get('name', None) if field else None}
+
+    def _members(self, orch: OrchestraInstance10, members: list, key: tuple) -> list:
+        """ Returns the resolved members of a component, group or message structure """
+        resolved = []
+        for member in Orchestra2JSONL10._elements(members):
+            member_id = member[1].get('id', None)
+            presence = member[1].get('presence', 'optional')
+            if member[0] == 'fixr:fieldRef':
+                field = orch.field(member_id)
+                if field is None:
+                    self.logger.error('Field %s not found in %s %s', member_id, key[0][5:], key[1])
+                    continue
+                resolved.append({'kind': 'field', 'id': member_id, 'name': field[1].get('name', None),
+                                 'type': field[1].get('type', None), 'presence': presence})
+            elif member[0] in ['fixr:componentRef', 'fixr:groupRef']:
+                (kind, element) = ('component', orch.component(member_id)) if member[0] == 'fixr:componentRef' \
+                    else ('group', orch.group(member_id))
+                if element is None:
+                    self.logger.error('%s %s not found in %s %s', kind, member_id, key[0][5:], key[1])
+                    continue
+                resolved.append({'kind': kind, 'id': member_id, 'name': element[1].get('name', None),
+                                 'presence': presence, 'members': self._structure_members(orch, element)})
+                if kind == 'group':
+                    resolved[-1]['numInGroup'] = self._num_in_group(orch, element)
+        return resolved
+
+    def _structure_members(self, orch: OrchestraInstance10, element: list) -> list:
+        key = (element[0], element[1].get('id', None))
+        members = self._resolved.get(key, None)
+        if members is None:
+            if key in self._resolving:
+                self.logger.error('Recursive %s %s', key[0][5:], key[1])
+                return []
+            self._resolving.add(key)
+            members = self._members(orch, element, key)
+            self._resolving.discard(key)
+            self._resolved[key] = members
+        return members
+
+
+Orchestra2JSONL = Orchestra2JSONL10
+"""Exports Orchestra version 1.0 to JSON Lines"""
@@ -1,24 +1,61 @@
 import logging
-from typing import List, Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
 from orchestra.orchestra import Orchestra10
-from orchestra.orchestrainstance import OrchestraInstance10
+from orchestra.orchestrainstance import CodesetTable, OrchestraInstance10
+from orchestra.orchestravalidator import MULTIPLE_VALUE_TYPES
 from sbe.sbe import SBE10, SBE20
 from sbe.sbeinstance import SBEInstance10, SBEInstance20
+from sbe.sbelayout import SBELayout10
 
 
 class Orchestra2SBE10_10:
+    NARROW_INTEGER_TYPES = [('uint8', 0, 254), ('int8', -127, 127), ('uint16', 0, 65534), ('int16', -32767, 32767),
+                            ('uint32', 0, 4294967294), ('int32', -2147483647, 2147483647)]
+    """Integer encodings of enums from narrowest, each with the range of values that excludes its null value"""
+
+    FIX_DEFAULT_ENCODINGS = {'int': 'int32', 'Length': 'uint16', 'NumInGroup': 'uint16', 'SeqNum': 'uint32',
+                             'TagNum': 'uint16', 'DayOfMonth': 'uint8', 'char': 'char', 'Boolean': 'char'}
+    """Encodings assumed for FIX datatypes that lack an SBE mapping, to report bytes saved by narrowing enums"""
+
+    FIX_INTEGER_TYPES = ['int', 'Length', 'NumInGroup', 'SeqNum', 'TagNum', 'DayOfMonth']
+    """FIX datatypes with integer values"""
+
     def __init__(self):
         self.logger = logging.getLogger('orchestra2sbe')
+        self.memoize = True
+        """If True, the SBE members of each component and group are translated once per conversion"""
+        # SBE fields, data fields and groups of exploded components keyed by component id
+        self._component_memo = {}
+        # SBE groups keyed by group id and components_to_datatypes
+        self._group_memo = {}
+        self.block_length_saved: Dict[str, int] = {}
+        """Bytes of blockLength saved by reordering fields, keyed by message name"""
+        self.enum_bytes_saved: Dict[str, int] = {}
+        """Bytes saved by narrowing enum encodings, keyed by message name"""
 
-    def orch2sbe_dict(self, orch: OrchestraInstance10, components_to_datatypes=True) -> SBEInstance10:
+    def orch2sbe_dict(self, orch: OrchestraInstance10, components_to_datatypes=True,
+                      messages: Optional[List[str]] = None, workers: Optional[int] = None,
+                      reorder_fields: Optional[int] = None, narrow_enums=False) -> SBEInstance10:
         """
         Translate an Orchestra dictionary to an SBE message schema dictionary
         :param orch: an Orchestra version 1.0 data dictionary
         :param components_to_datatypes: if True, convert Orchestra components to composite datatypes
+        :param messages: if provided, only convert messages selected by name, msgType, category or section, and the
+        elements that they depend upon. See orch2sbe_subset().
+        :param workers: maximum number of worker processes to translate messages. See orch2sbe_messages().
+        :param reorder_fields: if provided, fixed-length fields are reordered to minimize padding when aligned to
+        this many bytes. See orch2sbe_reorder_fields().
+        :param narrow_enums: if True, enums are encoded by the narrowest type that holds their values. See
+        orch2sbe_narrow_enum().
         :return: an SBE version 1.0 data dictionary
         """
+        if messages:
+            orch = self.orch2sbe_subset(orch, messages, components_to_datatypes)
         sbe = SBEInstance10()
+        self._component_memo = {}
+        self._group_memo = {}
         self.orch2sbe_metadata(orch, sbe)
         datatypes = orch.datatypes()
         self.orch2sbe_datatypes(datatypes, sbe)
@@ -26,17 +63,29 @@ class Orchestra2SBE10_10:
             components = orch.components()
             self.orch2sbe_components2datatypes(components, orch, sbe)
         codesets = orch.codesets()
-        self.orch2sbe_codesets(codesets, sbe)
+        narrowed = self.orch2sbe_codesets(codesets, sbe, narrow_enums)
         messages = orch.messages()
-        self.orch2sbe_messages(messages, sbe, orch, components_to_datatypes)
+        self.orch2sbe_messages(messages, sbe, orch, components_to_datatypes, workers)
+        self.enum_bytes_saved = {}
+        if narrowed:
+            self.enum_bytes_saved = self.orch2sbe_enum_bytes_saved(sbe, narrowed)
+        self.block_length_saved = {}
+        if reorder_fields:
+            self.block_length_saved = self.orch2sbe_reorder_fields(sbe, reorder_fields)
         return sbe
 
-    def orch2sbe_xml(self, orchestra_xml, sbe_stream, components_to_datatypes=True) -> List[Exception]:
+    def orch2sbe_xml(self, orchestra_xml, sbe_stream, components_to_datatypes=True,
+                     messages: Optional[List[str]] = None, workers: Optional[int] = None,
+                     reorder_fields: Optional[int] = None, narrow_enums=False) -> List[Exception]:
         """
         Translate an Orchestra file to an SBE message schema file
         :param components_to_datatypes: if True, convert Orchestra components to composite datatypes
         :param orchestra_xml: an XML file-like object in Orchestra schema
         :param sbe_stream: an output stream to write an SBE file
+        :param messages: if provided, only convert messages selected by name, msgType, category or section
+        :param workers: maximum number of worker processes to translate messages
+        :param reorder_fields: if provided, alignment in bytes for which fixed-length fields are reordered
+        :param narrow_enums: if True, enums are encoded by the narrowest type that holds their values
         :return: a list of errors, if any
         """
         # Supports embedded SBE encoding types in Orchestra datatypes
@@ -47,13 +96,102 @@ class Orchestra2SBE10_10:
                 self.logger.error(error)
             return errors
         else:
-            sbe_instance = self.orch2sbe_dict(orch_instance, components_to_datatypes)
+            sbe_instance = self.orch2sbe_dict(orch_instance, components_to_datatypes, messages, workers,
+                                              reorder_fields, narrow_enums)
             sbe = SBE10()
             errors = sbe.write_xml(sbe_instance, sbe_stream)
             for error in errors:
                 self.logger.error(error)
             return errors
 
+    def orch2sbe_subset(self, orch: OrchestraInstance10, messages: List[str],
+                        components_to_datatypes=True) -> OrchestraInstance10:
+        """
+        Selects messages and the transitive closure of their dependencies
+
+        A message is selected if its name, msgType, category or the section of its category matches one of the
+        selectors. The result contains the selected messages, the components, groups and fields that they reference
+        directly or indirectly, and the codesets and datatypes of those fields. If components are converted to
+        composite datatypes, components that are not referenced by any structure, such as an SBE message header, are
+        retained as well.
+
+        Elements are shared with the original Orchestra instance, not copied.
+        :param orch: an Orchestra version 1.0 data dictionary
+        :param messages: selectors of messages
+        :param components_to_datatypes: if True, components are to be converted to composite datatypes
+        :return: an Orchestra instance with the selected subset
+        """
+        selectors = set(messages)
+        all_messages = list(filter(lambda l: isinstance(l, list) and l[0] == 'fixr:message', orch.messages()))
+        selected = []
+        for msg in all_messages:
+            category_name = msg[1].get('category', None)
+            category = orch.category(category_name) if category_name else None
+            section = category[1].get('section', None) if category else None
+            if selectors.intersection([msg[1].get('name', None), msg[1].get('msgType', None), category_name,
+                                       section]):
+                selected.append(msg)
+        self.logger.info('Selected %d of %d messages', len(selected), len(all_messages))
+        if not selected:
+            self.logger.warning('No messages selected by %s', ', '.join(messages))
+        field_ids = set()
+        component_ids = set()
+        group_ids = set()
+
+        def visit(structure: list):
+            for member in filter(lambda l: isinstance(l, list) and len(l) > 1 and isinstance(l[1], dict), structure):
+                member_id = member[1].get('id', None)
+                if member[0] in ['fixr:fieldRef', 'fixr:numInGroup']:
+                    field_ids.add(member_id)
+                elif member[0] == 'fixr:componentRef' and member_id not in component_ids:
+                    component_ids.add(member_id)
+                    component = orch.component(member_id)
+                    if component:
+                        visit(component)
+                elif member[0] == 'fixr:groupRef' and member_id not in group_ids:
+                    group_ids.add(member_id)
+                    group = orch.group(member_id)
+                    if group:
+                        visit(group)
+
+        for msg in selected:
+            visit(OrchestraInstance10.structure(msg))
+        components = list(filter(lambda l: isinstance(l, list) and l[0] == 'fixr:component', orch.components()))
+        if components_to_datatypes:
+            referenced_ids = set()
+            for structure in components + \
+                    list(filter(lambda l: isinstance(l, list) and l[0] == 'fixr:group', orch.groups())) + \
+                    [OrchestraInstance10.structure(msg) for msg in all_messages]:
+                referenced_ids.update(ref[1]['id'] for ref in OrchestraInstance10.component_refs(structure))
+            for component in components:
+                if component[1]['id'] not in referenced_ids and component[1]['id'] not in component_ids:
+                    component_ids.add(component[1]['id'])
+                    visit(component)
+        codeset_names = set()
+        datatype_names = set()
+        for field_id in field_ids:
+            field = orch.field(field_id)
+            if field:
+                field_type = field[1].get('type', None)
+                codeset = orch.codeset_by_name(field_type) if field_type else None
+                if codeset:
+                    codeset_names.add(codeset[1]['name'])
+                    datatype_names.add(codeset[1].get('type', None))
+                else:
+                    datatype_names.add(field_type)
+        subset = OrchestraInstance10(['fixr:repository', orch.repository(), orch.metadata()])
+        subset.datatypes().extend(filter(lambda l: isinstance(l, list) and l[0] == 'fixr:datatype' and
+                                         l[1]['name'] in datatype_names, orch.datatypes()))
+        subset.codesets().extend(filter(lambda l: isinstance(l, list) and l[0] == 'fixr:codeSet' and
+                                        l[1]['name'] in codeset_names, orch.codesets()))
+        subset.fields().extend(filter(lambda l: isinstance(l, list) and l[0] == 'fixr:field' and
+                                      l[1]['id'] in field_ids, orch.fields()))
+        subset.components().extend(filter(lambda l: l[1]['id'] in component_ids, components))
+        subset.groups().extend(filter(lambda l: isinstance(l, list) and l[0] == 'fixr:group' and
+                                      l[1]['id'] in group_ids, orch.groups()))
+        subset.messages().extend(selected)
+        return subset
+
     def orch2sbe_metadata(self, orch: OrchestraInstance10, sbe: SBEInstance10):
         """
         Set SBE message schema metadata from Orchestra
@@ -105,13 +243,23 @@ class Orchestra2SBE10_10:
                         sbe_type = ['type', sbe_type_attr]
                         sbe.append_encoding_type(sbe_type)
 
-    def orch2sbe_codesets(self, codesets: list, sbe: SBEInstance10):
+    def orch2sbe_codesets(self, codesets: list, sbe: SBEInstance10,
+                          narrow_enums=False) -> Dict[str, Tuple[str, str]]:
         """
         Append SBE enums from Orchestra codesets
+        :param narrow_enums: if True, enums are encoded by the narrowest type that holds their values
+        :return: original and narrowed encoding types keyed by name of each narrowed enum
         """
+        narrowed = {}
         codeset_lst = filter(lambda l: isinstance(l, list) and l[0] == 'fixr:codeSet', codesets)
         for codeset in codeset_lst:
-            sbe_enum_attr = {'name': codeset[1]['name'], 'encodingType': codeset[1]['type']}
+            encoding_type = codeset[1]['type']
+            if narrow_enums:
+                narrow_type = self.orch2sbe_narrow_enum(codeset, sbe)
+                if narrow_type and narrow_type != encoding_type:
+                    narrowed[codeset[1]['name']] = (encoding_type, narrow_type)
+                    encoding_type = narrow_type
+            sbe_enum_attr = {'name': codeset[1]['name'], 'encodingType': encoding_type}
             documentation = Orchestra2SBE10_10.__documentation_str(codeset)
             if documentation:
                 sbe_enum_attr['description'] = documentation
@@ -125,6 +273,65 @@ class Orchestra2SBE10_10:
                     sbe_code_attr['description'] = documentation
                 sbe_enum.append(sbe_code)
             sbe.append_enum(sbe_enum)
+        if narrowed:
+            self.logger.info('Narrowed encoding of %d enums', len(narrowed))
+        return narrowed
+
+    def orch2sbe_narrow_enum(self, codeset: list, sbe: SBEInstance10) -> Optional[str]:
+        """
+        Selects the narrowest SBE encoding type that holds every value of a codeset
+
+        Values of a FIX integer datatype are encoded by the smallest integer primitive type whose null value is not a
+        valid value. Single-character values of other datatypes are encoded as char. A codeset whose type has an SBE
+        encoding, mapped from an Orchestra datatype or given as a primitive type, keeps that encoding, as does a
+        codeset of a multiple value datatype, since a field may hold several of its values.
+        :param codeset: an Orchestra codeset
+        :param sbe: an SBE message schema with encoding types translated from Orchestra datatypes
+        :return: name of a primitive type, or None to keep the encoding of the codeset type
+        """
+        codeset_type = codeset[1]['type']
+        if codeset_type in SBE10.SBE_PRIMITIVE_TYPES or codeset_type in MULTIPLE_VALUE_TYPES or \
+                sbe.type_by_name(codeset_type):
+            return None
+        values = list(CodesetTable(codeset).name_by_value)
+        if not values:
+            return None
+        if codeset_type in Orchestra2SBE10_10.FIX_INTEGER_TYPES:
+            try:
+                integers = [int(value) for value in values]
+                return next((name for (name, low, high) in Orchestra2SBE10_10.NARROW_INTEGER_TYPES
+                             if low <= min(integers) and max(integers) <= high), None)
+            except ValueError:
+                pass
+        if all(len(value) == 1 and value.isascii() for value in values):
+            return 'char'
+        return None
+
+    def orch2sbe_enum_bytes_saved(self, sbe: SBEInstance10, narrowed: Dict[str, Tuple[str, str]]) -> Dict[str, int]:
+        """
+        Reports bytes saved per message by narrowing enum encodings
+
+        Savings are counted once per fixed-length field of a message and its groups. The original size of an enum is
+        that of its SBE encoding type, or of the default encoding of a FIX datatype without an SBE mapping.
+        :param sbe: an SBE message schema with translated messages
+        :param narrowed: original and narrowed encoding types keyed by enum name
+        :return: bytes saved keyed by message name
+        """
+        layout = SBELayout10(sbe)
+        savings = {}
+        for (name, (original_type, narrow_type)) in narrowed.items():
+            original_type = Orchestra2SBE10_10.FIX_DEFAULT_ENCODINGS.get(original_type, original_type)
+            original_size = layout.type_layout(original_type)['size'] if \
+                original_type in SBELayout10.PRIMITIVE_SIZES or sbe.type_by_name(original_type) else 0
+            if original_size:
+                savings[name] = original_size - layout.type_layout(narrow_type)['size']
+        enum_bytes_saved = {}
+        for message in sbe.messages():
+            saved = sum(savings.get(field[1]['type'], 0) for (path, field) in sbe.iter_fields(message))
+            enum_bytes_saved[message[1]['name']] = saved
+            if saved:
+                self.logger.info('Message %s reduced by %d bytes by narrowed enums', message[1]['name'], saved)
+        return enum_bytes_saved
 
     @staticmethod
     def __documentation_str(element) -> Optional[str]:
@@ -163,28 +370,106 @@ class Orchestra2SBE10_10:
             SBEInstance10.append_data_field(sbe_structure, data_field)
 
     def orch2sbe_messages(self, messages: list, sbe: SBEInstance10, orch: OrchestraInstance10,
-                          components_to_datatypes: bool):
+                          components_to_datatypes: bool, workers: Optional[int] = None):
         """
         Append SBE messages from Orchestra
+
+        Messages are translated independently of each other. If more than one worker is requested, messages are
+        translated in chunks by a pool of worker processes, each of which receives the Orchestra instance once. The
+        translated messages are appended in source order, so the result is the same as sequential translation.
+        :param workers: maximum number of worker processes. If not provided or 1, messages are translated
+        sequentially in the current process.
         """
-        msg_lst = filter(lambda l: isinstance(l, list) and l[0] == 'fixr:message', messages)
-        for msg in msg_lst:
-            sbe_msg = ['sbe:message']
-            sbe_msg_attr = {'name': msg[1]['name'], 'id': msg[1]['id']}
-            sbe_msg.append(sbe_msg_attr)
-            msg_type = msg[1].get('msgType', None)
-            if msg_type:
-                sbe_msg_attr['semanticType'] = msg_type
-            documentation = Orchestra2SBE10_10.__documentation_str(msg)
-            if documentation:
-                sbe_msg_attr['description'] = documentation
-            structure = OrchestraInstance10.structure(msg)
-            field_refs = OrchestraInstance10.field_refs(structure)
-            component_refs = OrchestraInstance10.component_refs(structure)
-            group_refs = OrchestraInstance10.group_refs(structure)
-            self.orch2sbe_append_members(sbe_msg, field_refs, component_refs, group_refs, orch, components_to_datatypes)
+        msg_lst = list(filter(lambda l: isinstance(l, list) and l[0] == 'fixr:message', messages))
+        if not workers or workers <= 1 or len(msg_lst) <= 1:
+            sbe_messages = [self.orch2sbe_message(msg, orch, components_to_datatypes) for msg in msg_lst]
+        else:
+            # several chunks per worker to even out messages of different sizes
+            chunk_size = max(1, -(-len(msg_lst) // (workers * 4)))
+            chunks = [msg_lst[i:i + chunk_size] for i in range(0, len(msg_lst), chunk_size)]
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_messages_worker,
+                                     initargs=(type(self), orch.root(), components_to_datatypes)) as executor:
+                sbe_messages = [sbe_msg for sbe_chunk in executor.map(_orch2sbe_messages_worker, chunks)
+                                for sbe_msg in sbe_chunk]
+        for sbe_msg in sbe_messages:
             sbe.append_message(sbe_msg)
 
+    def orch2sbe_message(self, msg: list, orch: OrchestraInstance10, components_to_datatypes: bool) -> list:
+        """
+        Translates an Orchestra message to an SBE message
+        :param msg: an Orchestra message
+        :param orch: the Orchestra file containing the message, for cross-references
+        :return: an SBE message
+        """
+        sbe_msg = ['sbe:message']
+        self.orch2sbe_message_members(sbe_msg, msg, orch, components_to_datatypes)
+        return sbe_msg
+
+    def orch2sbe_message_members(self, sbe_msg: list, msg: list, orch: OrchestraInstance10,
+                                 components_to_datatypes: bool):
+        sbe_msg_attr = {'name': msg[1]['name'], 'id': msg[1]['id']}
+        sbe_msg.append(sbe_msg_attr)
+        msg_type = msg[1].get('msgType', None)
+        if msg_type:
+            sbe_msg_attr['semanticType'] = msg_type
+        documentation = Orchestra2SBE10_10.__documentation_str(msg)
+        if documentation:
+            sbe_msg_attr['description'] = documentation
+        structure = OrchestraInstance10.structure(msg)
+        field_refs = OrchestraInstance10.field_refs(structure)
+        component_refs = OrchestraInstance10.component_refs(structure)
+        group_refs = OrchestraInstance10.group_refs(structure)
+        self.orch2sbe_append_members(sbe_msg, field_refs, component_refs, group_refs, orch, components_to_datatypes)
+
+    def orch2sbe_reorder_fields(self, sbe: SBEInstance10, alignment: int) -> Dict[str, int]:
+        """
+        Reorders the fixed-length fields of each message and repeating group to minimize padding
+
+        Fields are sorted by alignment and then size, both descending, so that no padding is needed between fields.
+        Within the same alignment, required fields come before optional and constant fields. Groups and
+        variable-length data keep their positions after the fixed-length fields. The original position of each moved
+        field among the fixed-length fields of its message or group is appended to its description.
+        :param sbe: an SBE message schema with translated messages
+        :param alignment: maximum byte alignment of fields and block lengths
+        :return: bytes of blockLength saved per message, including its groups, keyed by message name
+        """
+        layout = SBELayout10(sbe, alignment, use_schema_offsets=False)
+        block_length_saved = {}
+        for message in sbe.messages():
+            saved = self._reorder_block(message, layout)
+            block_length_saved[message[1]['name']] = saved
+            if saved:
+                self.logger.info('Message %s blockLength reduced by %d bytes', message[1]['name'], saved)
+        self.logger.info('Reordered fields saved %d bytes of blockLength in %d messages',
+                         sum(block_length_saved.values()), len(block_length_saved))
+        # structures may have been flattened in their former order, e.g. to count bytes saved by narrowed enums
+        sbe.invalidate_structures()
+        return block_length_saved
+
+    def _reorder_block(self, structure: list, layout: SBELayout10) -> int:
+        positions = [i for i in range(len(structure)) if isinstance(structure[i], list) and structure[i][0] == 'field']
+        fields = [structure[i] for i in positions]
+        sort_keys = []
+        for (index, field) in enumerate(fields):
+            field_layout = layout.field_layout(field)
+            required = field[1].get('presence', 'required') == 'required'
+            sort_keys.append((-layout.field_alignment(field, field_layout), not required, -field_layout['size'],
+                              index))
+        order = [key[-1] for key in sorted(sort_keys)]
+        saved = 0
+        if order != list(range(len(fields))):
+            saved = layout.block_length(fields) - layout.block_length([fields[index] for index in order])
+            for (position, index) in zip(positions, order):
+                field = fields[index]
+                structure[position] = field
+                if position != positions[index]:
+                    note = 'original SBE field position %d' % (index + 1)
+                    description = field[1].get('description', None)
+                    field[1]['description'] = description + '; ' + note if description else note
+        for group in SBEInstance10.groups(structure):
+            saved += self._reorder_block(group, layout)
+        return saved
+
     def orch2sbe_fields(self, sbe_fields: list, sbe_data: list, field_refs: list, orch: OrchestraInstance10):
         """
         Populates lists of SBE fields from Orchestra fieldRefs
@@ -263,18 +548,28 @@ class Orchestra2SBE10_10:
         """
         for component_ref in component_refs:
             component_id = component_ref[1]['id']
-            component = orch.component(component_id)
-            if component:
+            expansion = self._component_memo.get(component_id, None)
+            if expansion is None:
+                component = orch.component(component_id)
+                if not component:
+                    self.logger.error('Component id=%d not found', component_id)
+                    continue
+                expansion = ([], [], [])
                 name = component[1].get('name', 'Unknown')
                 if name not in ['StandardHeader', 'StandardTrailer']:
                     field_refs = OrchestraInstance10.field_refs(component)
-                    self.orch2sbe_fields(sbe_fields, sbe_data, field_refs, orch)
+                    self.orch2sbe_fields(expansion[0], expansion[1], field_refs, orch)
                     nested_component_refs = OrchestraInstance10.component_refs(component)
-                    self.orch2sbe_explode_components(sbe_fields, sbe_data, sbe_groups, nested_component_refs, orch)
+                    self.orch2sbe_explode_components(expansion[0], expansion[1], expansion[2], nested_component_refs,
+                                                     orch)
                     group_refs = OrchestraInstance10.group_refs(component)
-                    self.orch2sbe_groups(sbe_groups, group_refs, orch, False)
-            else:
-                self.logger.error('Component id=%d not found', component_id)
+                    self.orch2sbe_groups(expansion[2], group_refs, orch, False)
+                if self.memoize:
+                    self._component_memo[component_id] = expansion
+            # members are copied so that each message owns its structure
+            sbe_fields.extend(map(Orchestra2SBE10_10._copy_member, expansion[0]))
+            sbe_data.extend(map(Orchestra2SBE10_10._copy_member, expansion[1]))
+            sbe_groups.extend(map(Orchestra2SBE10_10._copy_member, expansion[2]))
 
     def orch2sbe_groups(self, sbe_groups, group_refs, orch, components_to_datatypes: bool):
         """
@@ -286,8 +581,12 @@ class Orchestra2SBE10_10:
         """
         for group_ref in group_refs:
             group_id = group_ref[1]['id']
-            group = orch.group(group_id)
-            if group:
+            sbe_group = self._group_memo.get((group_id, components_to_datatypes), None)
+            if sbe_group is None:
+                group = orch.group(group_id)
+                if not group:
+                    self.logger.error('Group id=%d not found', group_id)
+                    continue
                 name = group[1].get('name', 'Unknown')
                 abbr_name = group[1].get('abbrName', None)
                 if len(name) > 64:
@@ -296,22 +595,27 @@ class Orchestra2SBE10_10:
                     else:
                         name = name[:64]
                     self.logger.warning('Group text_id=%d name=%s shortened to %s', group_id, group[1]['name'], name)
-                if group:
-                    sbe_group = ['group']
-                    sbe_group_attr = {'id': group_id,
-                                      'name': name}
-                    sbe_group.append(sbe_group_attr)
-                    documentation = Orchestra2SBE10_10.__documentation_str(group)
-                    if documentation:
-                        sbe_group_attr['description'] = documentation
-                    sbe_groups.append(sbe_group)
-                    field_refs = OrchestraInstance10.field_refs(group)
-                    component_refs = OrchestraInstance10.component_refs(group)
-                    group_refs = OrchestraInstance10.group_refs(group)
-                    self.orch2sbe_append_members(sbe_group, field_refs, component_refs, group_refs, orch,
-                                                 components_to_datatypes)
-            else:
-                self.logger.error('Group id=%d not found', group_id)
+                sbe_group = ['group']
+                sbe_group_attr = {'id': group_id,
+                                  'name': name}
+                sbe_group.append(sbe_group_attr)
+                documentation = Orchestra2SBE10_10.__documentation_str(group)
+                if documentation:
+                    sbe_group_attr['description'] = documentation
+                field_refs = OrchestraInstance10.field_refs(group)
+                component_refs = OrchestraInstance10.component_refs(group)
+                nested_group_refs = OrchestraInstance10.group_refs(group)
+                self.orch2sbe_append_members(sbe_group, field_refs, component_refs, nested_group_refs, orch,
+                                             components_to_datatypes)
+                if self.memoize:
+                    self._group_memo[(group_id, components_to_datatypes)] = sbe_group
+            sbe_groups.append(Orchestra2SBE10_10._copy_member(sbe_group))
+
+    @staticmethod
+    def _copy_member(member: list) -> list:
+        """ Copies an SBE field, data field or group, including nested members and attributes """
+        return [Orchestra2SBE10_10._copy_member(i) if isinstance(i, list) else dict(i) if isinstance(i, dict) else i
+                for i in member]
 
     @staticmethod
     def orch2sbe_presence(orch_presence: Optional[str]) -> str:
@@ -330,7 +634,6 @@ class Orchestra2SBE10_10:
         :param orch: an Orchestr file for cross-references
         :param sbe: an SBE file to populate
         """
-        sbe_types: list = sbe.first_types()
         for component in filter(lambda l: isinstance(l, list) and l[0] == 'fixr:component', components):
             name = component[1]['name']
             if name not in ['StandardHeader', 'StandardTrailer']:
@@ -358,7 +661,7 @@ class Orchestra2SBE10_10:
                                 sbe_type = ['type', sbe_type_attr]
                                 sbe_type_attr['primitiveType'] = field_type
                                 sbe_composite.append(sbe_type)
-                sbe_types.append(sbe_composite)
+                sbe.append_composite(sbe_composite)
 
 
 Orchestra2SBE = Orchestra2SBE10_10
@@ -369,14 +672,27 @@ class Orchestra2SBE10_20(Orchestra2SBE10_10):
     def __init__(self):
         super().__init__()
 
-    def orch2sbe_dict(self, orch: OrchestraInstance10, components_to_datatypes=True) -> SBEInstance20:
+    def orch2sbe_dict(self, orch: OrchestraInstance10, components_to_datatypes=True,
+                      messages: Optional[List[str]] = None, workers: Optional[int] = None,
+                      reorder_fields: Optional[int] = None, narrow_enums=False) -> SBEInstance20:
         """
         Translate an Orchestra dictionary to an SBE message schema dictionary
         :param components_to_datatypes: if True, convert Orchestra components to composite datatypes
         :param orch: an Orchestra version 1.0 data dictionary
+        :param messages: if provided, only convert messages selected by name, msgType, category or section, and the
+        elements that they depend upon. See orch2sbe_subset().
+        :param workers: maximum number of worker processes to translate messages. See orch2sbe_messages().
+        :param reorder_fields: if provided, fixed-length fields are reordered to minimize padding when aligned to
+        this many bytes. See orch2sbe_reorder_fields().
+        :param narrow_enums: if True, enums are encoded by the narrowest type that holds their values. See
+        orch2sbe_narrow_enum().
         :return: an SBE version 1.0 data dictionary
         """
+        if messages:
+            orch = self.orch2sbe_subset(orch, messages, components_to_datatypes)
         sbe = SBEInstance20()
+        self._component_memo = {}
+        self._group_memo = {}
         self.orch2sbe_metadata(orch, sbe)
         datatypes = orch.datatypes()
         self.orch2sbe_datatypes(datatypes, sbe)
@@ -384,17 +700,29 @@ class Orchestra2SBE10_20(Orchestra2SBE10_10):
             components = orch.components()
             self.orch2sbe_components2datatypes(components, orch, sbe)
         codesets = orch.codesets()
-        self.orch2sbe_codesets(codesets, sbe)
+        narrowed = self.orch2sbe_codesets(codesets, sbe, narrow_enums)
         messages = orch.messages()
-        self.orch2sbe_messages(messages, sbe, orch, components_to_datatypes)
+        self.orch2sbe_messages(messages, sbe, orch, components_to_datatypes, workers)
+        self.enum_bytes_saved = {}
+        if narrowed:
+            self.enum_bytes_saved = self.orch2sbe_enum_bytes_saved(sbe, narrowed)
+        self.block_length_saved = {}
+        if reorder_fields:
+            self.block_length_saved = self.orch2sbe_reorder_fields(sbe, reorder_fields)
         return sbe
 
-    def orch2sbe_xml(self, orchestra_xml, sbe_stream, components_to_datatypes=True) -> List[Exception]:
+    def orch2sbe_xml(self, orchestra_xml, sbe_stream, components_to_datatypes=True,
+                     messages: Optional[List[str]] = None, workers: Optional[int] = None,
+                     reorder_fields: Optional[int] = None, narrow_enums=False) -> List[Exception]:
         """
         Translate an Orchestra file to an SBE message schema file
         :param components_to_datatypes: if True, convert Orchestra components to composite datatypes
         :param orchestra_xml: an XML file-like object in Orchestra schema
         :param sbe_stream: an output stream to write an SBE file
+        :param messages: if provided, only convert messages selected by name, msgType, category or section
+        :param workers: maximum number of worker processes to translate messages
+        :param reorder_fields: if provided, alignment in bytes for which fixed-length fields are reordered
+        :param narrow_enums: if True, enums are encoded by the narrowest type that holds their values
         :return: a list of errors, if any
         """
         # Supports embedded SBE encoding types in Orchestra datatypes
@@ -405,41 +733,33 @@ class Orchestra2SBE10_20(Orchestra2SBE10_10):
                 self.logger.error(error)
             return errors
         else:
-            sbe_instance = self.orch2sbe_dict(orch_instance, components_to_datatypes)
+            sbe_instance = self.orch2sbe_dict(orch_instance, components_to_datatypes, messages, workers,
+                                              reorder_fields, narrow_enums)
             sbe = SBE20()
             errors = sbe.write_xml(sbe_instance, sbe_stream)
             for error in errors:
                 self.logger.error(error)
             return errors
 
-    def orch2sbe_messages(self, messages: list, sbe: SBEInstance20, orch: OrchestraInstance10,
-                      components_to_datatypes: bool):
+    def orch2sbe_message(self, msg: list, orch: OrchestraInstance10, components_to_datatypes: bool) -> list:
         """
-        Append SBE messages from Orchestra
+        Translates an Orchestra message to an SBE message
+        :param msg: an Orchestra message
+        :param orch: the Orchestra file containing the message, for cross-references
+        :return: an SBE message
         """
-        msg_lst = filter(lambda l: isinstance(l, list) and l[0] == 'fixr:message', messages)
-        for msg in msg_lst:
-            sbe_msg = ['message']
-            sbe_msg_attr = {'name': msg[1]['name'], 'id': msg[1]['id']}
-            sbe_msg.append(sbe_msg_attr)
-            msg_type = msg[1].get('msgType', None)
-            if msg_type:
-                sbe_msg_attr['semanticType'] = msg_type
-            documentation = Orchestra2SBE10_20.__documentation_str(msg)
-            if documentation:
-                sbe_msg_attr['description'] = documentation
-            structure = OrchestraInstance10.structure(msg)
-            field_refs = OrchestraInstance10.field_refs(structure)
-            component_refs = OrchestraInstance10.component_refs(structure)
-            group_refs = OrchestraInstance10.group_refs(structure)
-            self.orch2sbe_append_members(sbe_msg, field_refs, component_refs, group_refs, orch, components_to_datatypes)
-            sbe.append_message(sbe_msg)
+        sbe_msg = ['message']
+        self.orch2sbe_message_members(sbe_msg, msg, orch, components_to_datatypes)
+        return sbe_msg
 
-    @staticmethod
-    def __documentation_str(element) -> Optional[str]:
-        # Use first instance of possibly multiple documentations; consider concatenation
-        try:
-            documentation = OrchestraInstance10.documentation(element)
-            return documentation[0][1]
-        except IndexError:
-            return None
+
+def _init_messages_worker(translator_class: type, orch_root: list, components_to_datatypes: bool):
+    global _worker_translator, _worker_orch, _worker_components_to_datatypes
+    _worker_translator = translator_class()
+    _worker_orch = OrchestraInstance10(orch_root)
+    _worker_components_to_datatypes = components_to_datatypes
+
+
+def _orch2sbe_messages_worker(messages: list) -> List[list]:
+    return [_worker_translator.orch2sbe_message(msg, _worker_orch, _worker_components_to_datatypes)
+            for msg in messages]
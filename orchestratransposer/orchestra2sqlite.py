@@ -0,0 +1,297 @@
+import json
+import logging
+import sqlite3
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional, Tuple, Union
+
+from orchestra.orchestra import Orchestra10, Orchestra11
+from orchestra.orchestrainstance import OrchestraInstance10, OrchestraInstance11
+
+PEDIGREE_ATTRIBUTES = ['added', 'addedEP', 'updated', 'updatedEP', 'deprecated', 'deprecatedEP']
+"""Pedigree attributes of Orchestra elements, each a column of the tables of elements"""
+
+ENTITY_COLUMNS = ['position INTEGER PRIMARY KEY', 'id INTEGER', 'name TEXT', 'scenario TEXT'] + \
+                 ['%s TEXT' % attribute for attribute in PEDIGREE_ATTRIBUTES]
+
+ENTITIES = {
+    # category: (table, element, additional attribute columns, member elements)
+    'fixr:datatypes': ('datatypes', 'fixr:datatype', ['baseType'], []),
+    'fixr:codeSets': ('codesets', 'fixr:codeSet', ['type'], ['fixr:code']),
+    'fixr:fields': ('fields', 'fixr:field', ['type', 'lengthId', 'discriminatorId'], []),
+    'fixr:components': ('components', 'fixr:component', ['category'], ['fixr:fieldRef', 'fixr:componentRef',
+                                                                         'fixr:groupRef']),
+    'fixr:groups': ('groups', 'fixr:group', ['category'], ['fixr:numInGroup', 'fixr:fieldRef', 'fixr:componentRef',
+                                                           'fixr:groupRef']),
+    'fixr:messages': ('messages', 'fixr:message', ['msgType', 'category'], ['fixr:structure']),
+}
+"""Categories of an Orchestra repository that are normalized into tables"""
+
+MEMBER_ELEMENTS = ['fixr:numInGroup', 'fixr:fieldRef', 'fixr:componentRef', 'fixr:groupRef']
+
+SCHEMA = ['CREATE TABLE repository (key TEXT PRIMARY KEY, value TEXT)'] + \
+         ['CREATE TABLE %s (%s)' % (table, ', '.join(ENTITY_COLUMNS + ['%s TEXT' % column for column in columns] +
+                                                      ['attributes TEXT', 'extra TEXT']))
+          for (table, _, columns, _) in ENTITIES.values()] + \
+         ['CREATE TABLE codes (code_key INTEGER PRIMARY KEY, codeset_position INTEGER, position INTEGER, %s, '
+          'value TEXT, attributes TEXT, extra TEXT)' % ', '.join(ENTITY_COLUMNS[1:3] + ENTITY_COLUMNS[4:]),
+          'CREATE TABLE members (owner TEXT, owner_position INTEGER, position INTEGER, kind TEXT, ref_id INTEGER, '
+          'ref_scenario TEXT, presence TEXT, attributes TEXT, extra TEXT)',
+          'CREATE TABLE documentation (owner TEXT, owner_key INTEGER, purpose TEXT, language TEXT, text TEXT)']
+"""Tables of an exported repository. An element is restored from its attributes and extra columns, which hold its
+attributes and its children that are not rows of other tables, each with its position, as JSON. The other columns are
+copies for queries."""
+
+INDEXES = ['CREATE INDEX %s_id ON %s (id)' % (table, table) for table in ['codesets', 'fields', 'components', 'groups',
+                                                                         'messages']] + \
+          ['CREATE INDEX %s_name ON %s (name)' % (table, table) for table in ['datatypes', 'codesets', 'fields',
+                                                                             'components', 'groups', 'messages']] + \
+          ['CREATE INDEX %s_addedEP ON %s (addedEP)' % (table, table) for table in ['codes', 'fields', 'components',
+                                                                                   'groups', 'messages']] + \
+          ['CREATE INDEX fields_type ON fields (type)',
+           'CREATE INDEX messages_msgType ON messages (msgType)',
+           'CREATE INDEX codes_codeset ON codes (codeset_position, position)',
+           'CREATE INDEX codes_value ON codes (value)',
+           'CREATE INDEX codes_name ON codes (name)',
+           'CREATE INDEX members_owner ON members (owner, owner_position, position)',
+           'CREATE INDEX members_ref ON members (kind, ref_id)',
+           'CREATE INDEX documentation_owner ON documentation (owner, owner_key)']
+"""Indexes created after the tables are filled"""
+
+Element = Union[list, str]
+
+
+class Orchestra2SQLite10:
+    """
+    Exports an Orchestra repository to an SQLite database and imports it back
+
+    Datatypes, codesets, codes, fields, components, groups, messages, the members of structures with their position and
+    presence, documentation and pedigree are written to normalized, indexed tables, so that a repository can be queried
+    in SQL without parsing XML, e.g. all messages that contain a field, or codes added in an extension pack. Import
+    restores the repository exactly, including elements that are not normalized, such as metadata and sections.
+    Supports Orchestra versions 1.0 and 1.1.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger('orchestra2sqlite')
+
+    def orch2sqlite_xml(self, orch_xml, db_path: str) -> List[Exception]:
+        """
+        Export an Orchestra file to an SQLite database
+        :param orch_xml: path of an Orchestra file, version 1.0 or 1.1
+        :param db_path: path of an SQLite database. Tables of a previous export are replaced.
+        :return: a list of errors, if any
+        """
+        orchestra = Orchestra11() if Orchestra2SQLite10.orchestra_namespace(orch_xml) == Orchestra11.FIXR_NAMESPACE \
+            else Orchestra10()
+        (orch_instance, errors) = orchestra.read_xml(orch_xml)
+        if errors:
+            for error in errors:
+                self.logger.error(error)
+            return errors
+        connection = sqlite3.connect(db_path)
+        try:
+            connection.execute('PRAGMA synchronous = OFF')
+            self.orch2sqlite_dict(orch_instance, connection)
+        finally:
+            connection.close()
+        return []
+
+    @staticmethod
+    def orchestra_namespace(orch_xml) -> Optional[str]:
+        """ Returns the namespace of the root element of an Orchestra file """
+        with open(orch_xml, 'rb') as f:
+            (_, root) = next(ET.iterparse(f, events=('start',)))
+        return root.tag[1:].split('}')[0] if root.tag.startswith('{') else None
+
+    def orch2sqlite_dict(self, orch: OrchestraInstance10, connection: sqlite3.Connection):
+        """
+        Export an Orchestra dictionary to an SQLite database in a single transaction
+        :param orch: an Orchestra version 1.0 or 1.1 data dictionary
+        :param connection: a connection to an SQLite database. Tables of a previous export are replaced.
+        """
+        root = orch.root()
+        (attributes, children) = Orchestra2SQLite10._split(root)
+        repository = {'version': '1.1' if isinstance(orch, OrchestraInstance11) else '1.0',
+                      'attributes': attributes, 'order': []}
+        rows = {table: [] for (table, _, _, _) in ENTITIES.values()}
+        rows.update({'codes': [], 'members': [], 'documentation': []})
+        for (index, child) in children:
+            category = child[0] if isinstance(child, list) else None
+            repository['order'].append([index, category])
+            if category not in ENTITIES:
+                repository['section %d' % index] = child
+                continue
+            (table, element_name, columns, member_names) = ENTITIES[category]
+            (category_attributes, entities) = Orchestra2SQLite10._split(child)
+            extra = []
+            for (position, entity) in entities:
+                if not (isinstance(entity, list) and entity[0] == element_name):
+                    extra.append([position, entity])
+                    continue
+                self._entity_rows(table, position, entity, columns, member_names, rows)
+            repository['category %s' % category] = [category_attributes, extra]
+        with connection:
+            for table in list(rows) + ['repository']:
+                connection.execute('DROP TABLE IF EXISTS %s' % table)
+            for statement in SCHEMA:
+                connection.execute(statement)
+            connection.executemany('INSERT INTO repository VALUES (?, ?)',
+                                   [(key, json.dumps(value)) for (key, value) in repository.items()])
+            for (table, table_rows) in rows.items():
+                if table_rows:
+                    connection.executemany('INSERT INTO %s VALUES (%s)' % (table, ', '.join('?' * len(table_rows[0]))),
+                                           table_rows)
+            for statement in INDEXES:
+                connection.execute(statement)
+        self.logger.info('Exported %s', ', '.join('%d %s' % (len(table_rows), table) for (table, table_rows) in
+                                                  rows.items()))
+
+    def _entity_rows(self, table: str, position: int, entity: list, columns: List[str], member_names: List[str],
+                     rows: Dict[str, list]):
+        (attributes, children) = Orchestra2SQLite10._split(entity)
+        extra = []
+        for (index, child) in children:
+            child_name = child[0] if isinstance(child, list) else None
+            if child_name == 'fixr:code':
+                self._code_rows(position, index, child, rows)
+            elif child_name == 'fixr:structure':
+                (structure_attributes, structure_children) = Orchestra2SQLite10._split(child)
+                structure_extra = self._member_rows(table, position, structure_children, MEMBER_ELEMENTS, rows)
+                extra.append([index, ['fixr:structure', structure_attributes, structure_extra]])
+            elif child_name in member_names:
+                self._member_rows(table, position, [(index, child)], member_names, rows)
+            else:
+                extra.append([index, child])
+                if child_name == 'fixr:annotation':
+                    Orchestra2SQLite10._documentation_rows(table, position, child, rows)
+        rows[table].append([position] + Orchestra2SQLite10._entity_values(attributes) +
+                           [attributes.get(column, None) if attributes else None for column in columns] +
+                           [json.dumps(attributes), json.dumps(extra)])
+
+    def _code_rows(self, codeset_position: int, position: int, code: list, rows: Dict[str, list]):
+        (attributes, children) = Orchestra2SQLite10._split(code)
+        code_key = len(rows['codes'])
+        for (_, child) in children:
+            if isinstance(child, list) and child[0] == 'fixr:annotation':
+                Orchestra2SQLite10._documentation_rows('codes', code_key, child, rows)
+        values = Orchestra2SQLite10._entity_values(attributes)
+        rows['codes'].append([code_key, codeset_position, position] + values[:2] + values[3:] +
+                             [str(attributes['value']) if attributes and 'value' in attributes else None,
+                              json.dumps(attributes), json.dumps([[index, child] for (index, child) in children])])
+
+    def _member_rows(self, owner: str, owner_position: int, children: List[Tuple[int, Element]],
+                     member_names: List[str], rows: Dict[str, list]) -> list:
+        """ Appends rows of members of a structure; returns its other children """
+        extra = []
+        for (index, child) in children:
+            if not (isinstance(child, list) and child[0] in member_names):
+                extra.append([index, child])
+                continue
+            (attributes, member_children) = Orchestra2SQLite10._split(child)
+            attributes = attributes or {}
+            rows['members'].append([owner, owner_position, index, child[0][5:], attributes.get('id', None),
+                                    attributes.get('scenario', None), attributes.get('presence', 'optional'),
+                                    json.dumps(attributes if child[1:2] and isinstance(child[1], dict) else None),
+                                    json.dumps([[i, c] for (i, c) in member_children])])
+        return extra
+
+    @staticmethod
+    def _documentation_rows(owner: str, owner_key: int, annotation: list, rows: Dict[str, list]):
+        for documentation in filter(lambda l: isinstance(l, list) and l[0] == 'fixr:documentation', annotation):
+            (attributes, texts) = Orchestra2SQLite10._split(documentation)
+            attributes = attributes or {}
+            rows['documentation'].append([owner, owner_key, attributes.get('purpose', None),
+                                          attributes.get('xml:lang', attributes.get('langId', None)),
+                                          ''.join(text for (_, text) in texts if isinstance(text, str)).strip()])
+
+    @staticmethod
+    def _entity_values(attributes: Optional[dict]) -> list:
+        attributes = attributes or {}
+        return [attributes.get('id', None), attributes.get('name', None), attributes.get('scenario', 'base')] + \
+               [attributes.get(attribute, None) for attribute in PEDIGREE_ATTRIBUTES]
+
+    @staticmethod
+    def _split(element: list) -> Tuple[Optional[dict], List[Tuple[int, Element]]]:
+        """ Splits an element into its attributes, if any, and its children with their positions in the element """
+        attributes = element[1] if len(element) > 1 and isinstance(element[1], dict) else None
+        start = 2 if attributes is not None else 1
+        return attributes, [(index, element[index]) for index in range(start, len(element))]
+
+    @staticmethod
+    def _join(name: str, attributes: Optional[dict], children: List[Tuple[int, Element]]) -> list:
+        """ Restores an element from its attributes and its children with their positions """
+        element = [name]
+        if attributes is not None:
+            element.append(attributes)
+        element.extend(child for (_, child) in sorted(children, key=lambda c: c[0]))
+        return element
+
+    def sqlite2orch_xml(self, db_path: str, orch_stream) -> List[Exception]:
+        """
+        Import an Orchestra file from an SQLite database
+        :param db_path: path of an SQLite database written by orch2sqlite_xml() or orch2sqlite_dict()
+        :param orch_stream: an output stream to write an Orchestra file
+        :return: a list of errors, if any
+        """
+        connection = sqlite3.connect(db_path)
+        try:
+            orch_instance = self.sqlite2orch_dict(connection)
+        except sqlite3.Error as e:
+            self.logger.error(e)
+            return [e]
+        finally:
+            connection.close()
+        orchestra = Orchestra11() if isinstance(orch_instance, OrchestraInstance11) else Orchestra10()
+        errors = orchestra.write_xml(orch_instance, orch_stream)
+        if errors:
+            for error in errors:
+                self.logger.error(error)
+        return errors
+
+    def sqlite2orch_dict(self, connection: sqlite3.Connection) -> OrchestraInstance10:
+        """
+        Import an Orchestra dictionary from an SQLite database
+        :param connection: a connection to an SQLite database written by orch2sqlite_dict()
+        :return: an Orchestra version 1.0 or 1.1 data dictionary, as exported
+        """
+        repository = {key: json.loads(value)
+                      for (key, value) in connection.execute('SELECT key, value FROM repository')}
+        members = {}
+        for (owner, owner_position, position, kind, attributes, extra) in connection.execute(
+                'SELECT owner, owner_position, position, kind, attributes, extra FROM members ORDER BY rowid'):
+            members.setdefault((owner, owner_position), []).append(
+                (position, Orchestra2SQLite10._join('fixr:' + kind, json.loads(attributes), json.loads(extra))))
+        codes = {}
+        for (codeset_position, position, attributes, extra) in connection.execute(
+                'SELECT codeset_position, position, attributes, extra FROM codes ORDER BY code_key'):
+            codes.setdefault(codeset_position, []).append(
+                (position, Orchestra2SQLite10._join('fixr:code', json.loads(attributes), json.loads(extra))))
+        children = []
+        for (index, category) in repository['order']:
+            if category not in ENTITIES:
+                children.append((index, repository['section %d' % index]))
+                continue
+            (table, element_name, _, member_names) = ENTITIES[category]
+            (category_attributes, category_children) = repository['category %s' % category]
+            category_children = [tuple(child) for child in category_children]
+            for (position, attributes, extra) in connection.execute(
+                    'SELECT position, attributes, extra FROM %s ORDER BY position' % table):
+                entity_children = []
+                for (child_index, child) in json.loads(extra):
+                    if isinstance(child, list) and child[0] == 'fixr:structure':
+                        child = Orchestra2SQLite10._join('fixr:structure', child[1], [tuple(c) for c in child[2]] +
+                                                         members.get((table, position), []))
+                    entity_children.append((child_index, child))
+                if table == 'codesets':
+                    entity_children += codes.get(position, [])
+                elif table in ['components', 'groups']:
+                    entity_children += members.get((table, position), [])
+                category_children.append((position, Orchestra2SQLite10._join(element_name, json.loads(attributes),
+                                                                              entity_children)))
+            children.append((index, Orchestra2SQLite10._join(category, category_attributes, category_children)))
+        root = Orchestra2SQLite10._join('fixr:repository', repository['attributes'], children)
+        return OrchestraInstance11(root) if repository['version'] == '1.1' else OrchestraInstance10(root)
+
+
+Orchestra2SQLite = Orchestra2SQLite10
+"""Exports Orchestra version 1.0 or 1.1 to SQLite"""
@@ -0,0 +1,284 @@
+import copy
+import logging
+import re
+from typing import List, Optional, Tuple
+
+from orchestra.orchestrainstance import OrchestraInstance10
+
+FIELD_SPACE = 'field'
+CODESET_SPACE = 'codeSet'
+STRUCTURE_SPACE = 'structure'
+MESSAGE_SPACE = 'message'
+
+
+class OrchestraMerger10:
+    """
+    Merges Orchestra repositories, such as those translated from the SBE message schemas of several venues, into one
+
+    Datatypes, codesets, fields, components, groups and messages that are structurally identical are merged into a
+    single element. Elements are compared by a structural key that ignores ids and documentation, and in which
+    references are resolved to merged elements, so identical components are recognized even if their fields were given
+    different ids by each translation.
+
+    An element with the same name as a merged element but a different structure is kept as a variant:
+
+    - Datatypes and codesets, which are referenced by name, are renamed with the scenario of their repository as a
+      suffix, e.g. idString_venue2.
+    - Fields, components, groups and messages are given the scenario of their repository, e.g. scenario="venue2".
+      Refs to them carry the scenario.
+
+    Ids of a repository are kept unless already taken in the merged repository, in which case a new id is allocated
+    above the largest id of any repository. A variant takes the id of the merged element of the same name, unless
+    another variant of its scenario has it. Repositories are merged in the order given, so ids are deterministic.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger('orchestramerge')
+
+    def merge(self, orchs: List[OrchestraInstance10], name: Optional[str] = None,
+              scenarios: Optional[List[str]] = None) -> OrchestraInstance10:
+        """
+        Merges Orchestra repositories
+        :param orchs: Orchestra repositories to merge, in order of precedence
+        :param name: name of the merged repository. If not provided, the names of the repositories are joined.
+        :param scenarios: scenario of variant elements of each repository. If not provided, the repository names.
+        :return: the merged repository
+        """
+        self.merged = OrchestraInstance10()
+        # (category, structural key) -> merged name for datatypes and codesets, or (id, scenario) for other elements
+        self._keys = {}
+        # (category, name) of merged elements
+        self._names = set()
+        # merged id of the first element of each (category, name), shared by its variants
+        self._base_ids = {}
+        # scenarios of each merged id, keyed by id space, then by id
+        self._ids = {FIELD_SPACE: {}, CODESET_SPACE: {}, STRUCTURE_SPACE: {}, MESSAGE_SPACE: {}}
+        self._max_ids = {space: 0 for space in self._ids}
+        for orch in orchs:
+            self._reserve_ids(orch)
+        names = [orch.repository().get('name', 'repository') for orch in orchs]
+        if not scenarios:
+            scenarios = OrchestraMerger10.unique_scenarios(names)
+        repository = self.merged.repository()
+        repository['name'] = name or '_'.join(names)
+        repository['version'] = '1.0'
+        metadata = self.merged.metadata()
+        for orch in orchs:
+            for term in filter(lambda l: isinstance(l, list), orch.metadata()):
+                metadata.append(['dcterms:source', '%s %s' % (orch.repository().get('name', ''), term[1])])
+        for (orch, scenario) in zip(orchs, scenarios):
+            self.merge_repository(orch, scenario)
+        return self.merged
+
+    @staticmethod
+    def unique_scenarios(names: List[str]) -> List[str]:
+        """ Returns a valid, distinct scenario name for each repository name """
+        scenarios = []
+        for name in names:
+            scenario = re.sub(r'[^0-9A-Za-z_-]', '_', name or 'repository')
+            if not scenario[0].isalpha():
+                scenario = 'r' + scenario
+            unique = scenario
+            suffix = 1
+            while unique in scenarios:
+                suffix += 1
+                unique = '%s%d' % (scenario, suffix)
+            scenarios.append(unique)
+        return scenarios
+
+    def _reserve_ids(self, orch: OrchestraInstance10):
+        """ Raises the base of new ids above all ids of a repository """
+        for (space, elements) in [(FIELD_SPACE, orch.fields()), (CODESET_SPACE, orch.codesets()),
+                                  (STRUCTURE_SPACE, orch.components()), (STRUCTURE_SPACE, orch.groups()),
+                                  (MESSAGE_SPACE, orch.messages())]:
+            for element in filter(lambda l: isinstance(l, list), elements[1:]):
+                ids = [element[1].get('id', 0)]
+                if space == CODESET_SPACE:
+                    ids += [code[1].get('id', 0) for code in element if isinstance(code, list) and
+                            code[0] == 'fixr:code']
+                self._max_ids[space] = max([self._max_ids[space]] + [int(i) for i in ids if i is not None])
+
+    def merge_repository(self, orch: OrchestraInstance10, scenario: str):
+        """
+        Merges the elements of one repository into the merged repository
+        :param orch: an Orchestra repository
+        :param scenario: scenario of elements that conflict with merged elements
+        """
+        # local name or id -> merged name, or (id, scenario)
+        type_names = {}
+        field_ids = {}
+        structure_ids = {}
+        for datatype in filter(lambda l: isinstance(l, list), orch.datatypes()[1:]):
+            type_names[datatype[1]['name']] = self._merge_named(datatype, 'datatype', self.merged.datatypes(),
+                                                                scenario)
+        for codeset in filter(lambda l: isinstance(l, list), orch.codesets()[1:]):
+            type_names[codeset[1]['name']] = self._merge_codeset(codeset, scenario)
+        for field in filter(lambda l: isinstance(l, list), orch.fields()[1:]):
+            merged_field = copy.deepcopy(field)
+            field_type = merged_field[1].get('type', None)
+            if field_type in type_names:
+                merged_field[1]['type'] = type_names[field_type]
+            field_ids[field[1]['id']] = self._merge_element(merged_field, field, 'field', FIELD_SPACE,
+                                                            self.merged.fields(), scenario)
+        structures = {}
+        for element in filter(lambda l: isinstance(l, list), orch.components()[1:] + orch.groups()[1:]):
+            structures[element[1]['id']] = element
+        for local_id in structures:
+            self._merge_structure(local_id, structures, field_ids, structure_ids, scenario)
+        for message in filter(lambda l: isinstance(l, list), orch.messages()[1:]):
+            merged_message = self._rewrite_refs(message, field_ids, structure_ids, structures, scenario)
+            self._merge_element(merged_message, message, 'message', MESSAGE_SPACE, self.merged.messages(), scenario)
+
+    def _merge_structure(self, local_id, structures: dict, field_ids: dict, structure_ids: dict,
+                         scenario: str) -> Optional[Tuple[int, str]]:
+        """ Merges a component or group after the components and groups that it references """
+        if local_id in structure_ids:
+            return structure_ids[local_id]
+        element = structures.get(local_id, None)
+        if element is None:
+            self.logger.error('Component or group %s not found', local_id)
+            return None
+        # guards against a component that refers to itself
+        structure_ids[local_id] = (local_id, 'base')
+        merged_element = self._rewrite_refs(element, field_ids, structure_ids, structures, scenario)
+        if element[0] == 'fixr:component':
+            (category, elements) = ('component', self.merged.components())
+        else:
+            (category, elements) = ('group', self.merged.groups())
+        structure_ids[local_id] = self._merge_element(merged_element, element, category, STRUCTURE_SPACE, elements,
+                                                      scenario)
+        return structure_ids[local_id]
+
+    def _rewrite_refs(self, element: list, field_ids: dict, structure_ids: dict, structures: dict,
+                      scenario: str) -> list:
+        """ Returns a copy of an element with its refs resolved to merged elements """
+        merged_element = [element[0]]
+        for child in element[1:]:
+            if isinstance(child, dict):
+                merged_element.append(dict(child))
+            elif isinstance(child, list) and child[0] in ['fixr:fieldRef', 'fixr:numInGroup']:
+                merged_field = field_ids.get(child[1]['id'], None)
+                if merged_field is None:
+                    self.logger.error('Field %s not found', child[1]['id'])
+                merged_element.append(OrchestraMerger10._ref(child, merged_field))
+            elif isinstance(child, list) and child[0] in ['fixr:componentRef', 'fixr:groupRef']:
+                merged_element.append(OrchestraMerger10._ref(child, self._merge_structure(
+                    child[1]['id'], structures, field_ids, structure_ids, scenario)))
+            elif isinstance(child, list) and child[0] == 'fixr:structure':
+                merged_element.append(self._rewrite_refs(child, field_ids, structure_ids, structures, scenario))
+            else:
+                merged_element.append(copy.deepcopy(child))
+        return merged_element
+
+    @staticmethod
+    def _ref(ref: list, merged: Optional[Tuple[int, str]]) -> list:
+        merged_ref = copy.deepcopy(ref)
+        if merged is not None:
+            merged_ref[1]['id'] = merged[0]
+            if merged[1] != 'base':
+                merged_ref[1]['scenario'] = merged[1]
+        return merged_ref
+
+    def _merge_named(self, element: list, category: str, elements: list, scenario: str) -> str:
+        """ Merges a datatype; returns its merged name """
+        key = (category, OrchestraMerger10.structural_key(element))
+        merged_name = self._keys.get(key, None)
+        if merged_name is None:
+            merged_name = self._unique_name(category, element[1]['name'], scenario)
+            merged_element = copy.deepcopy(element)
+            merged_element[1]['name'] = merged_name
+            elements.append(merged_element)
+            self._keys[key] = merged_name
+        return merged_name
+
+    def _merge_codeset(self, codeset: list, scenario: str) -> str:
+        """ Merges a codeset; returns its merged name """
+        key = ('codeSet', OrchestraMerger10.structural_key(codeset))
+        merged_name = self._keys.get(key, None)
+        if merged_name is None:
+            merged_name = self._unique_name('codeSet', codeset[1]['name'], scenario)
+            merged_codeset = copy.deepcopy(codeset)
+            merged_codeset[1]['name'] = merged_name
+            for element in [merged_codeset] + [code for code in merged_codeset if isinstance(code, list) and
+                                               code[0] == 'fixr:code']:
+                if 'id' in element[1]:
+                    element[1]['id'] = self._allocate_id(CODESET_SPACE, int(element[1]['id']), 'base')
+            self.merged.codesets().append(merged_codeset)
+            self._keys[key] = merged_name
+        return merged_name
+
+    def _merge_element(self, merged_element: list, element: list, category: str, space: str, elements: list,
+                       scenario: str) -> Tuple[int, str]:
+        """
+        Merges an element identified by id, unless a structurally identical element was already merged
+        :param merged_element: a copy of the element with references resolved to merged elements
+        :param element: the element in its own repository
+        :return: merged id and scenario of the element
+        """
+        key = (category, OrchestraMerger10.structural_key(merged_element))
+        merged = self._keys.get(key, None)
+        if merged is None:
+            name = merged_element[1].get('name', None)
+            element_scenario = scenario if (category, name) in self._names else 'base'
+            self._names.add((category, name))
+            if element_scenario == 'base':
+                merged_id = self._allocate_id(space, int(element[1]['id']), element_scenario)
+                self._base_ids[(category, name)] = merged_id
+            else:
+                merged_id = self._allocate_id(space, self._base_ids[(category, name)], element_scenario)
+            merged_element[1]['id'] = merged_id
+            if element_scenario != 'base':
+                merged_element[1]['scenario'] = element_scenario
+            elements.append(merged_element)
+            merged = (merged_id, element_scenario)
+            self._keys[key] = merged
+        return merged
+
+    def _allocate_id(self, space: str, local_id: int, scenario: str) -> int:
+        """
+        Keeps an id unless it is taken in the merged repository; a variant with a scenario only needs its id to be
+        distinct among elements of that scenario
+        """
+        scenarios = self._ids[space].get(local_id, None)
+        if scenarios is None or (scenario != 'base' and scenario not in scenarios):
+            merged_id = local_id
+        else:
+            self._max_ids[space] += 1
+            merged_id = self._max_ids[space]
+        self._ids[space].setdefault(merged_id, set()).add(scenario)
+        return merged_id
+
+    def _unique_name(self, category: str, name: str, scenario: str) -> str:
+        unique = name
+        if (category, unique) in self._names:
+            unique = '%s_%s' % (name, re.sub(r'\W', '_', scenario))
+            suffix = 1
+            while (category, unique) in self._names:
+                suffix += 1
+                unique = '%s_%s%d' % (name, re.sub(r'\W', '_', scenario), suffix)
+        self._names.add((category, unique))
+        return unique
+
+    @staticmethod
+    def structural_key(element) -> tuple:
+        """
+        Returns a hashable key of the structure of an element, ignoring its id, scenario and annotations
+        """
+        return OrchestraMerger10._structural_key(element, True)
+
+    @staticmethod
+    def _structural_key(element, top: bool):
+        if not isinstance(element, list):
+            return element.strip() if isinstance(element, str) else element
+        key = [element[0]]
+        for child in element[1:]:
+            if isinstance(child, dict):
+                ignored = ['id', 'scenario'] if top else []
+                key.append(tuple(sorted((k, str(v)) for (k, v) in child.items() if k not in ignored)))
+            elif not (isinstance(child, list) and child[0] == 'fixr:annotation'):
+                key.append(OrchestraMerger10._structural_key(child, False))
+        return tuple(key)
+
+
+OrchestraMerger = OrchestraMerger10
+"""Merges Orchestra version 1.0 repositories"""
@@ -1,2 +1,6 @@
 from .sbe import SBE
+from .sbebatch import SBEBatchDecoder
+from .sbecodec import SBECodec
+from .sbedtype import SBEDtype
 from .sbeinstance import SBEInstance
+from .sbelayout import SBELayout
@@ -2,11 +2,17 @@ import os
 import xml.etree.ElementTree as ET
 from typing import List, Tuple
 
-import xmlschema
 from xmlschema import JsonMLConverter
 
+from .sbeinclude import read_resource
 from .sbeinstance import SBEInstance10, SBEInstance20
 
+try:
+    from ..schemacache import cached_schema
+except ImportError:
+    # imported as a top-level package, as by the translators
+    from schemacache import cached_schema
+
 
 class SBE10:
     """
@@ -18,7 +24,7 @@ class SBE10:
                            'uint8', 'uint16', 'uint32', 'uint64', 'float', 'double']
 
     def __init__(self):
-        self.xsd = xmlschema.XMLSchema(SBE10.get_xsd_path())
+        self.xsd = cached_schema(SBE10.get_xsd_path())
 
     @classmethod
     def get_xsd_path(cls):
@@ -47,10 +53,13 @@ class SBE10:
         path to a file or an URI of a resource or an opened file-like object or an Element \
         instance or an ElementTree instance or a string containing the XML data.
         :return: a list of errors, if any
+
+        XIncludes are resolved before decoding. Included files are parsed once per process and reused until modified.
         """
         data, errors = [], []
+        resource = read_resource(xml, errors)
         # JsonMLConverter preserves order
-        for result in self.xsd.iter_decode(xml, validation='lax', use_defaults=False, converter=JsonMLConverter):
+        for result in self.xsd.iter_decode(resource, validation='lax', use_defaults=False, converter=JsonMLConverter):
             if not isinstance(result, Exception):
                 data.append(result)
             else:
@@ -85,7 +94,7 @@ class SBE20:
     """
 
     def __init__(self):
-        self.xsd = xmlschema.XMLSchema(SBE20.get_xsd_path())
+        self.xsd = cached_schema(SBE20.get_xsd_path())
 
     @classmethod
     def get_xsd_path(cls):
@@ -114,10 +123,13 @@ class SBE20:
         path to a file or an URI of a resource or an opened file-like object or an Element \
         instance or an ElementTree instance or a string containing the XML data.
         :return: a list of errors, if any
+
+        XIncludes are resolved before decoding. Included files are parsed once per process and reused until modified.
         """
         data, errors = [], []
+        resource = read_resource(xml, errors)
         # JsonMLConverter preserves order
-        for result in self.xsd.iter_decode(xml, validation='lax', use_defaults=False, converter=JsonMLConverter):
+        for result in self.xsd.iter_decode(resource, validation='lax', use_defaults=False, converter=JsonMLConverter):
             if not isinstance(result, Exception):
                 data.append(result)
             else:
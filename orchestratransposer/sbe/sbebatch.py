@@ -0,0 +1,352 @@
+import logging
+import mmap
+import os
+import struct
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .sbedtype import SBEDtype10
+from .sbeinstance import SBEInstance10
+
+SOFH = struct.Struct('>IH')
+"""Simple Open Framing Header: message length including the header, then encoding type"""
+
+
+class SBEBatchDecoder10:
+    """
+    Decodes a capture of SBE messages in bulk into columnar NumPy arrays
+
+    A capture is scanned once to split messages by the templateId of their message header. Only the message header,
+    group dimensions and var data lengths are read while scanning; the root blocks of each message template and the
+    entries of each repeating group are then decoded together by gathering them into a NumPy structured array, and
+    each field is returned as a contiguous column. Nested composite fields are flattened to columns named by their path,
+    such as OrderQty.mantissa. Var data is not copied; its offsets and lengths in the capture are returned instead.
+
+    The result of decoding is a dictionary keyed by message name, for example:
+
+    .. code-block:: python
+
+        {'NewOrderSingle': {'templateId': 99, 'count': 2, 'offsets': array([8, 76]),
+                            'columns': {'ClOrdId': array([b'ORD1', b'ORD2']), 'OrderQty.mantissa': array([100, 200]),
+                                        ...},
+                            'groups': {}, 'data': {}},
+         'ExecutionReport': {...,
+                             'groups': {'FillsGrp': {'count': 3, 'offsets': array(...), 'parent': array([0, 0, 1]),
+                                                     'columns': {...}}},
+                             'data': {}}}
+
+    offsets are positions of root blocks or group entries in the capture, and parent is the index of the message, or
+    of the enclosing group entry of a nested group, to which each group entry or var data field belongs. Nested groups
+    and var data of groups are keyed by their path, e.g. Legs.Text.
+
+    Requires NumPy, which is an optional dependency.
+    """
+
+    GATHER_ROWS = 1 << 16
+    """Number of blocks gathered at once, which bounds the size of the temporary index array"""
+
+    def __init__(self, sbe: SBEInstance10, framing: Optional[str] = 'sofh', alignment: Optional[int] = None):
+        """
+        :param sbe: an SBE message schema
+        :param framing: 'sofh' if each message is preceded by a Simple Open Framing Header, or None if messages are
+        consecutive
+        :param alignment: alignment of fields, as for SBELayout10
+        """
+        if np is None:
+            raise ImportError('NumPy is required for batch decoding')
+        if framing not in [None, 'sofh']:
+            raise ValueError('Unsupported framing %s' % framing)
+        self.logger = logging.getLogger('sbebatch')
+        self.sbe = sbe
+        self.framing = framing
+        self.dtypes = SBEDtype10(sbe, alignment)
+        self.layout = self.dtypes.layout
+        header_type = sbe.message_schema().get('headerType', 'messageHeader')
+        (self._header, names) = self._scalar_struct(header_type)
+        self._header_block_length = names.index('blockLength') if 'blockLength' in names else 0
+        self._header_template_id = names.index('templateId') if 'templateId' in names else 1
+        # scan plans keyed by templateId
+        self._plans = {}
+        self._plan_count = 0
+        for message in sbe.messages():
+            message_layout = self.layout.message_layout(message)
+            plan = self._block_plan(message_layout, '')
+            plan['name'] = message[1]['name']
+            plan['dtype'] = self.dtypes.block_dtype(message_layout)
+            self._plans[int(message[1]['id'])] = plan
+
+    def decode_file(self, path: str) -> Dict[str, dict]:
+        """
+        Decodes a capture file, which is memory-mapped rather than read
+        :param path: path of a capture file
+        :return: decoded messages keyed by message name
+        """
+        with open(path, 'rb') as f:
+            # an empty file cannot be mapped
+            if not os.fstat(f.fileno()).st_size:
+                return self.decode(b'')
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                return self.decode(buffer)
+
+    def decode(self, buffer) -> Dict[str, dict]:
+        """
+        Decodes a capture in a buffer
+        :param buffer: a bytes-like object such as bytes or mmap
+        :return: decoded messages keyed by message name
+        """
+        (message_offsets, group_offsets, data_offsets) = self._scan(buffer)
+        raw = np.frombuffer(buffer, dtype=np.uint8)
+        try:
+            result = {}
+            for (template_id, offsets) in message_offsets.items():
+                plan = self._plans[template_id]
+                offsets = np.frombuffer(offsets, dtype=np.int64)
+                decoded = {'templateId': template_id, 'count': len(offsets), 'offsets': offsets,
+                           'columns': self._columns(SBEBatchDecoder10._gather(raw, offsets, plan['dtype'])),
+                           'groups': {}, 'data': {}}
+                self._decode_groups(raw, plan, group_offsets, decoded['groups'])
+                for data_plan in self._all_data(plan):
+                    (parents, offsets, lengths) = data_offsets[data_plan['id']]
+                    decoded['data'][data_plan['path']] = {
+                        'parent': np.frombuffer(parents, dtype=np.int64),
+                        'offsets': np.frombuffer(offsets, dtype=np.int64),
+                        'lengths': np.frombuffer(lengths, dtype=np.int64)}
+                result[plan['name']] = decoded
+            return result
+        finally:
+            # releases the export of a memory-mapped buffer so that it can be closed
+            del raw
+
+    def _decode_groups(self, raw, plan: dict, group_offsets: dict, decoded_groups: dict):
+        for group_plan in plan['groups']:
+            (parents, offsets) = group_offsets[group_plan['id']]
+            offsets = np.frombuffer(offsets, dtype=np.int64)
+            decoded_groups[group_plan['path']] = {
+                'count': len(offsets), 'offsets': offsets, 'parent': np.frombuffer(parents, dtype=np.int64),
+                'columns': self._columns(SBEBatchDecoder10._gather(raw, offsets, group_plan['dtype']))}
+            self._decode_groups(raw, group_plan, group_offsets, decoded_groups)
+
+    def _scan(self, buffer) -> Tuple[Dict[int, array], Dict[int, tuple], Dict[int, tuple]]:
+        """
+        Splits a capture into messages by templateId
+
+        Scanning stops at a message that is truncated by the end of the capture. A message that overruns its frame is
+        skipped.
+        :return: root block offsets keyed by templateId, and parent indexes and offsets of group entries and var data
+        keyed by the id of their plans
+        """
+        message_offsets = {template_id: array('q') for template_id in self._plans}
+        group_offsets = {}
+        data_offsets = {}
+        for plan in self._plans.values():
+            for group_plan in self._all_groups(plan):
+                group_offsets[group_plan['id']] = (array('q'), array('q'))
+            for data_plan in self._all_data(plan):
+                data_offsets[data_plan['id']] = (array('q'), array('q'), array('q'))
+        header = self._header
+        header_size = header.size
+        block_length_index = self._header_block_length
+        template_id_index = self._header_template_id
+        plans = self._plans
+        sofh = self.framing == 'sofh'
+        size = len(buffer)
+        offset = 0
+        while offset < size:
+            if sofh:
+                if offset + SOFH.size > size:
+                    self.logger.error('Frame header at offset %d truncated at %d', offset, size)
+                    break
+                frame_length = SOFH.unpack_from(buffer, offset)[0]
+                if frame_length < SOFH.size:
+                    self.logger.error('Invalid frame length %d at offset %d', frame_length, offset)
+                    break
+                if offset + frame_length > size:
+                    self.logger.error('Frame of length %d at offset %d truncated at %d', frame_length, offset, size)
+                    break
+                start = offset + SOFH.size
+                offset += frame_length
+                end = offset
+            else:
+                start = offset
+                end = size
+            if start + header_size > end:
+                self.logger.error('Message header at offset %d truncated at %d', start, end)
+                if sofh:
+                    continue
+                break
+            message_header = header.unpack_from(buffer, start)
+            plan = plans.get(message_header[template_id_index], None)
+            if plan is None:
+                self.logger.error('Unknown templateId %s at offset %d', message_header[template_id_index], start)
+                if sofh:
+                    continue
+                break
+            offsets = message_offsets[message_header[template_id_index]]
+            block_end = start + header_size + message_header[block_length_index]
+            members_end = block_end
+            if block_end <= end and not plan['fixed']:
+                try:
+                    members_end = self._scan_members(buffer, block_end, plan, len(offsets), group_offsets,
+                                                     data_offsets)
+                except struct.error:
+                    members_end = size + 1
+            if members_end > end:
+                self.logger.error('Message at offset %d truncated at %d', start, end)
+                SBEBatchDecoder10._discard_members(plan, start, group_offsets, data_offsets)
+                if sofh:
+                    continue
+                break
+            offsets.append(start + header_size)
+            if not sofh:
+                offset = members_end
+        return message_offsets, group_offsets, data_offsets
+
+    @staticmethod
+    def _discard_members(plan: dict, start: int, group_offsets: dict, data_offsets: dict):
+        """ Removes the group entries and var data recorded for a message at start, which are the last ones """
+        for group_plan in SBEBatchDecoder10._all_groups(plan):
+            (parents, offsets) = group_offsets[group_plan['id']]
+            while offsets and offsets[-1] >= start:
+                parents.pop()
+                offsets.pop()
+        for data_plan in SBEBatchDecoder10._all_data(plan):
+            (parents, offsets, lengths) = data_offsets[data_plan['id']]
+            while offsets and offsets[-1] >= start:
+                parents.pop()
+                offsets.pop()
+                lengths.pop()
+
+    def _scan_members(self, buffer, offset: int, plan: dict, parent: int, group_offsets: dict,
+                      data_offsets: dict) -> int:
+        """ Records the groups and var data following a block; returns their end """
+        for group_plan in plan['groups']:
+            dimension = group_plan['dimension'].unpack_from(buffer, offset)
+            offset += group_plan['dimension'].size
+            block_length = dimension[group_plan['blockLengthIndex']]
+            (parents, offsets) = group_offsets[group_plan['id']]
+            for _ in range(dimension[group_plan['numInGroupIndex']]):
+                parents.append(parent)
+                offsets.append(offset)
+                offset += block_length
+                if not group_plan['fixed']:
+                    offset = self._scan_members(buffer, offset, group_plan, len(offsets) - 1, group_offsets,
+                                                data_offsets)
+        for data_plan in plan['data']:
+            length = data_plan['length'].unpack_from(buffer, offset)[0]
+            offset += data_plan['length'].size
+            (parents, offsets, lengths) = data_offsets[data_plan['id']]
+            parents.append(parent)
+            offsets.append(offset)
+            lengths.append(length)
+            offset += length
+        return offset
+
+    def _block_plan(self, block_layout: dict, prefix: str) -> dict:
+        """
+        Prepares the scan of the groups and var data of a message or group
+        :param prefix: path of the block followed by '.', or empty for a message
+        """
+        plan = {'id': self._next_plan_id(), 'groups': [], 'data': []}
+        for group_layout in block_layout['groups']:
+            path = prefix + group_layout['name']
+            group_plan = self._block_plan(group_layout, path + '.')
+            group_plan['path'] = path
+            (group_plan['dimension'], names) = self._scalar_struct(group_layout['dimensionType'])
+            group_plan['blockLengthIndex'] = names.index('blockLength') if 'blockLength' in names else 0
+            group_plan['numInGroupIndex'] = names.index('numInGroup') if 'numInGroup' in names else 1
+            group_plan['dtype'] = self.dtypes.block_dtype(group_layout)
+            plan['groups'].append(group_plan)
+        for data_layout in block_layout['data']:
+            length_code = SBEDtype10.PRIMITIVE_CODES.get(data_layout.get('lengthPrimitiveType', None), 'u2')
+            plan['data'].append({'id': self._next_plan_id(), 'path': prefix + data_layout['name'],
+                                 'length': struct.Struct(self.dtypes.byte_order + np.dtype(length_code).char)})
+        plan['fixed'] = not plan['groups'] and not plan['data']
+        return plan
+
+    def _next_plan_id(self) -> int:
+        self._plan_count += 1
+        return self._plan_count
+
+    def _scalar_struct(self, type_name: str) -> Tuple[struct.Struct, List[str]]:
+        """ Returns a struct and member names of a composite of scalars, such as a message header or dimension """
+        fmt = self.dtypes.byte_order
+        names = []
+        position = 0
+        for member in self.layout.type_layout(type_name).get('members', []):
+            if not member['size']:
+                continue
+            code = SBEDtype10.PRIMITIVE_CODES.get(member.get('primitiveType', None), None)
+            if member['offset'] > position:
+                fmt += '%dx' % (member['offset'] - position)
+            if code and code != 'S' and member.get('length', 1) == 1:
+                fmt += np.dtype(code).char
+                names.append(member['name'])
+            else:
+                fmt += '%dx' % member['size']
+            position = member['offset'] + member['size']
+        return struct.Struct(fmt), names
+
+    @staticmethod
+    def _all_groups(plan: dict) -> List[dict]:
+        groups = []
+        for group_plan in plan['groups']:
+            groups.append(group_plan)
+            groups += SBEBatchDecoder10._all_groups(group_plan)
+        return groups
+
+    @staticmethod
+    def _all_data(plan: dict) -> List[dict]:
+        data = list(plan['data'])
+        for group_plan in SBEBatchDecoder10._all_groups(plan):
+            data += group_plan['data']
+        return data
+
+    @staticmethod
+    def _gather(raw, offsets, dtype) -> 'np.ndarray':
+        """
+        Copies the blocks at offsets of a raw buffer into a structured array
+        :raises ValueError: if a block ends beyond the buffer, such as the last one of a message that is shorter than
+        the blockLength of its schema
+        """
+        count = len(offsets)
+        rows = np.empty(count, dtype=dtype)
+        if not count or not dtype.itemsize:
+            return rows
+        last = int(offsets.max())
+        if last + dtype.itemsize > len(raw):
+            raise ValueError('Block of %d bytes at offset %d ends beyond the capture of %d bytes' %
+                             (dtype.itemsize, last, len(raw)))
+        row_bytes = rows.view(np.uint8).reshape(count, dtype.itemsize)
+        strides = np.diff(offsets)
+        if count > 1 and strides[0] >= dtype.itemsize and (strides == strides[0]).all():
+            # evenly spaced blocks, such as messages of a single template, are copied through a strided view
+            row_bytes[:] = np.lib.stride_tricks.as_strided(raw[offsets[0]:], shape=(count, dtype.itemsize),
+                                                           strides=(int(strides[0]), 1), writeable=False)
+            return rows
+        columns = np.arange(dtype.itemsize)
+        for start in range(0, count, SBEBatchDecoder10.GATHER_ROWS):
+            chunk = offsets[start:start + SBEBatchDecoder10.GATHER_ROWS]
+            row_bytes[start:start + len(chunk)] = raw[chunk[:, None] + columns]
+        return rows
+
+    def _columns(self, rows) -> Dict[str, 'np.ndarray']:
+        columns = {}
+        self._flatten(rows, '', columns)
+        return columns
+
+    def _flatten(self, rows, prefix: str, columns: Dict[str, 'np.ndarray']):
+        for name in rows.dtype.names or []:
+            column = rows[name]
+            if column.dtype.names:
+                self._flatten(column, prefix + name + '.', columns)
+            else:
+                columns[prefix + name] = np.ascontiguousarray(column)
+
+
+SBEBatchDecoder = SBEBatchDecoder10
+"""Default batch decoder; also applies to SBE version 2.0 message schemas"""
@@ -0,0 +1,596 @@
+import importlib.util
+import keyword
+import logging
+import re
+import sys
+from types import ModuleType
+from typing import List, Optional, Tuple
+
+from .sbeinstance import SBEInstance10
+from .sbelayout import SBELayout10
+
+MODULE_PREAMBLE = '''
+Message classes are flyweights over a buffer such as bytes, bytearray, mmap or memoryview. Field accessors decode in
+place, var data is returned as a memoryview slice of the buffer, and the entries of a repeating group are yielded by a
+single flyweight that is repositioned on each iteration, so an entry is only valid until the next one is read.
+
+Usage:
+
+    (name, values, end) = decode(buffer)
+    buffer = encode(name, values)
+    message = wrap(buffer)
+'''
+
+MODULE_HELPERS = '''
+
+class _Group(object):
+    """ A repeating group over a buffer that yields a reused entry flyweight """
+    __slots__ = ('_buffer', '_offset', '_entry_class', 'block_length', 'count')
+
+    def __init__(self, buffer, offset, entry_class):
+        dimension = entry_class.DIMENSION.unpack_from(buffer, offset)
+        self._buffer = buffer
+        self._offset = offset + entry_class.DIMENSION.size
+        self._entry_class = entry_class
+        self.block_length = dimension[entry_class.BLOCK_LENGTH_INDEX]
+        self.count = dimension[entry_class.NUM_IN_GROUP_INDEX]
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        entry = self._entry_class(self._buffer, self._offset, self.block_length)
+        for i in range(self.count):
+            if i:
+                entry._offset = entry._end()
+            yield entry
+
+
+def _skip_group(buffer, offset, entry_class):
+    dimension = entry_class.DIMENSION.unpack_from(buffer, offset)
+    offset += entry_class.DIMENSION.size
+    block_length = dimension[entry_class.BLOCK_LENGTH_INDEX]
+    count = dimension[entry_class.NUM_IN_GROUP_INDEX]
+    if entry_class.FIXED:
+        return offset + block_length * count
+    entry = entry_class(buffer, offset, block_length)
+    for _ in range(count):
+        entry._offset = entry._end()
+    return entry._offset
+
+
+def _decode_group(buffer, offset, entry_class):
+    dimension = entry_class.DIMENSION.unpack_from(buffer, offset)
+    entry = entry_class(buffer, offset + entry_class.DIMENSION.size, dimension[entry_class.BLOCK_LENGTH_INDEX])
+    entries = []
+    for _ in range(dimension[entry_class.NUM_IN_GROUP_INDEX]):
+        (values, entry._offset) = entry._decode()
+        entries.append(values)
+    return entries, entry._offset
+
+
+def _encode_group(entry_class, entries, parts):
+    dimension = list(entry_class.DIMENSION_VALUES)
+    dimension[entry_class.NUM_IN_GROUP_INDEX] = len(entries)
+    parts.append(entry_class.DIMENSION.pack(*dimension))
+    for values in entries:
+        entry_class._encode(values, parts)
+
+
+def _data(buffer, offset, length_struct):
+    start = offset + length_struct.size
+    return memoryview(buffer)[start:start + length_struct.unpack_from(buffer, offset)[0]]
+
+
+def _skip_data(buffer, offset, length_struct):
+    return offset + length_struct.size + length_struct.unpack_from(buffer, offset)[0]
+
+
+def _decode_data(buffer, offset, length_struct):
+    start = offset + length_struct.size
+    end = start + length_struct.unpack_from(buffer, offset)[0]
+    return bytes(buffer[start:end]), end
+
+
+def _encode_data(length_struct, value, parts):
+    parts.append(length_struct.pack(len(value)))
+    parts.append(bytes(value))
+
+
+def wrap(buffer, offset=0):
+    """ Returns a flyweight over the message that starts with a message header at an offset of a buffer """
+    header = HEADER.unpack_from(buffer, offset)
+    message_class = MESSAGES[header[HEADER_TEMPLATE_ID_INDEX]]
+    return message_class(buffer, offset + HEADER.size, header[HEADER_BLOCK_LENGTH_INDEX])
+
+
+def decode(buffer, offset=0):
+    """ Decodes the message at an offset of a buffer; returns its name, a dictionary of its values and its end """
+    message = wrap(buffer, offset)
+    (values, end) = message._decode()
+    return message.NAME, values, end
+
+
+def encode(name, values):
+    """ Encodes a message with its header from a dictionary of values as returned by decode() """
+    message_class = MESSAGES_BY_NAME[name]
+    parts = [HEADER.pack(*message_class.HEADER_VALUES)]
+    message_class._encode(values, parts)
+    return b''.join(parts)
+'''
+
+RESERVED_MEMBER_NAMES = {'to_dict', 'encode', 'NAME', 'TEMPLATE_ID', 'BLOCK', 'BLOCK_LENGTH', 'HEADER_VALUES', 'FIXED',
+                         'DIMENSION', 'DIMENSION_VALUES', 'BLOCK_LENGTH_INDEX', 'NUM_IN_GROUP_INDEX', 'SIZE'}
+"""Names of generated class members that fields must not shadow"""
+
+RESERVED_MODULE_NAMES = {'struct', 'wrap', 'decode', 'encode', 'HEADER', 'HEADER_BLOCK_LENGTH_INDEX',
+                         'HEADER_TEMPLATE_ID_INDEX', 'MESSAGES', 'MESSAGES_BY_NAME', 'SCHEMA_ID', 'SCHEMA_VERSION',
+                         'object', 'bytes', 'list', 'len', 'range', 'memoryview'}
+"""Module level names that generated classes must not shadow"""
+
+
+class SBECodec10:
+    """
+    Generates a Python module of codecs for the messages of an SBE message schema
+
+    The module depends only on the standard library. The root block of each message and each group entry is encoded and
+    decoded with a single precompiled struct.Struct, with composite fields flattened into it. Each message, group entry
+    and composite is also given a flyweight accessor class with __slots__ that reads and writes fields in place, e.g.
+
+    .. code-block:: python
+
+        codecs = SBECodec(instance).load()
+        message = codecs.wrap(buffer)
+        for fill in message.FillsGrp:
+            print(fill.FillQty.mantissa)
+
+    Offsets and block lengths are taken from SBELayout10. Enums and sets are decoded to their encoding values, and the
+    module contains a class of constants for each of them. Char arrays are decoded to bytes without trailing nulls.
+    Fields and composite members with constant presence are decoded to their constant values and are not encoded.
+    """
+
+    CHAR_CODE = 's'
+    PRIMITIVE_CODES = {'int8': 'b', 'int16': 'h', 'int32': 'i', 'int64': 'q', 'uint8': 'B', 'uint16': 'H',
+                       'uint32': 'I', 'uint64': 'Q', 'float': 'f', 'double': 'd'}
+    """struct format characters of SBE primitive types other than char"""
+
+    def __init__(self, sbe: SBEInstance10, alignment: Optional[int] = None):
+        """
+        :param sbe: an SBE message schema
+        :param alignment: alignment of fields, as for SBELayout10
+        """
+        self.logger = logging.getLogger('sbecodec')
+        self.sbe = sbe
+        self.layout = SBELayout10(sbe, alignment)
+        byte_order = sbe.message_schema().get('byteOrder', 'littleEndian')
+        self.byte_order = '>' if byte_order == 'bigEndian' else '<'
+
+    def generate(self) -> str:
+        """
+        :return: Python source of a codec module for the message schema
+        """
+        self._class_names = set(RESERVED_MODULE_NAMES)
+        # shared structs of single fields keyed by format without byte order
+        self._structs = set()
+        # generated composite classes keyed by type name
+        self._composite_classes = {}
+        self._composite_lines = []
+        schema = self.sbe.message_schema()
+        header_lines = self._header_lines()
+        message_lines = []
+        message_classes = []
+        for message in self.sbe.messages():
+            class_name = self._class_name(message[1]['name'])
+            message_classes.append((message[1].get('id', None), message[1]['name'], class_name))
+            message_lines += self._message_class(message, class_name)
+        constant_lines = []
+        for encoding_type in self.sbe.enums() + self.sbe.sets():
+            constant_lines += self._constants_class(encoding_type)
+        lines = ['"""', 'Codecs for SBE message schema %s id %s version %s' % (
+            schema.get('package', ''), schema.get('id', ''), schema.get('version', 0)), '',
+                 'Generated by orchestratransposer; do not edit.']
+        lines += MODULE_PREAMBLE.splitlines()
+        lines += ['"""', 'import struct', '', 'SCHEMA_ID = %r' % SBECodec10._int(schema.get('id', 0)),
+                  'SCHEMA_VERSION = %r' % SBECodec10._int(schema.get('version', 0))]
+        lines += header_lines
+        lines += ['_STRUCT_%s = struct.Struct(%r)' % (fmt, self.byte_order + fmt) for fmt in sorted(self._structs)]
+        lines += MODULE_HELPERS.splitlines()
+        lines += constant_lines + self._composite_lines + message_lines
+        lines += ['', '', 'MESSAGES = {']
+        lines += ['    %r: %s,' % (SBECodec10._int(template_id), class_name)
+                  for (template_id, name, class_name) in message_classes]
+        lines += ['}', '', 'MESSAGES_BY_NAME = {']
+        lines += ['    %r: %s,' % (name, class_name) for (template_id, name, class_name) in message_classes]
+        lines += ['}', '']
+        return '\n'.join(lines)
+
+    def write(self, path: str):
+        """
+        Writes a codec module for the message schema
+        :param path: path of a Python source file
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.generate())
+
+    def load(self, module_name: Optional[str] = None) -> ModuleType:
+        """
+        Generates and imports a codec module without writing it to a file
+        :param module_name: name of the module; defaults to the package of the schema with suffix _sbe
+        :return: the codec module
+        """
+        if not module_name:
+            module_name = re.sub(r'\W', '_', str(self.sbe.message_schema().get('package', 'schema'))) + '_sbe'
+        spec = importlib.util.spec_from_loader(module_name, loader=None)
+        module = importlib.util.module_from_spec(spec)
+        # classes of the module resolve their globals through sys.modules when pickled
+        sys.modules[module_name] = module
+        exec(compile(self.generate(), '<%s>' % module_name, 'exec'), module.__dict__)
+        return module
+
+    def _header_lines(self) -> List[str]:
+        header_type = self.sbe.message_schema().get('headerType', 'messageHeader')
+        (fmt, slots, names) = self._composite_struct(header_type)
+        if 'blockLength' not in names or 'templateId' not in names:
+            self.logger.error('Message header %s lacks blockLength or templateId', header_type)
+        self._header_names = names
+        return ['', 'HEADER = struct.Struct(%r)' % (self.byte_order + fmt),
+                'HEADER_BLOCK_LENGTH_INDEX = %d' % SBECodec10._index(names, 'blockLength'),
+                'HEADER_TEMPLATE_ID_INDEX = %d' % SBECodec10._index(names, 'templateId'), '']
+
+    def _composite_struct(self, type_name: str) -> Tuple[str, List[dict], List[str]]:
+        """ Returns struct format, slots and member names of a composite of scalars such as a header or dimension """
+        type_layout = self.layout.type_layout(type_name)
+        element = self._encoding_element(type_name)
+        slots = []
+        node = self._value_node(type_layout, element, 0, slots)
+        fmt = self._block_format(slots, type_layout['size'], type_name)
+        names = [None] * sum(slot['count'] for slot in slots)
+        for (name, member) in node.get('members', []):
+            if member['kind'] == 'slot':
+                names[member['slot']['index']] = name
+        return fmt, slots, names
+
+    def _header_values(self, structure: list, block_layout: dict, names: List[str], template_id=None) -> List:
+        values = {'blockLength': block_layout['blockLength'], 'templateId': SBECodec10._int(template_id),
+                  'schemaId': SBECodec10._int(self.sbe.message_schema().get('id', 0)),
+                  'version': SBECodec10._int(self.sbe.message_schema().get('version', 0)),
+                  'numGroups': len(SBEInstance10.groups(structure)),
+                  'numVarDataFields': len(SBEInstance10.data(structure))}
+        return [values.get(name, 0) or 0 for name in names]
+
+    def _message_class(self, message: list, class_name: str) -> List[str]:
+        message_layout = self.layout.message_layout(message)
+        lines = self._block_class(message, message_layout, class_name, 'message', [
+            '    TEMPLATE_ID = %r' % SBECodec10._int(message[1].get('id', None)),
+            '    HEADER_VALUES = %r' % (self._header_values(message, message_layout, self._header_names,
+                                                            message[1].get('id', None)),)])
+        return lines
+
+    def _group_class(self, group: list, group_layout: dict, class_name: str) -> List[str]:
+        (fmt, slots, names) = self._composite_struct(group_layout['dimensionType'])
+        if 'numInGroup' not in names:
+            self.logger.error('Group %s dimension %s lacks numInGroup', group[1]['name'], group_layout['dimensionType'])
+        return self._block_class(group, group_layout, class_name, 'group entry', [
+            '    DIMENSION = struct.Struct(%r)' % (self.byte_order + fmt),
+            '    DIMENSION_VALUES = %r' % (self._header_values(group, group_layout, names),),
+            '    BLOCK_LENGTH_INDEX = %d' % SBECodec10._index(names, 'blockLength'),
+            '    NUM_IN_GROUP_INDEX = %d' % SBECodec10._index(names, 'numInGroup')])
+
+    def _block_class(self, structure: list, block_layout: dict, class_name: str, description: str,
+                     class_lines: List[str]) -> List[str]:
+        """
+        Generates a flyweight class of a message or group entry, preceded by the classes of its groups
+        :param description: 'message' or 'group entry'
+        :param class_lines: class attributes specific to messages or groups
+        """
+        group_lines = []
+        group_classes = []
+        for (group, group_layout) in zip(SBEInstance10.groups(structure), block_layout['groups']):
+            group_class = self._class_name(class_name + '_' + group[1]['name'])
+            group_classes.append((group[1]['name'], group_class))
+            group_lines += self._group_class(group, group_layout, group_class)
+        data_fields = [(data_layout['name'], self._data_struct(data_layout)) for data_layout in block_layout['data']]
+        slots = []
+        nodes = []
+        for (field, field_layout) in zip(SBEInstance10.fields(structure), block_layout['fields']):
+            nodes.append((field[1]['name'], field_layout['offset'],
+                          self._value_node(field_layout, field, field_layout['offset'], slots, field[1]['name'])))
+        fmt = self._block_format(slots, block_layout['blockLength'], structure[1]['name'])
+        member_names = set(RESERVED_MEMBER_NAMES)
+        lines = group_lines + ['', '', 'class %s(object):' % class_name,
+                               '    """ %s %s """' % (description.capitalize(), structure[1]['name']),
+                               "    __slots__ = ('_buffer', '_offset', '_block_length')",
+                               '    NAME = %r' % structure[1]['name']]
+        lines += class_lines
+        lines += ['    BLOCK_LENGTH = %d' % block_layout['blockLength'],
+                  '    BLOCK = struct.Struct(%r)' % (self.byte_order + fmt),
+                  '    FIXED = %r' % (not group_classes and not data_fields),
+                  '',
+                  '    def __init__(self, buffer, offset=0, block_length=BLOCK_LENGTH):',
+                  '        self._buffer = buffer',
+                  '        self._offset = offset',
+                  '        self._block_length = block_length']
+        for (name, offset, node) in nodes:
+            lines += self._accessor_lines(SBECodec10._member_name(name, member_names), offset, node, name)
+        for (i, (name, group_class)) in enumerate(group_classes):
+            lines += ['', '    @property', '    def %s(self):' % SBECodec10._member_name(name, member_names),
+                      '        offset = self._offset + self._block_length']
+            lines += ['        offset = _skip_group(self._buffer, offset, %s)' % c for (n, c) in group_classes[:i]]
+            lines += ['        return _Group(self._buffer, offset, %s)' % group_class]
+        for (i, (name, length_struct)) in enumerate(data_fields):
+            lines += ['', '    @property', '    def %s(self):' % SBECodec10._member_name(name, member_names),
+                      '        offset = self._offset + self._block_length']
+            lines += ['        offset = _skip_group(self._buffer, offset, %s)' % c for (n, c) in group_classes]
+            lines += ['        offset = _skip_data(self._buffer, offset, %s)' % s for (n, s) in data_fields[:i]]
+            lines += ['        return _data(self._buffer, offset, %s)' % length_struct]
+        lines += ['', '    def _end(self):', '        offset = self._offset + self._block_length']
+        lines += ['        offset = _skip_group(self._buffer, offset, %s)' % c for (n, c) in group_classes]
+        lines += ['        offset = _skip_data(self._buffer, offset, %s)' % s for (n, s) in data_fields]
+        lines += ['        return offset']
+        lines += ['', '    def to_dict(self):', '        """ Decodes the %s to a dictionary """' % description,
+                  '        return self._decode()[0]']
+        lines += ['', '    def _decode(self):', '        v = self.BLOCK.unpack_from(self._buffer, self._offset)',
+                  '        values = {%s}' % ', '.join('%r: %s' % (name, SBECodec10._value_expr(node))
+                                                     for (name, offset, node) in nodes)]
+        if group_classes or data_fields:
+            lines += ['        offset = self._offset + self._block_length']
+            lines += ["        (values[%r], offset) = _decode_group(self._buffer, offset, %s)" % (n, c)
+                      for (n, c) in group_classes]
+            lines += ["        (values[%r], offset) = _decode_data(self._buffer, offset, %s)" % (n, s)
+                      for (n, s) in data_fields]
+            lines += ['        return values, offset']
+        else:
+            lines += ['        return values, self._offset + self._block_length']
+        pack_args = []
+        for (name, offset, node) in nodes:
+            pack_args += SBECodec10._pack_args(node, 'values[%r]' % name)
+        lines += ['', '    @classmethod', '    def encode(cls, values):',
+                  '        """ Encodes the %s from a dictionary of values """' % description,
+                  '        parts = []', '        cls._encode(values, parts)', "        return b''.join(parts)",
+                  '', '    @classmethod', '    def _encode(cls, values, parts):',
+                  '        parts.append(cls.BLOCK.pack(%s))' % ', '.join(pack_args)]
+        lines += ['        _encode_group(%s, values[%r], parts)' % (c, n) for (n, c) in group_classes]
+        lines += ['        _encode_data(%s, values[%r], parts)' % (s, n) for (n, s) in data_fields]
+        return lines
+
+    def _composite_class(self, type_name: str, type_layout: dict, element: list) -> str:
+        """ Generates a flyweight class of a composite once; returns its class name """
+        class_name = self._composite_classes.get(type_name, None)
+        if class_name:
+            return class_name
+        class_name = self._class_name(type_name)
+        self._composite_classes[type_name] = class_name
+        slots = []
+        node = {'kind': 'composite', 'members': self._member_nodes(type_layout, element, 0, slots, type_name)}
+        fmt = self._block_format(slots, type_layout['size'], type_name)
+        member_names = set(RESERVED_MEMBER_NAMES)
+        lines = ['', '', 'class %s(object):' % class_name, '    """ Composite %s """' % type_name,
+                 "    __slots__ = ('_buffer', '_offset')", '    SIZE = %d' % type_layout['size'],
+                 '    BLOCK = struct.Struct(%r)' % (self.byte_order + fmt), '',
+                 '    def __init__(self, buffer, offset=0):', '        self._buffer = buffer',
+                 '        self._offset = offset']
+        for ((name, member), member_layout) in zip(node['members'], type_layout['members']):
+            lines += self._accessor_lines(SBECodec10._member_name(name, member_names), member_layout['offset'],
+                                          member, type_name + '_' + name)
+        lines += ['', '    def to_dict(self):', '        """ Decodes the composite to a dictionary """',
+                  '        v = self.BLOCK.unpack_from(self._buffer, self._offset)',
+                  '        return %s' % SBECodec10._value_expr(node)]
+        self._composite_lines += lines
+        return class_name
+
+    def _accessor_lines(self, member_name: str, offset: int, node: dict, name: str) -> List[str]:
+        lines = ['', '    @property', '    def %s(self):' % member_name]
+        if node['kind'] == 'constant':
+            return lines + ['        return %r' % (node['value'],)]
+        elif node['kind'] == 'composite':
+            position = ' + %d' % offset if offset else ''
+            return lines + ['        return %s(self._buffer, self._offset%s)' % (node['class'], position)]
+        slot = node['slot']
+        struct_name = '_STRUCT_' + slot['format']
+        self._structs.add(slot['format'])
+        position = 'self._offset + %d' % offset if offset else 'self._offset'
+        unpack = '%s.unpack_from(self._buffer, %s)' % (struct_name, position)
+        if slot['char']:
+            lines += ["        return %s[0].rstrip(b'\\x00')" % unpack]
+        elif slot['count'] > 1:
+            lines += ['        return %s' % unpack]
+        else:
+            lines += ['        return %s[0]' % unpack]
+        lines += ['', '    @%s.setter' % member_name, '    def %s(self, value):' % member_name,
+                  '        %s.pack_into(self._buffer, %s, %svalue)' % (
+                      struct_name, position, '*' if slot['count'] > 1 else '')]
+        return lines
+
+    def _value_node(self, type_layout: dict, element: Optional[list], offset: int, slots: List[dict],
+                    class_name: Optional[str] = None) -> dict:
+        """
+        Describes how the value of a field or composite member is decoded
+        :param type_layout: layout of the field or member
+        :param element: the field or encoding element, used for constant values
+        :param offset: offset of the value in its block
+        :param slots: list to which the struct slots of the value are appended
+        :param class_name: name of a flyweight class if the value is a composite
+        :return: a node of kind 'slot', 'constant' or 'composite'
+        """
+        kind = type_layout['kind']
+        if element is not None and element[0] == 'ref':
+            element = self._encoding_element(element[1]['type'])
+        if kind == 'composite':
+            if element is not None and element[0] == 'field':
+                # a field refers to a named composite, whose members are not copied to the field layout
+                class_name = element[1]['type'] if class_name is not None else None
+                type_layout = self.layout.type_layout(element[1]['type'])
+                element = self._encoding_element(element[1]['type'])
+            node = {'kind': 'composite', 'members': self._member_nodes(type_layout, element, offset, slots, class_name)}
+            if class_name is not None and element is not None:
+                node['class'] = self._composite_class(class_name, type_layout, element)
+            return node
+        if not type_layout['size']:
+            return {'kind': 'constant', 'value': self._constant_value(type_layout, element)}
+        primitive_type = type_layout.get('primitiveType', None)
+        length = type_layout.get('length', 1) if kind in ['type', 'primitive'] else 1
+        if primitive_type == 'char':
+            slot = {'format': '%d%s' % (length, SBECodec10.CHAR_CODE), 'count': 1, 'char': True}
+        elif primitive_type in SBECodec10.PRIMITIVE_CODES:
+            code = SBECodec10.PRIMITIVE_CODES[primitive_type]
+            slot = {'format': '%d%s' % (length, code) if length > 1 else code, 'count': length, 'char': False}
+        else:
+            self.logger.error('No struct format for %s of kind %s', primitive_type, kind)
+            slot = {'format': '%dx' % type_layout['size'], 'count': 0, 'char': False}
+        slot.update({'offset': offset, 'size': type_layout['size']})
+        slots.append(slot)
+        return {'kind': 'slot', 'slot': slot}
+
+    def _member_nodes(self, type_layout: dict, composite: Optional[list], offset: int, slots: List[dict],
+                      class_name: Optional[str]) -> List[Tuple[str, dict]]:
+        member_elements = [member for member in (composite or []) if isinstance(member, list) and
+                           member[0] in ['type', 'enum', 'set', 'ref', 'composite']]
+        return [(member[1]['name'], self._value_node(member_layout, member, offset + member_layout['offset'], slots,
+                                                     class_name + '_' + member[1]['name'] if class_name else None))
+                for (member, member_layout) in zip(member_elements, type_layout.get('members', []))]
+
+    def _block_format(self, slots: List[dict], block_length: int, block_name: str) -> str:
+        """ Builds a struct format of slots ordered by offset and padded to the block length; sets slot indexes """
+        fmt = ''
+        position = 0
+        index = 0
+        for slot in sorted(slots, key=lambda s: s['offset']):
+            if slot['offset'] < position:
+                self.logger.error('Overlapping fields at offset %d of %s', slot['offset'], block_name)
+            elif slot['offset'] > position:
+                fmt += '%dx' % (slot['offset'] - position)
+            fmt += slot['format']
+            position = max(position, slot['offset'] + slot['size'])
+            slot['index'] = index
+            index += slot['count']
+        if block_length > position:
+            fmt += '%dx' % (block_length - position)
+        return fmt
+
+    def _data_struct(self, data_layout: dict) -> str:
+        code = SBECodec10.PRIMITIVE_CODES.get(data_layout.get('lengthPrimitiveType', None), 'H')
+        self._structs.add(code)
+        return '_STRUCT_' + code
+
+    def _constant_value(self, type_layout: dict, element: Optional[list]):
+        if element is None:
+            return None
+        value_ref = element[1].get('valueRef', None)
+        if value_ref and '.' in value_ref:
+            (enum_name, value_name) = value_ref.split('.', 1)
+            valid_value = self.sbe.valid_value_by_name(enum_name, value_name)
+            if valid_value is None:
+                self.logger.error('Constant valueRef %s not found', value_ref)
+                return None
+            text = SBECodec10._text(valid_value)
+        else:
+            text = SBECodec10._text(element)
+            if text is None and element[0] == 'field':
+                text = SBECodec10._text(self._encoding_element(element[1]['type']) or [])
+        return SBECodec10._literal(text, type_layout.get('primitiveType', None))
+
+    def _constants_class(self, encoding_type: list) -> List[str]:
+        """ Generates a class of the valid values of an enum or the bit masks of the choices of a set """
+        type_name = encoding_type[1]['name']
+        primitive_type = self.layout.type_layout(type_name).get('primitiveType', None)
+        lines = ['', '', 'class %s(object):' % self._class_name(type_name),
+                 '    """ %s %s """' % ('Enum' if encoding_type[0] == 'enum' else 'Set', type_name)]
+        member_names = set()
+        for value in encoding_type:
+            if isinstance(value, list) and len(value) > 1 and isinstance(value[1], dict):
+                if encoding_type[0] == 'enum':
+                    literal = SBECodec10._literal(SBECodec10._text(value), primitive_type)
+                else:
+                    literal = 1 << SBECodec10._int(SBECodec10._text(value))
+                lines.append('    %s = %r' % (SBECodec10._member_name(value[1]['name'], member_names), literal))
+        return lines
+
+    def _encoding_element(self, type_name: str) -> Optional[list]:
+        return self.sbe.composite_by_name(type_name) or self.sbe.type_by_name(type_name) or \
+               self.sbe.enum_by_name(type_name) or self.sbe.set_by_name(type_name)
+
+    def _class_name(self, name: str) -> str:
+        class_name = SBECodec10._identifier(name)
+        while class_name in self._class_names:
+            class_name += '_'
+        self._class_names.add(class_name)
+        return class_name
+
+    @staticmethod
+    def _member_name(name: str, member_names: set) -> str:
+        member_name = SBECodec10._identifier(name)
+        while member_name in member_names:
+            member_name += '_'
+        member_names.add(member_name)
+        return member_name
+
+    @staticmethod
+    def _identifier(name: str) -> str:
+        identifier = re.sub(r'\W', '_', name)
+        if not identifier or identifier[0].isdigit() or identifier[0] == '_':
+            identifier = 'v' + identifier
+        if keyword.iskeyword(identifier):
+            identifier += '_'
+        return identifier
+
+    @staticmethod
+    def _value_expr(node: dict) -> str:
+        """ Returns an expression of a value in terms of the tuple v unpacked from a block """
+        if node['kind'] == 'constant':
+            return repr(node['value'])
+        elif node['kind'] == 'composite':
+            return '{%s}' % ', '.join('%r: %s' % (name, SBECodec10._value_expr(member))
+                                      for (name, member) in node['members'])
+        slot = node['slot']
+        if slot['char']:
+            return "v[%d].rstrip(b'\\x00')" % slot['index']
+        elif slot['count'] > 1:
+            return 'v[%d:%d]' % (slot['index'], slot['index'] + slot['count'])
+        elif slot['count'] == 0:
+            return 'None'
+        return 'v[%d]' % slot['index']
+
+    @staticmethod
+    def _pack_args(node: dict, source: str) -> List[str]:
+        """ Returns the arguments of a block struct pack() call for a value taken from a source expression """
+        if node['kind'] == 'composite':
+            args = []
+            for (name, member) in node['members']:
+                args += SBECodec10._pack_args(member, '%s[%r]' % (source, name))
+            return args
+        elif node['kind'] == 'slot' and node['slot']['count'] > 1:
+            return ['*' + source]
+        elif node['kind'] == 'slot' and node['slot']['count']:
+            return [source]
+        return []
+
+    @staticmethod
+    def _text(element: list) -> Optional[str]:
+        text = next((child for child in element[2:] if isinstance(child, str)), None)
+        return text.strip() if text is not None else None
+
+    @staticmethod
+    def _literal(text: Optional[str], primitive_type: Optional[str]):
+        if text is None:
+            return None
+        elif primitive_type == 'char':
+            return text.encode('latin-1')
+        try:
+            return float(text) if primitive_type in ['float', 'double'] else int(text)
+        except ValueError:
+            return text
+
+    @staticmethod
+    def _int(value) -> int:
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return 0
+
+    @staticmethod
+    def _index(names: List[str], name: str) -> int:
+        return names.index(name) if name in names else 0
+
+
+SBECodec = SBECodec10
+"""Default codec generator; also applies to SBE version 2.0 message schemas"""
@@ -0,0 +1,144 @@
+import logging
+from typing import Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .sbeinstance import SBEInstance10
+from .sbelayout import SBELayout10
+
+
+class SBEDtype10:
+    """
+    Generates NumPy structured dtypes from an SBE message schema
+
+    A dtype is generated for the root block of each message and for an entry of each repeating group, with field
+    offsets and item size from SBELayout10. Composites become nested structured dtypes, enums and sets are represented
+    by their encoding types, and char arrays by byte strings. Fields with constant presence occupy no bytes on the wire
+    and are omitted. Byte order is taken from the byteOrder attribute of the message schema.
+
+    An array of fixed-length blocks, such as a capture of messages of the same template stripped of their headers, can
+    then be decoded in a single call, e.g. ``numpy.frombuffer(buffer, dtype=dtypes['NewOrderSingle'])``.
+
+    Requires NumPy, which is an optional dependency.
+    """
+
+    PRIMITIVE_CODES = {'char': 'S', 'int8': 'i1', 'int16': 'i2', 'int32': 'i4', 'int64': 'i8',
+                       'uint8': 'u1', 'uint16': 'u2', 'uint32': 'u4', 'uint64': 'u8', 'float': 'f4', 'double': 'f8'}
+    """NumPy type codes of SBE primitive types, without byte order"""
+
+    def __init__(self, sbe: SBEInstance10, alignment: Optional[int] = None):
+        """
+        :param sbe: an SBE message schema
+        :param alignment: alignment of fields, as for SBELayout10
+        """
+        if np is None:
+            raise ImportError('NumPy is required to generate structured dtypes')
+        self.logger = logging.getLogger('sbedtype')
+        self.sbe = sbe
+        self.layout = SBELayout10(sbe, alignment)
+        byte_order = sbe.message_schema().get('byteOrder', 'littleEndian')
+        self.byte_order = '>' if byte_order == 'bigEndian' else '<'
+        # dtypes of named encoding types keyed by name
+        self._type_dtypes = {}
+
+    def message_dtypes(self) -> Dict[str, 'np.dtype']:
+        """
+        :return: dtypes of the root blocks of all messages, keyed by message name
+        """
+        return {message[1]['name']: self.message_dtype(message) for message in self.sbe.messages()}
+
+    def message_dtype(self, message: list) -> 'np.dtype':
+        """
+        :param message: an SBE message
+        :return: dtype of the root block of the message
+        """
+        message_layout = self.layout.message_layout(message)
+        return self.block_dtype(message_layout)
+
+    def group_dtypes(self, message: list) -> Dict[str, 'np.dtype']:
+        """
+        :param message: an SBE message
+        :return: dtypes of an entry of each repeating group of a message, including nested groups, keyed by the path
+        of group names separated by '.'
+        """
+        dtypes = {}
+        self._group_dtypes(self.layout.message_layout(message)['groups'], '', dtypes)
+        return dtypes
+
+    def _group_dtypes(self, group_layouts: List[dict], prefix: str, dtypes: Dict[str, 'np.dtype']):
+        for group_layout in group_layouts:
+            path = prefix + group_layout['name']
+            dtypes[path] = self.block_dtype(group_layout)
+            self._group_dtypes(group_layout['groups'], path + '.', dtypes)
+
+    def header_dtype(self) -> 'np.dtype':
+        """
+        :return: dtype of the message header of the schema
+        """
+        return self.type_dtype(self.sbe.message_schema().get('headerType', 'messageHeader'))
+
+    def block_dtype(self, block_layout: dict) -> 'np.dtype':
+        """
+        :param block_layout: layout of a message or group from SBELayout10
+        :return: dtype of the fixed-length fields of the block with its block length as item size
+        """
+        names = []
+        formats = []
+        offsets = []
+        for field_layout in block_layout['fields']:
+            if field_layout['size']:
+                names.append(self._unique_name(field_layout['name'], names))
+                formats.append(self.type_dtype(field_layout['type']))
+                offsets.append(field_layout['offset'])
+        return np.dtype({'names': names, 'formats': formats, 'offsets': offsets,
+                         'itemsize': block_layout['blockLength']})
+
+    def type_dtype(self, type_name: str) -> 'np.dtype':
+        """
+        :param type_name: name of an encoding type or primitive type
+        :return: dtype of the encoding type
+        """
+        dtype = self._type_dtypes.get(type_name, None)
+        if dtype is None:
+            dtype = self._layout_dtype(self.layout.type_layout(type_name))
+            self._type_dtypes[type_name] = dtype
+        return dtype
+
+    def _layout_dtype(self, type_layout: dict) -> 'np.dtype':
+        if type_layout['kind'] == 'composite':
+            names = []
+            formats = []
+            offsets = []
+            for member in type_layout['members']:
+                if member['size']:
+                    names.append(self._unique_name(member['name'], names))
+                    formats.append(self._layout_dtype(member))
+                    offsets.append(member['offset'])
+            return np.dtype({'names': names, 'formats': formats, 'offsets': offsets, 'itemsize': type_layout['size']})
+        primitive_type = type_layout.get('primitiveType', None)
+        code = SBEDtype10.PRIMITIVE_CODES.get(primitive_type, None)
+        if not code:
+            self.logger.error('No dtype for encoding of kind %s', type_layout['kind'])
+            return np.dtype(('V', type_layout['size'])) if type_layout['size'] else np.dtype('V')
+        length = type_layout.get('length', 1)
+        if primitive_type == 'char':
+            return np.dtype('S%d' % max(length, 1))
+        dtype = np.dtype(self.byte_order + code)
+        return np.dtype((dtype, (length,))) if length > 1 else dtype
+
+    def _unique_name(self, name: str, names: List[str]) -> str:
+        unique_name = name
+        suffix = 1
+        while unique_name in names:
+            suffix += 1
+            unique_name = '%s_%d' % (name, suffix)
+        if unique_name != name:
+            self.logger.warning('Duplicate field name %s renamed %s', name, unique_name)
+        return unique_name
+
+
+SBEDtype = SBEDtype10
+"""Default dtype generator; also applies to SBE version 2.0 message schemas"""
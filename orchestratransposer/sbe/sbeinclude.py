@@ -0,0 +1,132 @@
+import logging
+import os
+import xml.etree.ElementTree as ET
+from typing import List, Optional, Tuple
+from urllib.parse import urlsplit
+from urllib.request import url2pathname
+
+from xmlschema import XMLResource
+
+XINCLUDE_NAMESPACE = 'http://www.w3.org/2001/XInclude'
+XINCLUDE_INCLUDE = '{%s}include' % XINCLUDE_NAMESPACE
+XINCLUDE_FALLBACK = '{%s}fallback' % XINCLUDE_NAMESPACE
+
+
+class SBEFragmentCache:
+    """
+    Parsed XML fragments included by SBE message schemas, keyed by path
+
+    A fragment is parsed once and reused until its file, or a file that it includes, is modified. Includes within a
+    fragment are resolved when it is parsed, and errors resolving them are reported again on each reuse. A fragment
+    with an include that could not be read is parsed again once the included file is created or modified. Cached
+    elements are shared by the schemas that include them and must not be modified.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger('sbeinclude')
+        # (element, dependencies as (path, modification time) tuples, errors) keyed by absolute path
+        self._fragments = {}
+        self.parse_count = 0
+        """Number of fragment files parsed, including those parsed again after they were modified"""
+
+    def clear(self):
+        """ Discards all cached fragments """
+        self._fragments.clear()
+
+    def fragment(self, path: str, including: Tuple[str, ...] = ()) -> Tuple[ET.Element, List[tuple], List[Exception]]:
+        """
+        Returns the parsed root element of a fragment file with its includes resolved
+        :param path: path of the fragment
+        :param including: paths of the documents that include the fragment, to detect circular includes
+        :return: the root element, the files it depends on as (path, modification time) tuples, and errors resolving
+        its includes, if any
+        :raises OSError: if the fragment cannot be read
+        :raises ET.ParseError: if the fragment is not well-formed
+        """
+        path = os.path.abspath(path)
+        if path in including:
+            raise ValueError('Circular XInclude of %s' % path)
+        entry = self._fragments.get(path, None)
+        if entry is not None and all(SBEFragmentCache._mtime(dependency) == mtime
+                                     for (dependency, mtime) in entry[1]):
+            return entry[0], entry[1], list(entry[2])
+        mtime = SBEFragmentCache._mtime(path)
+        root = ET.parse(path).getroot()
+        self.parse_count += 1
+        self.logger.debug('Parsed fragment %s', path)
+        errors = []
+        dependencies = [(path, mtime)]
+        dependencies += resolve_includes(root, os.path.dirname(path), errors, self, including + (path,))
+        self._fragments[path] = (root, dependencies, list(errors))
+        return root, dependencies, errors
+
+    @staticmethod
+    def _mtime(path: str) -> Optional[int]:
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+
+fragment_cache = SBEFragmentCache()
+"""Fragment cache shared by all reads of SBE message schemas in a process"""
+
+
+def resolve_includes(root: ET.Element, base_dir: str, errors: List[Exception],
+                     cache: SBEFragmentCache = fragment_cache, including: Tuple[str, ...] = ()) -> List[tuple]:
+    """
+    Replaces XInclude elements in a tree with the root elements of the included files
+
+    Only parse="xml" includes of local files without xpointer are supported. If an included file cannot be read, the
+    content of an xi:fallback element is used instead, or else an error is reported and the include is removed. The
+    file is then a dependency with its modification time, or None if it is missing.
+
+    :param root: root of the tree, which is modified in place
+    :param base_dir: directory against which relative hrefs are resolved
+    :param errors: list to which errors are appended
+    :param cache: cache of parsed fragments
+    :param including: paths of the documents that include this tree
+    :return: dependencies of the tree as (path, modification time) tuples of included files
+    """
+    dependencies = []
+    parents = [parent for parent in root.iter() if any(child.tag == XINCLUDE_INCLUDE for child in parent)]
+    for parent in parents:
+        children = []
+        for child in parent:
+            if child.tag != XINCLUDE_INCLUDE:
+                children.append(child)
+                continue
+            href = child.get('href', '')
+            if child.get('parse', 'xml') != 'xml' or child.get('xpointer', None) is not None:
+                errors.append(ValueError('Unsupported XInclude of %s' % href))
+                continue
+            path = os.path.join(base_dir, url2pathname(urlsplit(href).path))
+            try:
+                (fragment, fragment_dependencies, fragment_errors) = cache.fragment(path, including)
+                children.append(fragment)
+                dependencies += fragment_dependencies
+                errors += fragment_errors
+            except (OSError, ET.ParseError, ValueError) as e:
+                dependencies.append((os.path.abspath(path), SBEFragmentCache._mtime(path)))
+                fallback = child.find(XINCLUDE_FALLBACK)
+                if fallback is not None:
+                    children += list(fallback)
+                else:
+                    errors.append(e)
+        parent[:] = children
+    return dependencies
+
+
+def read_resource(xml, errors: List[Exception]) -> XMLResource:
+    """
+    Loads an XML source as a resource for decoding, with its XIncludes resolved
+    :param xml: the source of XML data, as accepted by xmlschema
+    :param errors: list to which errors resolving includes are appended
+    """
+    resource = xml if isinstance(xml, XMLResource) else XMLResource(xml)
+    if any(True for _ in resource.root.iter(XINCLUDE_INCLUDE)):
+        base_dir = os.getcwd()
+        if resource.url and urlsplit(resource.url).scheme in ['', 'file']:
+            base_dir = os.path.dirname(url2pathname(urlsplit(resource.url).path))
+        resolve_includes(resource.root, base_dir, errors)
+    return resource
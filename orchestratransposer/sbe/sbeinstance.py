@@ -1,5 +1,5 @@
 from pprint import pformat
-from typing import Optional
+from typing import Iterator, Optional, Tuple
 
 
 class SBEInstance10:
@@ -9,7 +9,21 @@ class SBEInstance10:
 
     def __init__(self, obj=None):
         self.obj = obj if obj is not None else ['sbe:messageSchema', {}]
+        self._invalidate()
+
+    def _invalidate(self):
+        """ Discards cached views and lookup indexes after the message schema is changed """
         self._all_encoding_types = None
+        # number of types lists when all types were listed
+        self._types_lists = 0
+        self._all_messages = None
+        # filtered lists of types keyed by element name, e.g. 'composite'
+        self._type_views = {}
+        # types keyed by element name, then by casefolded type name; enum validValues keyed by enum and value names
+        self._type_indexes = None
+        self._valid_value_index = None
+        # flattened members of a message or group structure, keyed by id of the structure
+        self._flattened_structures = {}
 
     def __str__(self):
         return pformat(self.obj, width=120)
@@ -30,16 +44,26 @@ class SBEInstance10:
     def all_types(self) -> list:
         """
         Returns a List of all types lists
+
+        The list is built on first access and kept until a message is appended. Types appended by the append methods
+        are added to it.
         """
         if self._all_encoding_types is None:
             self._all_encoding_types = []
+            self._types_lists = 0
             for i in filter(lambda l: isinstance(l, list) and l[0] == 'types', self.root()):
+                self._types_lists += 1
                 for j in filter(lambda l: isinstance(l, list), i):
                     self._all_encoding_types.append(list(j))
         return self._all_encoding_types
 
     def first_types(self) -> list:
-        """ Returns the first instance of types list, suitable for appending new encoding types """
+        """
+        Returns the first instance of types list
+
+        New types should be added by append_encoding_type(), append_composite() or append_enum(), which keep lookups
+        up to date.
+        """
         try:
             return next(l for l in self.root() if isinstance(l, list) and l[0] == 'types')
         except StopIteration:
@@ -56,8 +80,7 @@ class SBEInstance10:
            ['type', {'name': 'date', 'primitiveType': 'uint16', 'semanticType': 'LocalMktDate'}]
 
         """
-        types_l = self.first_types()
-        types_l.append(encoding_type)
+        self._append_type(encoding_type)
 
     def append_composite(self, composite):
         """
@@ -72,8 +95,7 @@ class SBEInstance10:
            ['type', {'name': 'day', 'primitiveType': 'uint8'}],
            ['type', {'name': 'week', 'primitiveType': 'uint8'}]]
         """
-        types_l = self.first_types()
-        types_l.append(composite)
+        self._append_type(composite)
 
     def append_enum(self, enum):
         """
@@ -88,41 +110,84 @@ class SBEInstance10:
            ['validValue', {'name': 'Buy'}, '1'],
            ['validValue', {'name': 'Sell'}, '2']]]
         """
-        types_l = self.first_types()
-        types_l.append(enum)
+        self._append_type(enum)
+
+    def _append_type(self, encoding_type: list):
+        """
+        Appends a type to the first types list and adds it to the cached views and indexes
+
+        The caches are only discarded if there are several types lists, since the type is then not the last one in
+        document order.
+        """
+        self.first_types().append(encoding_type)
+        if self._all_encoding_types is None or self._types_lists > 1:
+            self._invalidate()
+            return
+        entry = list(encoding_type)
+        self._all_encoding_types.append(entry)
+        view = self._type_views.get(entry[0], None)
+        if view is not None:
+            view.append(entry)
+        if self._type_indexes is not None and len(entry) > 1 and isinstance(entry[1], dict) and 'name' in entry[1]:
+            name = entry[1]['name'].casefold()
+            index = self._type_indexes.setdefault(entry[0], {})
+            if name not in index:
+                index[name] = entry
+                if entry[0] == 'enum' and self._valid_value_index is not None:
+                    for value in entry:
+                        if isinstance(value, list) and len(value) > 1 and isinstance(value[1], dict):
+                            self._valid_value_index.setdefault((name, value[1]['name'].casefold()), value)
+        # flattened structures may refer to types by name
+        self._flattened_structures = {}
+
+    def _types_of_kind(self, kind: str) -> list:
+        view = self._type_views.get(kind, None)
+        if view is None:
+            view = list(filter(lambda l: isinstance(l, list) and l[0] == kind, self.all_types()))
+            self._type_views[kind] = view
+        return view
+
+    def _type_index(self, kind: str) -> dict:
+        """
+        Returns an index of types of one kind by casefolded name, built on first access
+
+        If names are duplicated, the first type wins.
+        :param kind: element name of a type, e.g. 'composite'
+        """
+        if self._type_indexes is None:
+            self._type_indexes = {}
+            for t in self.all_types():
+                if len(t) > 1 and isinstance(t[1], dict) and 'name' in t[1]:
+                    self._type_indexes.setdefault(t[0], {}).setdefault(t[1]['name'].casefold(), t)
+        return self._type_indexes.get(kind, {})
 
     def encoding_types(self) -> list:
         """ Access simple encoding types """
-        types_l = self.all_types()
-        return list(filter(lambda l: isinstance(l, list) and l[0] == 'type', types_l))
+        return self._types_of_kind('type')
 
     def type_by_name(self, type_name: str) -> Optional[list]:
-        types = self.encoding_types()
-        return next((t for t in types if
-                     isinstance(t, list) and t[1]['name'].casefold() == type_name.casefold()),
-                    None)
+        return self._type_index('type').get(type_name.casefold(), None)
 
     def composites(self) -> list:
         """ Access composite types """
-        types_l = self.all_types()
-        return list(filter(lambda l: isinstance(l, list) and l[0] == 'composite', types_l))
+        return self._types_of_kind('composite')
 
     def composite_by_name(self, composite_name: str) -> Optional[list]:
-        composites = self.composites()
-        return next((composite for composite in composites if
-                     isinstance(composite, list) and composite[1]['name'].casefold() == composite_name.casefold()),
-                    None)
+        return self._type_index('composite').get(composite_name.casefold(), None)
 
     def enums(self) -> list:
         """ Access enums """
-        types_l = self.all_types()
-        return list(filter(lambda l: isinstance(l, list) and l[0] == 'enum', types_l))
+        return self._types_of_kind('enum')
 
     def enum_by_name(self, enum_name: str) -> Optional[list]:
-        enums = self.enums()
-        return next((enum for enum in enums if
-                     isinstance(enum, list) and enum[1]['name'].casefold() == enum_name.casefold()),
-                    None)
+        return self._type_index('enum').get(enum_name.casefold(), None)
+
+    def sets(self) -> list:
+        """ Access sets of choices """
+        return self._types_of_kind('set')
+
+    def set_by_name(self, set_name: str) -> Optional[list]:
+        return self._type_index('set').get(set_name.casefold(), None)
 
     @staticmethod
     def enum_value_by_name(enum: list, value_name: str) -> Optional[list]:
@@ -130,9 +195,26 @@ class SBEInstance10:
                      isinstance(value, list) and value[1]['name'].casefold() == value_name.casefold()),
                     None)
 
+    def valid_value_by_name(self, enum_name: str, value_name: str) -> Optional[list]:
+        """
+        Find a valid value of an enum, such as referenced by a constant valueRef like TimeUnit.nanosecond
+        :param enum_name: name of an enum
+        :param value_name: name of a valid value of the enum
+        :return: a validValue, or None if not found
+        """
+        if self._valid_value_index is None:
+            self._valid_value_index = {}
+            for (name, enum) in self._type_index('enum').items():
+                for value in enum:
+                    if isinstance(value, list) and len(value) > 1 and isinstance(value[1], dict):
+                        self._valid_value_index.setdefault((name, value[1]['name'].casefold()), value)
+        return self._valid_value_index.get((enum_name.casefold(), value_name.casefold()), None)
+
     def messages(self) -> list:
         """ Accesses a List of messages"""
-        return list(filter(lambda l: isinstance(l, list) and l[0] == 'sbe:message', self.root()))
+        if self._all_messages is None:
+            self._all_messages = list(filter(lambda l: isinstance(l, list) and l[0] == 'sbe:message', self.root()))
+        return self._all_messages
 
     def append_message(self, message):
         """
@@ -150,6 +232,7 @@ class SBEInstance10:
           ['data', {'id': 58, 'name': 'Text', 'semanticType': 'data', 'type': 'DATA'}]]
         """
         self.root().append(message)
+        self._invalidate()
 
     @staticmethod
     def append_field(structure: list, field):
@@ -207,11 +290,7 @@ class SBEInstance10:
         :param field_name: name of field to find
         :return: a field, or None if not found
         """
-        all_sbe_fields: list = []
-        self.all_fields(structure, all_sbe_fields)
-        return next((field for field in all_sbe_fields if
-                     isinstance(field, list) and field[1]['name'].casefold() == field_name.casefold()),
-                    None)
+        return self._field_index(structure)[0].get(field_name.casefold(), None)
 
     def field_by_type(self, structure: dict, field_type: str) -> Optional[list]:
         """
@@ -220,11 +299,93 @@ class SBEInstance10:
         :param field_type: type of field to find
         :return: a field, or None if not found
         """
-        all_sbe_fields: list = []
-        self.all_fields(structure, all_sbe_fields)
-        return next((field for field in all_sbe_fields if
-                     isinstance(field, list) and field[1]['type'].casefold() == field_type.casefold()),
-                    None)
+        return self._field_index(structure)[1].get(field_type.casefold(), None)
+
+    def invalidate_structures(self):
+        """
+        Discards the flattened members of message and group structures, which are flattened again on next access
+
+        Call this after members of a structure are changed in place, such as fields reordered or renamed.
+        """
+        self._flattened_structures = {}
+
+    def _flattened(self, structure: list) -> dict:
+        """
+        Returns the members of a message or group structure, including nested groups, flattened in a single walk
+
+        The result is kept until a member of the structure or of one of its nested groups is added, removed, replaced
+        or moved, or a type or message is appended to the schema. Fields, data fields and groups are each a list of
+        tuples of nesting path and member, in the same order as all_fields() and all_data().
+        """
+        entry = self._flattened_structures.get(id(structure), None)
+        if entry is None or entry['structure'] is not structure or \
+                any(len(s) != len(members) or any(a is not b for (a, b) in zip(s, members))
+                    for (s, members) in entry['members']):
+            # the structure and its members are retained so that their ids cannot be reused while cached
+            entry = {'structure': structure, 'members': [], 'fields': [], 'data': [], 'groups': []}
+            SBEInstance10._flatten(structure, (), entry)
+            self._flattened_structures[id(structure)] = entry
+        return entry
+
+    @staticmethod
+    def _flatten(structure: list, path: tuple, entry: dict):
+        entry['members'].append((structure, list(structure)))
+        groups = []
+        for member in filter(lambda l: isinstance(l, list), structure):
+            if member[0] == 'field':
+                entry['fields'].append((path, member))
+            elif member[0] == 'data':
+                entry['data'].append((path, member))
+            elif member[0] == 'group':
+                groups.append(member)
+        for group in groups:
+            entry['groups'].append((path, group))
+            SBEInstance10._flatten(group, path + (group[1].get('name', None),), entry)
+
+    def iter_fields(self, structure: list) -> Iterator[Tuple[tuple, list]]:
+        """
+        Iterates the fixed-length fields of a message or group structure, including those of nested groups
+        :param structure: message or group structure
+        :return: an iterator of tuples of nesting path and field. The path is a tuple of the names of enclosing groups
+        within the structure, empty for its own fields.
+        """
+        return iter(self._flattened(structure)['fields'])
+
+    def iter_data(self, structure: list) -> Iterator[Tuple[tuple, list]]:
+        """
+        Iterates the variable-length data fields of a message or group structure, including those of nested groups
+        :param structure: message or group structure
+        :return: an iterator of tuples of nesting path and data field
+        """
+        return iter(self._flattened(structure)['data'])
+
+    def iter_groups(self, structure: list) -> Iterator[Tuple[tuple, list]]:
+        """
+        Iterates the repeating groups of a message or group structure, including nested groups, parents first
+        :param structure: message or group structure
+        :return: an iterator of tuples of nesting path and group. The path of a group does not include its own name.
+        """
+        return iter(self._flattened(structure)['groups'])
+
+    def _field_index(self, structure: list) -> tuple:
+        """
+        Returns indexes of the fixed-length fields of a message or group structure, including nested groups, by
+        casefolded name and by casefolded type
+
+        Indexes are kept with the flattened structure. If keys are duplicated, the first field wins.
+        """
+        entry = self._flattened(structure)
+        if 'by_name' not in entry:
+            by_name = {}
+            by_type = {}
+            for (path, field) in entry['fields']:
+                if 'name' in field[1]:
+                    by_name.setdefault(field[1]['name'].casefold(), field)
+                if 'type' in field[1]:
+                    by_type.setdefault(field[1]['type'].casefold(), field)
+            entry['by_name'] = by_name
+            entry['by_type'] = by_type
+        return entry['by_name'], entry['by_type']
 
     def first_field_by_type(self, field_name: str) -> Optional[list]:
         """
@@ -232,9 +393,9 @@ class SBEInstance10:
         :param field_name: name to match
         :return: a field, or None if no match
         """
-        messages = self.messages()
-        for message in messages:
-            field = self.field_by_type(message, field_name)
+        field_type = field_name.casefold()
+        for message in self.messages():
+            field = self._field_index(message)[1].get(field_type, None)
             if field:
                 return field
         return None
@@ -306,8 +467,7 @@ class SBEInstance20(SBEInstance10):
 
     def __init__(self, obj=None):
         self.obj = obj if obj is not None else ['messageSchema', {}]
-        self._all_encoding_types = None
-        self._all_messages = None
+        self._invalidate()
 
     def first_messages(self) -> list:
         """ Returns the first instance of message list, suitable for appending new messages """
@@ -332,3 +492,4 @@ class SBEInstance20(SBEInstance10):
         Appends a message
         """
         self.first_messages().append(message)
+        self._invalidate()
@@ -0,0 +1,257 @@
+import logging
+from typing import List, Optional, Tuple
+
+from .sbeinstance import SBEInstance10
+
+
+class SBELayout10:
+    """
+    Computes the wire layout of the messages of an SBE message schema
+
+    The layout of a message contains the offset and size of each fixed-length field of its root block, its block length,
+    the layout of its repeating groups with their dimension encodings, and the order of its variable-length data
+    fields, which have no fixed offset. Offsets and block lengths that are present in the schema are honored unless
+    they conflict with the sizes of preceding fields.
+
+    The layout is a dictionary suitable for codec generators, for example:
+
+    .. code-block:: python
+
+        {'name': 'ExecutionReport', 'id': 98, 'blockLength': 42,
+         'fields': [{'name': 'OrderID', 'id': 37, 'type': 'idString', 'kind': 'type', 'offset': 0, 'size': 8,
+                     'primitiveType': 'char', 'length': 8, 'presence': 'required'}, ...],
+         'groups': [{'name': 'FillsGrp', 'id': 2112, 'blockLength': 12, 'dimensionType': 'groupSizeEncoding',
+                     'dimension': {...}, 'fields': [...], 'groups': [], 'data': []}],
+         'data': []}
+    """
+
+    PRIMITIVE_SIZES = {'char': 1, 'int8': 1, 'int16': 2, 'int32': 4, 'int64': 8,
+                       'uint8': 1, 'uint16': 2, 'uint32': 4, 'uint64': 8, 'float': 4, 'double': 8}
+    """Encoded size in bytes of each SBE primitive type"""
+
+    def __init__(self, sbe: SBEInstance10, alignment: Optional[int] = None, use_schema_offsets=True):
+        """
+        :param sbe: an SBE message schema
+        :param alignment: if provided, each fixed-length field is aligned to the size of its largest primitive up to
+        this many bytes, and block lengths are padded to a multiple of it. Otherwise fields are packed.
+        :param use_schema_offsets: if True, offsets and block lengths in the schema are honored, otherwise they are
+        recomputed
+        """
+        self.logger = logging.getLogger('sbelayout')
+        self.sbe = sbe
+        self.alignment = alignment
+        self.use_schema_offsets = use_schema_offsets
+        # layouts of named encoding types keyed by name
+        self._type_layouts = {}
+
+    def layout(self, write_back=False) -> dict:
+        """
+        Computes the layout of a message schema
+        :param write_back: if True, field offsets and message and group block lengths are set in the schema
+        :return: a dictionary with the layout of the message header and a list of message layouts
+        """
+        header_type = self.sbe.message_schema().get('headerType', 'messageHeader')
+        header = self.type_layout(header_type)
+        messages = [self.message_layout(message, write_back) for message in self.sbe.messages()]
+        return {'headerType': header_type, 'header': header, 'messages': messages}
+
+    def message_layout(self, message: list, write_back=False) -> dict:
+        """
+        Computes the layout of a message
+        :param message: an SBE message
+        :param write_back: if True, field offsets and block lengths are set in the message
+        :return: a dictionary with the layout of the message
+        """
+        layout = {'name': message[1]['name'], 'id': message[1].get('id', None)}
+        self._block_layout(message, layout, write_back)
+        return layout
+
+    def block_length(self, fields: list) -> int:
+        """
+        Computes the length of a block of fixed-length fields in the given order, including padding
+        :param fields: SBE fields of a message or group
+        """
+        (field_layouts, offset) = self._fields_layout(fields, None, False)
+        return SBELayout10._align(offset, self.alignment) if self.alignment else offset
+
+    def _fields_layout(self, fields: list, block_name: Optional[str], write_back: bool) -> Tuple[List[dict], int]:
+        field_layouts = []
+        offset = 0
+        for field in fields:
+            field_layout = self.field_layout(field)
+            offset = SBELayout10._align(offset, self.field_alignment(field, field_layout))
+            declared = field[1].get('offset', None)
+            if declared is not None and self.use_schema_offsets:
+                if int(declared) < offset:
+                    self.logger.error('Field %s offset %s overlaps preceding fields in %s; using %d',
+                                      field[1]['name'], declared, block_name, offset)
+                else:
+                    offset = int(declared)
+            field_layout['offset'] = offset
+            offset += field_layout['size']
+            field_layouts.append(field_layout)
+            if write_back:
+                field[1]['offset'] = field_layout['offset']
+        return field_layouts, offset
+
+    def _block_layout(self, structure: list, layout: dict, write_back: bool):
+        (fields, offset) = self._fields_layout(SBEInstance10.fields(structure), structure[1]['name'], write_back)
+        if self.alignment:
+            offset = SBELayout10._align(offset, self.alignment)
+        explicit_alignment = structure[1].get('alignment', None)
+        if explicit_alignment:
+            offset = SBELayout10._align(offset, int(explicit_alignment))
+        block_length = offset
+        declared = structure[1].get('blockLength', None)
+        if declared is not None and self.use_schema_offsets:
+            if int(declared) < block_length:
+                self.logger.error('%s blockLength %s is less than size of its fields; using %d',
+                                  structure[1]['name'], declared, block_length)
+            else:
+                block_length = int(declared)
+        layout['blockLength'] = block_length
+        layout['fields'] = fields
+        layout['groups'] = [self.group_layout(group, write_back) for group in SBEInstance10.groups(structure)]
+        layout['data'] = [self.data_layout(data) for data in SBEInstance10.data(structure)]
+        if write_back:
+            structure[1]['blockLength'] = block_length
+
+    def group_layout(self, group: list, write_back=False) -> dict:
+        """
+        Computes the layout of a repeating group, including its dimension encoding and nested groups
+        :param group: an SBE group
+        :param write_back: if True, field offsets and block lengths are set in the group
+        :return: a dictionary with the layout of the group
+        """
+        dimension_type = group[1].get('dimensionType', 'groupSizeEncoding')
+        layout = {'name': group[1]['name'], 'id': group[1].get('id', None), 'dimensionType': dimension_type,
+                  'dimension': self.type_layout(dimension_type)}
+        self._block_layout(group, layout, write_back)
+        return layout
+
+    def data_layout(self, data: list) -> dict:
+        """
+        Computes the layout of a variable-length data field, which is encoded as a length prefix followed by data
+        :param data: an SBE data field
+        :return: a dictionary with the size of the length prefix and the primitive type of the data
+        """
+        data_type = data[1]['type']
+        layout = {'name': data[1]['name'], 'id': data[1].get('id', None), 'type': data_type}
+        type_layout = self.type_layout(data_type)
+        members = type_layout.get('members', [])
+        length = next((member for member in members if member['name'] == 'length'), None)
+        var_data = next((member for member in members if member['name'] == 'varData'), None)
+        if length and var_data:
+            layout['lengthSize'] = length['size']
+            layout['lengthPrimitiveType'] = length.get('primitiveType', None)
+            layout['primitiveType'] = var_data.get('primitiveType', None)
+        else:
+            self.logger.error('Data field %s type %s lacks length and varData', data[1]['name'], data_type)
+        return layout
+
+    def field_layout(self, field: list) -> dict:
+        """
+        Computes the size of a fixed-length field. Its offset depends on the preceding fields of its block.
+        :param field: an SBE field
+        :return: a dictionary with the kind and size of the field's type
+        """
+        field_type = field[1]['type']
+        presence = field[1].get('presence', 'required')
+        layout = {'name': field[1]['name'], 'id': field[1].get('id', None), 'type': field_type}
+        type_layout = self.type_layout(field_type)
+        for (key, value) in type_layout.items():
+            if key not in ['name', 'members']:
+                layout[key] = value
+        if presence == 'constant':
+            layout['size'] = 0
+        layout['presence'] = presence
+        return layout
+
+    def type_layout(self, type_name: str) -> dict:
+        """
+        Computes the layout of a named encoding type
+        :param type_name: name of a simple type, composite, enum or set, or a primitive type
+        :return: a dictionary with kind and size of the type, and the layout of members of a composite
+        """
+        layout = self._type_layouts.get(type_name, None)
+        if layout is None:
+            if type_name in SBELayout10.PRIMITIVE_SIZES:
+                layout = {'kind': 'primitive', 'size': SBELayout10.PRIMITIVE_SIZES[type_name],
+                          'primitiveType': type_name, 'alignment': SBELayout10.PRIMITIVE_SIZES[type_name]}
+            else:
+                encoding_type = self.sbe.type_by_name(type_name) or self.sbe.composite_by_name(type_name) or \
+                                self.sbe.enum_by_name(type_name) or self.sbe.set_by_name(type_name)
+                if encoding_type:
+                    # guards against a composite that refers to itself
+                    self._type_layouts[type_name] = {'kind': encoding_type[0], 'size': 0, 'alignment': 1}
+                    layout = self.encoding_layout(encoding_type)
+                else:
+                    self.logger.error('Encoding type %s not found', type_name)
+                    layout = {'kind': 'unknown', 'size': 0, 'alignment': 1}
+            self._type_layouts[type_name] = layout
+        return layout
+
+    def encoding_layout(self, encoding_type: list) -> dict:
+        """
+        Computes the layout of an encoding type element
+        :param encoding_type: a type, composite, enum, set or ref element
+        :return: a dictionary with kind and size of the type, and the layout of members of a composite
+        """
+        kind = encoding_type[0]
+        attr = encoding_type[1]
+        if kind == 'type':
+            primitive_type = attr.get('primitiveType', None)
+            length = int(attr.get('length', 1))
+            primitive_size = SBELayout10.PRIMITIVE_SIZES.get(primitive_type, 0)
+            if not primitive_size:
+                self.logger.error('Type %s has unknown primitiveType %s', attr.get('name', None), primitive_type)
+            size = 0 if attr.get('presence', None) == 'constant' else primitive_size * length
+            return {'kind': kind, 'size': size, 'primitiveType': primitive_type, 'length': length,
+                    'alignment': max(primitive_size, 1)}
+        elif kind in ['enum', 'set']:
+            encoding = self.type_layout(attr['encodingType'])
+            return {'kind': kind, 'size': encoding['size'], 'primitiveType': encoding.get('primitiveType', None),
+                    'alignment': encoding['alignment']}
+        elif kind == 'ref':
+            return dict(self.type_layout(attr['type']))
+        elif kind == 'composite':
+            members = []
+            offset = 0
+            alignment = 1
+            for member in filter(lambda l: isinstance(l, list) and l[0] in ['type', 'enum', 'set', 'ref', 'composite'],
+                                 encoding_type):
+                member_layout = {'name': member[1]['name']}
+                member_layout.update(self.encoding_layout(member))
+                declared = member[1].get('offset', None)
+                if declared is not None and self.use_schema_offsets and int(declared) >= offset:
+                    offset = int(declared)
+                member_layout['offset'] = offset
+                offset += member_layout['size']
+                alignment = max(alignment, member_layout['alignment'])
+                members.append(member_layout)
+            return {'kind': kind, 'size': offset, 'alignment': alignment, 'members': members}
+        else:
+            self.logger.error('Unsupported encoding type %s', kind)
+            return {'kind': kind, 'size': 0, 'alignment': 1}
+
+    def field_alignment(self, field: list, field_layout: dict) -> int:
+        """
+        Returns the byte alignment of the offset of a field
+        :param field: an SBE field
+        :param field_layout: layout of the field from field_layout()
+        """
+        explicit_alignment = field[1].get('alignment', None)
+        if explicit_alignment:
+            return int(explicit_alignment)
+        elif self.alignment and field_layout['size']:
+            return min(field_layout['alignment'], self.alignment)
+        else:
+            return 1
+
+    @staticmethod
+    def _align(offset: int, alignment: int) -> int:
+        return -(-offset // alignment) * alignment if alignment > 1 else offset
+
+
+SBELayout = SBELayout10
+"""Default SBE layout engine; also applies to SBE version 2.0 message schemas"""
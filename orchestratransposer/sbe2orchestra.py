@@ -1,8 +1,12 @@
 import logging
-from typing import List
+import os
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
 
 from orchestra.orchestra import Orchestra10
 from orchestra.orchestrainstance import OrchestraInstance10
+from orchestramerge import OrchestraMerger10
 from sbe.sbe import SBE10, SBE20
 from sbe.sbeinstance import SBEInstance10, SBEInstance20
 
@@ -55,6 +59,52 @@ class SBE2Orchestra10_10:
                     self.logger.error(error)
             return errors
 
+    def sbe2orch_merge_dict(self, orchs: List[OrchestraInstance10], name: Optional[str] = None) -> OrchestraInstance10:
+        """
+        Merge Orchestra dictionaries translated from several SBE message schemas into one repository
+        :param orchs: Orchestra version 1.0 data dictionaries, in order of precedence
+        :param name: name of the merged repository. If not provided, the packages of the schemas are joined.
+        :return: a merged Orchestra version 1.0 data dictionary
+        """
+        return OrchestraMerger10().merge(orchs, name)
+
+    def sbe2orch_merge_xml(self, sbe_xmls: List[str], orch_stream, workers: Optional[int] = None,
+                           name: Optional[str] = None) -> List[Exception]:
+        """
+        Translate several SBE message schemas, version 1.0 or 2.0, into a single merged Orchestra file
+
+        Schemas are decoded and translated by a pool of worker processes, then merged in the order given, so the
+        output does not depend on the number of workers. Identical datatypes, codesets, fields, components, groups and
+        messages are merged; conflicting definitions are kept as variants as described by OrchestraMerger10.
+        :param sbe_xmls: paths of SBE message schema files. The version of each schema is detected from its namespace.
+        :param orch_stream: an output stream to write an Orchestra file
+        :param workers: maximum number of worker processes. If not provided, one per schema up to the number of CPUs.
+        If 1, schemas are translated sequentially in the current process.
+        :param name: name of the merged repository. If not provided, the packages of the schemas are joined.
+        :return: a list of errors, if any
+        """
+        if workers is None:
+            workers = min(len(sbe_xmls), os.cpu_count() or 1)
+        if workers <= 1 or len(sbe_xmls) <= 1:
+            results = [_sbe2orch_merge_worker(sbe_xml) for sbe_xml in sbe_xmls]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(_sbe2orch_merge_worker, sbe_xmls))
+        errors = []
+        for (sbe_xml, (_, schema_errors)) in zip(sbe_xmls, results):
+            errors += [ValueError('%s: %s' % (sbe_xml, error)) for error in schema_errors]
+        if errors:
+            for error in errors:
+                self.logger.error(error)
+            return errors
+        orch_instance = self.sbe2orch_merge_dict([OrchestraInstance10(root) for (root, _) in results], name)
+        orchestra = Orchestra10()
+        errors = orchestra.write_xml(orch_instance, orch_stream)
+        if errors:
+            for error in errors:
+                self.logger.error(error)
+        return errors
+
     def sbe2orch_metadata(self, sbe: SBEInstance10, orch: OrchestraInstance10):
         """
         Set Orchestra metadata from an SBE message schema
@@ -126,10 +176,9 @@ class SBE2Orchestra10_10:
                         if value_ref:
                             # reference like TimeUnit.nanosecond
                             parts = value_ref.split('.')
-                            if parts[0]:
-                                enum = sbe.enum_by_name(parts[0])
-                                if enum and parts[1]:
-                                    valid_value = SBEInstance10.enum_value_by_name(enum, parts[1])
+                            if parts[0] and len(parts) > 1 and parts[1]:
+                                valid_value = sbe.valid_value_by_name(parts[0], parts[1])
+                                if valid_value:
                                     field_attr['value'] = valid_value[2]
                         else:
                             field_attr['value'] = sbe_type[2]
@@ -289,13 +338,9 @@ class SBE2Orchestra10_10:
         field_dict = {}
         sbe_messages: list = sbe.messages()
         for sbe_message in sbe_messages:
-            all_sbe_fields = []
-            SBEInstance10.all_fields(sbe_message, all_sbe_fields)
-            for sbe_field in all_sbe_fields:
+            for (path, sbe_field) in sbe.iter_fields(sbe_message):
                 field_dict[sbe_field[1]['id']] = sbe_field
-            all_sbe_data_fields = []
-            SBEInstance10.all_data(sbe_message, all_sbe_data_fields)
-            for sbe_field in all_sbe_data_fields:
+            for (path, sbe_field) in sbe.iter_data(sbe_message):
                 field_dict[sbe_field[1]['id']] = sbe_field
         field_l = sorted(field_dict.values(), key=SBEInstance10.id)
         for sbe_field in field_l:
@@ -368,3 +413,27 @@ class SBE2Orchestra20_10(SBE2Orchestra10_10):
                 for error in errors:
                     self.logger.error(error)
             return errors
+
+
+SBE_NAMESPACES = {'http://fixprotocol.io/2016/sbe': (SBE10, SBE2Orchestra10_10),
+                  'http://fixprotocol.io/2017/sbe': (SBE20, SBE2Orchestra20_10)}
+"""SBE readers and translators keyed by the namespace of the root element of a message schema"""
+
+
+def _sbe2orch_merge_worker(sbe_xml: str) -> Tuple[Optional[list], List[Exception]]:
+    """ Translates one SBE message schema to merge; returns the root of an Orchestra dictionary and errors, if any """
+    try:
+        # only the root element is parsed to detect the version of the schema
+        with open(sbe_xml, 'rb') as f:
+            (_, root) = next(ET.iterparse(f, events=('start',)))
+    except (OSError, ET.ParseError) as e:
+        return None, [e]
+    namespace = root.tag[1:].split('}')[0] if root.tag.startswith('{') else ''
+    if namespace not in SBE_NAMESPACES:
+        return None, [ValueError('Not an SBE message schema: %s' % root.tag)]
+    (sbe_class, translator_class) = SBE_NAMESPACES[namespace]
+    (sbe_instance, errors) = sbe_class().read_xml(sbe_xml)
+    if errors:
+        # xmlschema errors cannot be unpickled by the parent process
+        return None, [ValueError(str(error)) for error in errors]
+    return translator_class().sbe2orch_dict(sbe_instance).root(), []
@@ -0,0 +1,16 @@
+from xmlschema import XMLSchema
+
+_schemas = {}
+"""Compiled XML schemas keyed by path; a schema is only read once compiled, so instances share it"""
+
+
+def cached_schema(source) -> XMLSchema:
+    """
+    Returns a compiled XML schema, compiled on first use in a process
+    :param source: path of a schema, or a list of paths
+    """
+    key = tuple(source) if isinstance(source, list) else source
+    xsd = _schemas.get(key, None)
+    if xsd is None:
+        xsd = _schemas[key] = XMLSchema(source)
+    return xsd
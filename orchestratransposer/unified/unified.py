@@ -2,11 +2,17 @@ import os
 from typing import List, Tuple
 from xml.etree import ElementTree
 
-from xmlschema import JsonMLConverter, XMLSchema
+from xmlschema import JsonMLConverter
 
 from .unifiedinstance import UnifiedMainInstance, UnifiedInstanceWithPhrases, \
     UnifiedPhrasesInstance
 
+try:
+    from ..schemacache import cached_schema
+except ImportError:
+    # imported as a top-level package, as by the translators
+    from schemacache import cached_schema
+
 
 class UnifiedMain:
     """
@@ -17,7 +23,7 @@ class UnifiedMain:
     def __init__(self):
         schemas_dir = os.path.join(os.path.dirname(__file__), 'schemas/')
         repository_xsd_path = os.path.join(schemas_dir, 'FixRepository.xsd')
-        self.xsd = XMLSchema(repository_xsd_path)
+        self.xsd = cached_schema(repository_xsd_path)
 
     def validate(self, xml) -> List[Exception]:
         """
@@ -73,7 +79,7 @@ class UnifiedPhrases:
     def __init__(self):
         schemas_dir = os.path.join(os.path.dirname(__file__), 'schemas/')
         phrases_xsd_path = os.path.join(schemas_dir, 'FixPhrases.xsd')
-        self.xsd = XMLSchema(phrases_xsd_path)
+        self.xsd = cached_schema(phrases_xsd_path)
 
     def validate(self, xml) -> List[Exception]:
         """
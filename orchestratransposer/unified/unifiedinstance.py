@@ -54,6 +54,13 @@ class UnifiedMainInstance:
         except LookupError:
             return None
 
+    def fix_versions(self) -> List[str]:
+        """
+        :return: the versions of all fix elements in a Unified Repository, in document order
+        """
+        return [i[1]['version'] for i in self.root() if isinstance(i, list) and i[0] == 'fix' and
+                isinstance(i[1], dict) and i[1].get('version', None)]
+
     @staticmethod
     def __types(fix: list, category: str) -> list:
         try:
@@ -149,6 +156,7 @@ class UnifiedPhrasesInstance:
 
     def __init__(self, phrases_obj: Optional[dict] = None):
         self.phrases_obj = phrases_obj if phrases_obj is not None else ['phrases', {}]
+        self._phrase_index = None
 
     def __str__(self):
         return pformat(self.phrases_obj, width=120)
@@ -184,11 +192,26 @@ class UnifiedPhrasesInstance:
                 text.append(['para', documentation[1]])
 
         # if already exists, remove old values
-        old_phrase = next((p for p in self.phrases_root() if isinstance(p, list) and len(p) >= 2
-                           and p[1].get('textId', None) == text_id), None)
+        old_phrase = self.phrase(text_id)
         if old_phrase:
             self.phrases_root().remove(old_phrase)
         self.phrases_root().append(phrase)
+        self._phrase_index[text_id] = phrase
+
+    def phrase(self, text_id: str) -> Optional[list]:
+        """
+        Finds a phrase by key
+
+        An index of phrases by textId is built on first access and maintained by append_documentation().
+        :param text_id: key for documentation of an element
+        :return: a phrase, or None if the key is not found
+        """
+        if self._phrase_index is None:
+            self._phrase_index = {}
+            for p in self.phrases_root():
+                if isinstance(p, list) and len(p) >= 2 and isinstance(p[1], dict) and 'textId' in p[1]:
+                    self._phrase_index.setdefault(p[1]['textId'], p)
+        return self._phrase_index.get(text_id, None)
 
     @staticmethod
     def _purpose_sort(d):
@@ -209,8 +232,7 @@ class UnifiedPhrasesInstance:
         an empty list if the key is not found
         """
         retv = []
-        phrase = next((p for p in self.phrases_root() if isinstance(p, list) and len(p) >= 2
-                       and p[1].get('textId', None) == text_id), None)
+        phrase = self.phrase(text_id) if text_id else None
         if phrase:
             text = filter(lambda l: isinstance(l, list) and l[0] == 'text', phrase)
             for i in text:
@@ -1,29 +1,42 @@
+import hashlib
 import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import Callable, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
 from orchestra.orchestra import Orchestra10WithAppinfo
 from orchestra.orchestrainstance import OrchestraInstance10
 from unified.unified import UnifiedWithPhrases
-from unified.unifiedinstance import UnifiedInstanceWithPhrases, UnifiedMainInstance
+from unified.unifiedinstance import UnifiedInstanceWithPhrases, UnifiedMainInstance, UnifiedPhrasesInstance
+
+ALL_VERSIONS = '*'
+"""Key of the errors of reading a Unified Repository when no versions to translate were listed"""
 
 
 class Unified2Orchestra10:
 
     def __init__(self):
         self.logger = logging.getLogger('unified2orchestra')
+        # codeset name keyed by id of a field whose enums duplicate an earlier codeset
+        self.codeset_aliases: Dict[int, str] = {}
+        # number of duplicate codesets merged, keyed by fix version
+        self.codesets_merged: Dict[str, int] = {}
 
     def unified2orch_dict(self, unified: UnifiedInstanceWithPhrases,
-                          version: Optional[str] = None) -> OrchestraInstance10:
+                          version: Optional[str] = None, deduplicate_codesets=False) -> OrchestraInstance10:
         """
         Translate a Unified Repository to an Orchestra dictionary
         :param unified: a Unified Repository instance
         :param version: a version of fix in Unified Repository to convert. If not provided, it converts the first
         instance found.
+        :param deduplicate_codesets: if True, fields with identical enums share a single codeset. The number of codesets
+        merged is set in codesets_merged.
         :return: an Orchestra version 1.0 data dictionary
         """
         orch = OrchestraInstance10()
         fix = unified.fix(version)
+        self.codeset_aliases = {}
         documentation_func: Callable[[str], List[Tuple[str, List[str]]]] = unified.text_id
         self.unified2orch_metadata(unified, fix, orch)
         sections = orch.sections()
@@ -33,7 +46,9 @@ class Unified2Orchestra10:
         datatypes = orch.datatypes()
         self.unified2orch_datatypes(fix, documentation_func, datatypes)
         codesets = orch.codesets()
-        self.unified2orch_codesets(fix, documentation_func, codesets)
+        merged = self.unified2orch_codesets(fix, documentation_func, codesets, deduplicate_codesets)
+        if deduplicate_codesets:
+            self.codesets_merged[fix[1]['version']] = merged
         fields = orch.fields()
         self.unified2orch_fields(fix, documentation_func, fields)
         components = orch.components()
@@ -44,8 +59,9 @@ class Unified2Orchestra10:
         self.unified2orch_messages(fix, documentation_func, messages)
         return orch
 
-    def unified2orch_xml(self, xml_path, phrases_xml_path, orch_stream, version: Optional[str] = None) -> \
-            List[Exception]:
+    def unified2orch_xml(self, xml_path, phrases_xml_path, orch_stream, version: Optional[str] = None,
+                         deduplicate_codesets=False) -> List[Exception]:
+        self.codesets_merged = {}
         unified = UnifiedWithPhrases()
         (unified_instance, errors) = unified.read_xml_all(xml_path, phrases_xml_path)
         if errors:
@@ -53,7 +69,7 @@ class Unified2Orchestra10:
                 self.logger.error(error)
             return errors
         else:
-            orch_instance = self.unified2orch_dict(unified_instance, version)
+            orch_instance = self.unified2orch_dict(unified_instance, version, deduplicate_codesets)
             orchestra = Orchestra10WithAppinfo()
             errors = orchestra.write_xml(orch_instance, orch_stream)
             if errors:
@@ -61,6 +77,83 @@ class Unified2Orchestra10:
                     self.logger.error(error)
             return errors
 
+    def unified2orch_versions_xml(self, xml_path, phrases_xml_path, output_path: str,
+                                  versions: Optional[List[str]] = None,
+                                  workers: Optional[int] = None,
+                                  deduplicate_codesets=False) -> Dict[str, List[Exception]]:
+        """
+        Translate several fix versions of a Unified Repository to separate Orchestra files
+
+        The Unified Repository and phrases files are decoded only once. Each version is then translated and written
+        by a pool of worker processes that share the decoded repository.
+        :param xml_path: a Unified Repository file
+        :param phrases_xml_path: a Unified Repository phrases file
+        :param output_path: base path of output files. The version is appended to the file name of each output, as
+        produced by version_output_path().
+        :param versions: fix versions to convert. If not provided, all versions in the Unified Repository are converted.
+        :param workers: maximum number of worker processes. If not provided, one per version up to the number of
+        CPUs. If 1, versions are translated sequentially in the current process.
+        :param deduplicate_codesets: if True, fields with identical enums share a single codeset. The number of codesets
+        merged in each version is set in codesets_merged.
+        :return: a dictionary of lists of errors, if any, keyed by fix version. If the Unified Repository cannot be read
+        and versions are not provided, its errors are keyed by ALL_VERSIONS.
+        """
+        self.codesets_merged = {}
+        unified = UnifiedWithPhrases()
+        (unified_instance, errors) = unified.read_xml_all(xml_path, phrases_xml_path)
+        if errors:
+            for error in errors:
+                self.logger.error(error)
+            return {version: errors for version in versions} if versions else {ALL_VERSIONS: errors}
+        available = unified_instance.fix_versions()
+        # a version given twice would be translated twice, concurrently, to the same file
+        versions = list(dict.fromkeys(versions or available))
+        results = {}
+        for version in versions:
+            if version not in available:
+                self.logger.error('Version %s not found in Unified Repository', version)
+                results[version] = [LookupError(f'Version {version} not found in Unified Repository')]
+        jobs = [(version, Unified2Orchestra10.version_output_path(output_path, version)) for version in versions if
+                version not in results]
+        if workers is None:
+            workers = min(len(jobs), os.cpu_count() or 1)
+        if workers <= 1 or len(jobs) <= 1:
+            orchestra = Orchestra10WithAppinfo()
+            for (version, path) in jobs:
+                results[version] = self._unified2orch_version_xml(unified_instance, orchestra, version, path,
+                                                                  deduplicate_codesets)
+        else:
+            # the decoded repository is handed to each worker once, not once per version
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_versions_worker,
+                                     initargs=(unified_instance.root(), unified_instance.phrases.phrases_root())) \
+                    as executor:
+                futures = {version: executor.submit(_unified2orch_version_worker, version, path, deduplicate_codesets)
+                           for (version, path) in jobs}
+                for (version, future) in futures.items():
+                    (results[version], merged) = future.result()
+                    if deduplicate_codesets:
+                        self.codesets_merged[version] = merged
+        return {version: results[version] for version in versions}
+
+    @staticmethod
+    def version_output_path(output_path: str, version: str) -> str:
+        """
+        Returns the path of an output file for one fix version, e.g. orchestra_FIX.Latest_EP269.xml
+        :param output_path: base path of output files
+        :param version: a fix version
+        """
+        (root, ext) = os.path.splitext(output_path)
+        return root + '_' + version + (ext or '.xml')
+
+    def _unified2orch_version_xml(self, unified: UnifiedInstanceWithPhrases, orchestra: Orchestra10WithAppinfo,
+                                  version: str, output_path: str, deduplicate_codesets=False) -> List[Exception]:
+        orch_instance = self.unified2orch_dict(unified, version, deduplicate_codesets)
+        with open(output_path, 'wb') as orch_stream:
+            errors = orchestra.write_xml(orch_instance, orch_stream)
+        for error in errors:
+            self.logger.error('Version %s: %s', version, error)
+        return errors
+
     def unified2orch_metadata(self, unified: UnifiedInstanceWithPhrases, fix: list, orch: OrchestraInstance10):
         """
         Set Orchestra metadata from a Unified Repository
@@ -144,6 +237,12 @@ class Unified2Orchestra10:
     def unified2orch_fields(self, fix: list, documentation_func: Callable[[str], List[Tuple[str, List[str]]]],
                             fields: list):
         unified_fields = UnifiedMainInstance.fields(fix)
+        # fields keyed by id, by associated data tag and by name, first one wins as in the UnifiedMainInstance lookups
+        (fields_by_id, length_fields, fields_by_name) = ({}, {}, {})
+        for unified_field in filter(lambda l: isinstance(l, list), unified_fields):
+            fields_by_id.setdefault(unified_field[1]['id'], unified_field)
+            length_fields.setdefault(unified_field[1].get('associatedDataTag', None), unified_field)
+            fields_by_name.setdefault(unified_field[1].get('name', None), unified_field)
         lst = filter(lambda l: isinstance(l, list) and l[0] == 'field', unified_fields)
         for unified_field in lst:
             exclude_keys = ['textId', 'notReqXML', 'enum', 'associatedDataTag', 'enumDatatype', 'issue']
@@ -158,31 +257,49 @@ class Unified2Orchestra10:
             enum = next(filter(lambda l: isinstance(l, list) and l[0] == 'enum', unified_field), None)
             enum_id = unified_field[1].get('enumDatatype', None)
             if enum_id:
-                enum_field = UnifiedMainInstance.field(fix, enum_id)
+                enum_field = fields_by_id.get(enum_id, None)
                 if enum_field:
-                    codeset_name = enum_field[1]['name'] + 'CodeSet'
+                    codeset_name = self.codeset_aliases.get(enum_id, enum_field[1]['name'] + 'CodeSet')
                     field_attr['type'] = codeset_name
             elif enum:
-                codeset_name = unified_field[1]['name'] + 'CodeSet'
+                codeset_name = self.codeset_aliases.get(unified_field[1]['id'], unified_field[1]['name'] + 'CodeSet')
                 field_attr['type'] = codeset_name
             else:
                 # is this field the associated data field of a Length field? If so, set lengthId.
-                unified_length_field = UnifiedMainInstance.field_length_field(fix, unified_field[1]['id'])
+                unified_length_field = length_fields.get(unified_field[1]['id'], None)
                 if unified_length_field:
                     field_attr['lengthId'] = unified_length_field[1]['id']
             # does this field have an associated Source field? If so, set discriminatorId.
-            unified_source_field = UnifiedMainInstance.discrimintator_field(fix, unified_field[1]['name'])
+            unified_source_field = fields_by_name.get(unified_field[1]['name'] + 'Source', None)
             if unified_source_field:
                     field_attr['discriminatorId'] = unified_source_field[1]['id']
             fields.append(field)
 
     def unified2orch_codesets(self, fix: list, documentation_func: Callable[[str], List[Tuple[str, List[str]]]],
-                              codesets: list):
+                              codesets: list, deduplicate_codesets=False) -> int:
+        """
+        Append Orchestra codesets from the enums of Unified fields
+        :param deduplicate_codesets: if True, a field whose enums are identical to those of an earlier field is not
+        given its own codeset. Its id is mapped to the earlier codeset in codeset_aliases.
+        :return: the number of duplicate codesets merged
+        """
         unified_fields = UnifiedMainInstance.fields(fix)
         lst = filter(lambda f: isinstance(f, list) and f[0] == 'field' and len(f) > 2 and f[2][0] == 'enum',
                      unified_fields)
+        # codeset name keyed by fingerprint of its enums
+        fingerprints: Dict[str, str] = {}
+        merged = 0
         for unified_field in lst:
             codeset_name = unified_field[1]['name'] + 'CodeSet'
+            if deduplicate_codesets:
+                fingerprint = Unified2Orchestra10.enum_fingerprint(unified_field)
+                existing_name = fingerprints.setdefault(fingerprint, codeset_name)
+                if existing_name != codeset_name:
+                    self.codeset_aliases[unified_field[1]['id']] = existing_name
+                    self.logger.info('Codeset of field %d merged with identical %s', unified_field[1]['id'],
+                                     existing_name)
+                    merged += 1
+                    continue
             codeset_attr = {'name': codeset_name, 'id': unified_field[1]['id'], 'type': unified_field[1]['type']}
             codeset = ['fixr:codeSet', codeset_attr]
             d = {k: unified_field[1].get(k, None) for k in
@@ -213,6 +330,22 @@ class Unified2Orchestra10:
                 unified_field[1].get('textId', None))
             OrchestraInstance10.append_documentations(codeset, unified_documentation)
             codesets.append(codeset)
+        if deduplicate_codesets:
+            self.logger.info('%d duplicate codesets merged', merged)
+        return merged
+
+    @staticmethod
+    def enum_fingerprint(unified_field: list) -> str:
+        """
+        Returns a content hash of the enums of a Unified field
+
+        Fields have the same fingerprint if they have the same datatype and their enums have the same values and
+        symbolic names in the same order. Documentation and pedigree are not considered.
+        """
+        h = hashlib.sha1(unified_field[1]['type'].encode())
+        for enum in filter(lambda e: isinstance(e, list) and e[0] == 'enum', unified_field):
+            h.update(b'\x00' + str(enum[1]['value']).encode() + b'\x01' + enum[1]['symbolicName'].encode())
+        return h.hexdigest()
 
     def unified2orch_components(self, fix: list, documentation_func: Callable[[str], List[Tuple[str, List[str]]]],
                                 components: list):
@@ -333,3 +466,23 @@ class Unified2Orchestra10:
 
 Unified2Orchestra = Unified2Orchestra10
 """ Default implementation of Unified Repository to Orchestra conversion """
+
+# State of a worker process for multi-version translation, set once by the pool initializer
+_worker_unified: Optional[UnifiedInstanceWithPhrases] = None
+_worker_orchestra: Optional[Orchestra10WithAppinfo] = None
+
+
+def _init_versions_worker(unified_root: list, phrases_root: list):
+    global _worker_unified, _worker_orchestra
+    _worker_unified = UnifiedInstanceWithPhrases(UnifiedMainInstance(unified_root),
+                                                 UnifiedPhrasesInstance(phrases_root))
+    _worker_orchestra = Orchestra10WithAppinfo()
+
+
+def _unified2orch_version_worker(version: str, output_path: str,
+                                 deduplicate_codesets: bool) -> Tuple[List[Exception], int]:
+    translator = Unified2Orchestra10()
+    errors = translator._unified2orch_version_xml(_worker_unified, _worker_orchestra, version, output_path,
+                                                  deduplicate_codesets)
+    # xmlschema errors cannot be unpickled by the parent process
+    return [ValueError(str(error)) for error in errors], sum(translator.codesets_merged.values())
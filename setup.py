@@ -9,5 +9,6 @@ setup(
     license='Apache 2.0',
     author='Donald Mendelson',
     author_email='donmendelson@gmail.com',
-    description='Converts between FIX Orchestra and other formats'
+    description='Converts between FIX Orchestra and other formats',
+    extras_require={'numpy': ['numpy'], 'msgpack': ['msgpack']}
 )
@@ -0,0 +1,259 @@
+"""
+Benchmarks of translations, run by hand rather than by pytest, whose timings depend on the machine:
+
+    python -m tests.benchmark [NAME]...
+
+Runs each benchmark, or the named ones, which print their measures to stdout. The exit status is 1 if any measure
+exceeds its bound: either a budget in seconds or a minimum rate, set for a developer workstation, or a ratio to the
+duration of a baseline that the benchmark also times, such as the unoptimized path it replaces.
+"""
+import copy
+import os
+import re
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from orchestratransposer import Orchestra, Orchestra2SBE, Orchestra2Unified, SBE
+from orchestratransposer.orchestra.orchestrainstance import OrchestraInstance10
+from orchestratransposer.orchestra.orchestratags import OrchestraTagDictionary, OrchestraTagExporter
+from orchestratransposer.orchestra.orchestravalidator import DATATYPE_PATTERNS, OrchestraValidator
+from orchestratransposer.sbe.sbebatch import SBEBatchDecoder
+from orchestratransposer.sbe.sbecodec import SBECodec
+from tests.test_orchestra import ORDER
+from tests.test_sbe import codec_examples, output_dir, sofh_capture
+
+XML_FILE_DIR = os.path.join(os.path.dirname(__file__), 'xml/')
+
+BENCHMARKS: Dict[str, Callable[[], bool]] = {}
+"""Benchmark functions keyed by name. Each prints its measures and returns False if any exceeds its bound."""
+
+
+def benchmark(func: Callable[[], bool]) -> Callable[[], bool]:
+    BENCHMARKS[func.__name__] = func
+    return func
+
+
+def report_duration(label: str, elapsed: float, budget: float) -> bool:
+    """
+    Prints a duration and its budget
+    :return: False if the duration exceeds its budget
+    """
+    print(f'{label}: {elapsed:.3f} s, budget {budget:.3f} s' + (' EXCEEDED' if elapsed > budget else ''))
+    return elapsed <= budget
+
+
+def report_ratio(label: str, elapsed: float, baseline: float, ratio: float) -> bool:
+    """
+    Prints a duration, the duration of its baseline and the time saved
+    :return: False if the duration exceeds ratio times the baseline
+    """
+    print(f'{label}: {elapsed:.3f} s, baseline {baseline:.3f} s, saved {baseline - elapsed:.3f} s, '
+          f'ratio {elapsed / baseline:.2f}, bound {ratio:.2f}' + (' EXCEEDED' if elapsed > ratio * baseline else ''))
+    return elapsed <= ratio * baseline
+
+
+def report_rate(label: str, count: int, elapsed: float, minimum: Optional[float] = None) -> bool:
+    """
+    Prints a rate in messages per second and its minimum, if any
+    :return: False if the rate is below its minimum
+    """
+    rate = count / elapsed
+    if minimum is None:
+        print(f'{label}: {rate:.0f} messages/s')
+        return True
+    print(f'{label}: {rate:.0f} messages/s, minimum {minimum:.0f} messages/s' + (' BELOW' if rate < minimum else ''))
+    return rate >= minimum
+
+
+@benchmark
+def orch2unified_dict() -> bool:
+    """ Translation of FIX Latest to a Unified Repository, excluding XML decoding and encoding """
+    (orchestra_instance, errors) = Orchestra().read_xml(os.path.join(XML_FILE_DIR, 'OrchestraFIXLatest.xml'))
+    assert not errors
+    translator = Orchestra2Unified()
+    start = time.perf_counter()
+    translator.orch2unified_dict(orchestra_instance)
+    return report_duration('orch2unified_dict', time.perf_counter() - start, 5.0)
+
+
+@benchmark
+def orch2sbe_memoize() -> bool:
+    """ Translation of FIX Latest to SBE, memoized against not memoized, with and without components to datatypes """
+    (orch_instance, errors) = Orchestra().read_xml(os.path.join(XML_FILE_DIR, 'OrchestraFIXLatest.xml'))
+    assert not errors
+    within = True
+    for components_to_datatypes in [True, False]:
+        elapsed = {}
+        output = {}
+        for memoize in [False, True]:
+            translator = Orchestra2SBE()
+            translator.memoize = memoize
+            start = time.perf_counter()
+            sbe_instance = translator.orch2sbe_dict(orch_instance, components_to_datatypes)
+            elapsed[memoize] = time.perf_counter() - start
+            output[memoize] = str(sbe_instance)
+        assert output[True] == output[False]
+        within &= report_ratio(f'orch2sbe_memoize components_to_datatypes={components_to_datatypes}',
+                               elapsed[True], elapsed[False], 1.0)
+    return within
+
+
+@benchmark
+def sbe_lookup() -> bool:
+    """ Lookups of every composite by name and of a field in every message of a schema of 500 copies of Examples """
+    (instance, errors) = SBE().read_xml(os.path.join(XML_FILE_DIR, 'Examples.xml'))
+    composites = list(instance.composites())
+    messages = list(instance.messages())
+    for i in range(1, 500):
+        for composite in composites:
+            composite = copy.deepcopy(composite)
+            composite[1]['name'] += str(i)
+            instance.append_composite(composite)
+        for message in messages:
+            message = copy.deepcopy(message)
+            message[1]['id'] += 1000 * i
+            instance.append_message(message)
+    names = [composite[1]['name'] for composite in instance.composites()]
+    start = time.perf_counter()
+    for name in names:
+        assert instance.composite_by_name(name)[1]['name'] == name
+    for message in instance.messages():
+        instance.field_by_name(message, 'Side')
+    return report_duration('sbe_lookup', time.perf_counter() - start, 0.5)
+
+
+@benchmark
+def sbe_codec() -> bool:
+    """ Decoding then encoding of 30000 messages of Examples by generated codecs """
+    (instance, errors) = SBE().read_xml(os.path.join(XML_FILE_DIR, 'Examples.xml'))
+    codecs = SBECodec(instance).load()
+    examples = codec_examples(codecs, 1234)
+    buffer = b''.join(codecs.encode(name, values) for (name, values) in examples) * 10000
+    count = len(examples) * 10000
+    start = time.perf_counter()
+    offset = 0
+    while offset < len(buffer):
+        offset = codecs.decode(buffer, offset)[2]
+    decoded = time.perf_counter()
+    for _ in range(10000):
+        for (name, values) in examples:
+            codecs.encode(name, values)
+    encoded = time.perf_counter()
+    within = report_rate('sbe_codec decode', count, decoded - start, 100000)
+    return report_rate('sbe_codec encode', count, encoded - decoded, 100000) and within
+
+
+@benchmark
+def sbe_batch_decode() -> bool:
+    """ Batch decoding of a capture of 300000 framed messages of Examples, against decoding each by codecs """
+    (instance, errors) = SBE().read_xml(os.path.join(XML_FILE_DIR, 'Examples.xml'))
+    codecs = SBECodec(instance).load()
+    buffer = sofh_capture(codecs, codec_examples(codecs, 1234), 100000)
+    decoder = SBEBatchDecoder(instance)
+    start = time.perf_counter()
+    decoded = decoder.decode(buffer)
+    batch = time.perf_counter()
+    assert sum(messages['count'] for messages in decoded.values()) == 300000
+    count = 0
+    offset = 0
+    while offset < len(buffer):
+        offset = codecs.decode(buffer, offset + 6)[2]
+        count += 1
+    assert count == 300000
+    return report_ratio('sbe_batch_decode', batch - start, time.perf_counter() - batch, 1.0)
+
+
+def naive_validate(orch: OrchestraInstance10, fields: List[Tuple[int, str]]) -> List[str]:
+    """ Validates a message by walking the repository, for comparison with OrchestraValidator """
+    errors = []
+    msg_type = next(value for (tag, value) in fields if tag == 35)
+    message = next(m for m in orch.messages() if isinstance(m, list) and m[1].get('msgType', None) == msg_type)
+    allowed = set()
+    required = set()
+
+    def walk(structure: list, is_required: bool):
+        for member in filter(lambda l: isinstance(l, list) and len(l) > 1 and isinstance(l[1], dict), structure):
+            member_required = is_required and member[1].get('presence', 'optional') == 'required'
+            if member[0] in ['fixr:fieldRef', 'fixr:numInGroup']:
+                allowed.add(member[1]['id'])
+                if member_required:
+                    required.add(member[1]['id'])
+            elif member[0] == 'fixr:componentRef':
+                walk(orch.component(member[1]['id']), member_required)
+            elif member[0] == 'fixr:groupRef':
+                walk(orch.group(member[1]['id']), False)
+
+    walk(OrchestraInstance10.structure(message), True)
+    for (tag, value) in fields:
+        if tag not in allowed:
+            errors.append('Tag %d not allowed' % tag)
+            continue
+        field_type = orch.field(tag)[1]['type']
+        codeset = orch.codeset_by_name(field_type)
+        if codeset:
+            if not all(any(code[1]['value'] == v for code in codeset if isinstance(code, list)) for v in
+                       value.split(' ')):
+                errors.append('Invalid value of %d' % tag)
+            continue
+        while field_type and field_type not in DATATYPE_PATTERNS:
+            datatype = next((d for d in orch.datatypes() if isinstance(d, list) and d[1]['name'] == field_type), None)
+            field_type = datatype[1].get('baseType', None) if datatype else None
+        if field_type and not re.fullmatch(DATATYPE_PATTERNS[field_type], value):
+            errors.append('Invalid value of %d' % tag)
+    errors += ['Missing required %d' % tag for tag in required - set(tag for (tag, _) in fields)]
+    return errors
+
+
+@benchmark
+def validator() -> bool:
+    """ Validation of 20000 orders by a compiled validator, against walking the repository for each """
+    (instance, errors) = Orchestra().read_xml(os.path.join(XML_FILE_DIR, 'OrchestraOrders.xml'))
+    validator = OrchestraValidator(instance)
+    fields = OrchestraValidator.parse(ORDER, '|')
+    assert not validator.validate(fields) and not naive_validate(instance, fields)
+    start = time.perf_counter()
+    for _ in range(20000):
+        validator.validate(fields)
+    compiled = time.perf_counter()
+    for _ in range(20000):
+        naive_validate(instance, fields)
+    naive = time.perf_counter()
+    within = report_rate('validator compiled', 20000, compiled - start, 10000)
+    report_rate('validator naive', 20000, naive - compiled)
+    return report_ratio('validator', compiled - start, naive - compiled, 0.5) and within
+
+
+@benchmark
+def tag_dictionary_load() -> bool:
+    """ Loading of the tag dictionary of OrchestraOrders, with tags from 100 looked up by perfect hash """
+    (instance, errors) = Orchestra().read_xml(os.path.join(XML_FILE_DIR, 'OrchestraOrders.xml'))
+    output_path = os.path.join(output_dir(), 'OrchestraOrders.tags')
+    OrchestraTagExporter().export_file(instance, output_path, direct_size=100)
+    start = time.perf_counter()
+    OrchestraTagDictionary.load(output_path)
+    return report_duration('tag_dictionary_load', time.perf_counter() - start, 0.01)
+
+
+@benchmark
+def codeset_table_columns() -> bool:
+    """ Translation of a column of 300000 codes to names, vectorized against code by code """
+    import numpy as np
+    (instance, errors) = Orchestra().read_xml(os.path.join(XML_FILE_DIR, 'OrchestraOrders.xml'))
+    table = instance.codeset_table('PartyRoleCodeSet')
+    roles = np.tile(np.array([1, 3, 7], dtype=np.uint8), 100000)
+    start = time.perf_counter()
+    names = table.code_names(roles)
+    vectorized = time.perf_counter()
+    assert [table.code_name(role) for role in roles.tolist()] == list(names)
+    return report_ratio('codeset_table_columns', vectorized - start, time.perf_counter() - vectorized, 0.5)
+
+
+def main(names) -> int:
+    # every benchmark runs, even after one exceeds a bound
+    results = [BENCHMARKS[name]() for name in names or BENCHMARKS]
+    return 0 if all(results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,624 @@
+"""
+Codecs for SBE message schema Examples id 91 version 0
+
+Generated by orchestratransposer; do not edit.
+
+Message classes are flyweights over a buffer such as bytes, bytearray, mmap or memoryview. Field accessors decode in
+place, var data is returned as a memoryview slice of the buffer, and the entries of a repeating group are yielded by a
+single flyweight that is repositioned on each iteration, so an entry is only valid until the next one is read.
+
+Usage:
+
+    (name, values, end) = decode(buffer)
+    buffer = encode(name, values)
+    message = wrap(buffer)
+"""
+import struct
+
+SCHEMA_ID = 91
+SCHEMA_VERSION = 0
+
+HEADER = struct.Struct('<HHHH')
+HEADER_BLOCK_LENGTH_INDEX = 0
+HEADER_TEMPLATE_ID_INDEX = 1
+
+_STRUCT_1s = struct.Struct('<1s')
+_STRUCT_8s = struct.Struct('<8s')
+_STRUCT_B = struct.Struct('<B')
+_STRUCT_H = struct.Struct('<H')
+_STRUCT_Q = struct.Struct('<Q')
+_STRUCT_i = struct.Struct('<i')
+_STRUCT_q = struct.Struct('<q')
+
+
+class _Group(object):
+    """ A repeating group over a buffer that yields a reused entry flyweight """
+    __slots__ = ('_buffer', '_offset', '_entry_class', 'block_length', 'count')
+
+    def __init__(self, buffer, offset, entry_class):
+        dimension = entry_class.DIMENSION.unpack_from(buffer, offset)
+        self._buffer = buffer
+        self._offset = offset + entry_class.DIMENSION.size
+        self._entry_class = entry_class
+        self.block_length = dimension[entry_class.BLOCK_LENGTH_INDEX]
+        self.count = dimension[entry_class.NUM_IN_GROUP_INDEX]
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        entry = self._entry_class(self._buffer, self._offset, self.block_length)
+        for i in range(self.count):
+            if i:
+                entry._offset = entry._end()
+            yield entry
+
+
+def _skip_group(buffer, offset, entry_class):
+    dimension = entry_class.DIMENSION.unpack_from(buffer, offset)
+    offset += entry_class.DIMENSION.size
+    block_length = dimension[entry_class.BLOCK_LENGTH_INDEX]
+    count = dimension[entry_class.NUM_IN_GROUP_INDEX]
+    if entry_class.FIXED:
+        return offset + block_length * count
+    entry = entry_class(buffer, offset, block_length)
+    for _ in range(count):
+        entry._offset = entry._end()
+    return entry._offset
+
+
+def _decode_group(buffer, offset, entry_class):
+    dimension = entry_class.DIMENSION.unpack_from(buffer, offset)
+    entry = entry_class(buffer, offset + entry_class.DIMENSION.size, dimension[entry_class.BLOCK_LENGTH_INDEX])
+    entries = []
+    for _ in range(dimension[entry_class.NUM_IN_GROUP_INDEX]):
+        (values, entry._offset) = entry._decode()
+        entries.append(values)
+    return entries, entry._offset
+
+
+def _encode_group(entry_class, entries, parts):
+    dimension = list(entry_class.DIMENSION_VALUES)
+    dimension[entry_class.NUM_IN_GROUP_INDEX] = len(entries)
+    parts.append(entry_class.DIMENSION.pack(*dimension))
+    for values in entries:
+        entry_class._encode(values, parts)
+
+
+def _data(buffer, offset, length_struct):
+    start = offset + length_struct.size
+    return memoryview(buffer)[start:start + length_struct.unpack_from(buffer, offset)[0]]
+
+
+def _skip_data(buffer, offset, length_struct):
+    return offset + length_struct.size + length_struct.unpack_from(buffer, offset)[0]
+
+
+def _decode_data(buffer, offset, length_struct):
+    start = offset + length_struct.size
+    end = start + length_struct.unpack_from(buffer, offset)[0]
+    return bytes(buffer[start:end]), end
+
+
+def _encode_data(length_struct, value, parts):
+    parts.append(length_struct.pack(len(value)))
+    parts.append(bytes(value))
+
+
+def wrap(buffer, offset=0):
+    """ Returns a flyweight over the message that starts with a message header at an offset of a buffer """
+    header = HEADER.unpack_from(buffer, offset)
+    message_class = MESSAGES[header[HEADER_TEMPLATE_ID_INDEX]]
+    return message_class(buffer, offset + HEADER.size, header[HEADER_BLOCK_LENGTH_INDEX])
+
+
+def decode(buffer, offset=0):
+    """ Decodes the message at an offset of a buffer; returns its name, a dictionary of its values and its end """
+    message = wrap(buffer, offset)
+    (values, end) = message._decode()
+    return message.NAME, values, end
+
+
+def encode(name, values):
+    """ Encodes a message with its header from a dictionary of values as returned by decode() """
+    message_class = MESSAGES_BY_NAME[name]
+    parts = [HEADER.pack(*message_class.HEADER_VALUES)]
+    message_class._encode(values, parts)
+    return b''.join(parts)
+
+
+class businessRejectReasonEnum(object):
+    """ Enum businessRejectReasonEnum """
+    Other = 0
+    UnknownID = 1
+    UnknownSecurity = 2
+    ApplicationNotAvailable = 4
+    NotAuthorized = 6
+
+
+class execTypeEnum(object):
+    """ Enum execTypeEnum """
+    New = b'0'
+    DoneForDay = b'3'
+    Canceled = b'4'
+    Replaced = b'5'
+    PendingCancel = b'6'
+    Rejected = b'8'
+    PendingNew = b'A'
+    Trade = b'F'
+
+
+class ordStatusEnum(object):
+    """ Enum ordStatusEnum """
+    New = b'0'
+    PartialFilled = b'1'
+    Filled = b'2'
+    DoneForDay = b'3'
+    Canceled = b'4'
+    PendingCancel = b'6'
+    Rejected = b'8'
+    PendingNew = b'A'
+    PendingReplace = b'E'
+
+
+class ordTypeEnum(object):
+    """ Enum ordTypeEnum """
+    Market = b'1'
+    Limit = b'2'
+    Stop = b'3'
+    StopLimit = b'4'
+
+
+class sideEnum(object):
+    """ Enum sideEnum """
+    Buy = b'1'
+    Sell = b'2'
+
+
+class optionalDecimalEncoding(object):
+    """ Composite optionalDecimalEncoding """
+    __slots__ = ('_buffer', '_offset')
+    SIZE = 8
+    BLOCK = struct.Struct('<q')
+
+    def __init__(self, buffer, offset=0):
+        self._buffer = buffer
+        self._offset = offset
+
+    @property
+    def mantissa(self):
+        return _STRUCT_q.unpack_from(self._buffer, self._offset)[0]
+
+    @mantissa.setter
+    def mantissa(self, value):
+        _STRUCT_q.pack_into(self._buffer, self._offset, value)
+
+    @property
+    def exponent(self):
+        return -3
+
+    def to_dict(self):
+        """ Decodes the composite to a dictionary """
+        v = self.BLOCK.unpack_from(self._buffer, self._offset)
+        return {'mantissa': v[0], 'exponent': -3}
+
+
+class qtyEncoding(object):
+    """ Composite qtyEncoding """
+    __slots__ = ('_buffer', '_offset')
+    SIZE = 4
+    BLOCK = struct.Struct('<i')
+
+    def __init__(self, buffer, offset=0):
+        self._buffer = buffer
+        self._offset = offset
+
+    @property
+    def mantissa(self):
+        return _STRUCT_i.unpack_from(self._buffer, self._offset)[0]
+
+    @mantissa.setter
+    def mantissa(self, value):
+        _STRUCT_i.pack_into(self._buffer, self._offset, value)
+
+    @property
+    def exponent(self):
+        return 0
+
+    def to_dict(self):
+        """ Decodes the composite to a dictionary """
+        v = self.BLOCK.unpack_from(self._buffer, self._offset)
+        return {'mantissa': v[0], 'exponent': 0}
+
+
+class MONTH_YEAR(object):
+    """ Composite MONTH_YEAR """
+    __slots__ = ('_buffer', '_offset')
+    SIZE = 5
+    BLOCK = struct.Struct('<HBBB')
+
+    def __init__(self, buffer, offset=0):
+        self._buffer = buffer
+        self._offset = offset
+
+    @property
+    def year(self):
+        return _STRUCT_H.unpack_from(self._buffer, self._offset)[0]
+
+    @year.setter
+    def year(self, value):
+        _STRUCT_H.pack_into(self._buffer, self._offset, value)
+
+    @property
+    def month(self):
+        return _STRUCT_B.unpack_from(self._buffer, self._offset + 2)[0]
+
+    @month.setter
+    def month(self, value):
+        _STRUCT_B.pack_into(self._buffer, self._offset + 2, value)
+
+    @property
+    def day(self):
+        return _STRUCT_B.unpack_from(self._buffer, self._offset + 3)[0]
+
+    @day.setter
+    def day(self, value):
+        _STRUCT_B.pack_into(self._buffer, self._offset + 3, value)
+
+    @property
+    def week(self):
+        return _STRUCT_B.unpack_from(self._buffer, self._offset + 4)[0]
+
+    @week.setter
+    def week(self, value):
+        _STRUCT_B.pack_into(self._buffer, self._offset + 4, value)
+
+    def to_dict(self):
+        """ Decodes the composite to a dictionary """
+        v = self.BLOCK.unpack_from(self._buffer, self._offset)
+        return {'year': v[0], 'month': v[1], 'day': v[2], 'week': v[3]}
+
+
+class BusinessMessageReject(object):
+    """ Message BusinessMessageReject """
+    __slots__ = ('_buffer', '_offset', '_block_length')
+    NAME = 'BusinessMessageReject'
+    TEMPLATE_ID = 97
+    HEADER_VALUES = [9, 97, 91, 0]
+    BLOCK_LENGTH = 9
+    BLOCK = struct.Struct('<8sB')
+    FIXED = False
+
+    def __init__(self, buffer, offset=0, block_length=BLOCK_LENGTH):
+        self._buffer = buffer
+        self._offset = offset
+        self._block_length = block_length
+
+    @property
+    def BusinesRejectRefId(self):
+        return _STRUCT_8s.unpack_from(self._buffer, self._offset)[0].rstrip(b'\x00')
+
+    @BusinesRejectRefId.setter
+    def BusinesRejectRefId(self, value):
+        _STRUCT_8s.pack_into(self._buffer, self._offset, value)
+
+    @property
+    def BusinessRejectReason(self):
+        return _STRUCT_B.unpack_from(self._buffer, self._offset + 8)[0]
+
+    @BusinessRejectReason.setter
+    def BusinessRejectReason(self, value):
+        _STRUCT_B.pack_into(self._buffer, self._offset + 8, value)
+
+    @property
+    def Text(self):
+        offset = self._offset + self._block_length
+        return _data(self._buffer, offset, _STRUCT_H)
+
+    def _end(self):
+        offset = self._offset + self._block_length
+        offset = _skip_data(self._buffer, offset, _STRUCT_H)
+        return offset
+
+    def to_dict(self):
+        """ Decodes the message to a dictionary """
+        return self._decode()[0]
+
+    def _decode(self):
+        v = self.BLOCK.unpack_from(self._buffer, self._offset)
+        values = {'BusinesRejectRefId': v[0].rstrip(b'\x00'), 'BusinessRejectReason': v[1]}
+        offset = self._offset + self._block_length
+        (values['Text'], offset) = _decode_data(self._buffer, offset, _STRUCT_H)
+        return values, offset
+
+    @classmethod
+    def encode(cls, values):
+        """ Encodes the message from a dictionary of values """
+        parts = []
+        cls._encode(values, parts)
+        return b''.join(parts)
+
+    @classmethod
+    def _encode(cls, values, parts):
+        parts.append(cls.BLOCK.pack(values['BusinesRejectRefId'], values['BusinessRejectReason']))
+        _encode_data(_STRUCT_H, values['Text'], parts)
+
+
+class ExecutionReport_FillsGrp(object):
+    """ Group entry FillsGrp """
+    __slots__ = ('_buffer', '_offset', '_block_length')
+    NAME = 'FillsGrp'
+    DIMENSION = struct.Struct('<HH')
+    DIMENSION_VALUES = [12, 0]
+    BLOCK_LENGTH_INDEX = 0
+    NUM_IN_GROUP_INDEX = 1
+    BLOCK_LENGTH = 12
+    BLOCK = struct.Struct('<qi')
+    FIXED = True
+
+    def __init__(self, buffer, offset=0, block_length=BLOCK_LENGTH):
+        self._buffer = buffer
+        self._offset = offset
+        self._block_length = block_length
+
+    @property
+    def FillPx(self):
+        return optionalDecimalEncoding(self._buffer, self._offset)
+
+    @property
+    def FillQty(self):
+        return qtyEncoding(self._buffer, self._offset + 8)
+
+    def _end(self):
+        offset = self._offset + self._block_length
+        return offset
+
+    def to_dict(self):
+        """ Decodes the group entry to a dictionary """
+        return self._decode()[0]
+
+    def _decode(self):
+        v = self.BLOCK.unpack_from(self._buffer, self._offset)
+        values = {'FillPx': {'mantissa': v[0], 'exponent': -3}, 'FillQty': {'mantissa': v[1], 'exponent': 0}}
+        return values, self._offset + self._block_length
+
+    @classmethod
+    def encode(cls, values):
+        """ Encodes the group entry from a dictionary of values """
+        parts = []
+        cls._encode(values, parts)
+        return b''.join(parts)
+
+    @classmethod
+    def _encode(cls, values, parts):
+        parts.append(cls.BLOCK.pack(values['FillPx']['mantissa'], values['FillQty']['mantissa']))
+
+
+class ExecutionReport(object):
+    """ Message ExecutionReport """
+    __slots__ = ('_buffer', '_offset', '_block_length')
+    NAME = 'ExecutionReport'
+    TEMPLATE_ID = 98
+    HEADER_VALUES = [42, 98, 91, 0]
+    BLOCK_LENGTH = 42
+    BLOCK = struct.Struct('<8s8s1s1s8sHBBB1siiH')
+    FIXED = False
+
+    def __init__(self, buffer, offset=0, block_length=BLOCK_LENGTH):
+        self._buffer = buffer
+        self._offset = offset
+        self._block_length = block_length
+
+    @property
+    def OrderID(self):
+        return _STRUCT_8s.unpack_from(self._buffer, self._offset)[0].rstrip(b'\x00')
+
+    @OrderID.setter
+    def OrderID(self, value):
+        _STRUCT_8s.pack_into(self._buffer, self._offset, value)
+
+    @property
+    def ExecID(self):
+        return _STRUCT_8s.unpack_from(self._buffer, self._offset + 8)[0].rstrip(b'\x00')
+
+    @ExecID.setter
+    def ExecID(self, value):
+        _STRUCT_8s.pack_into(self._buffer, self._offset + 8, value)
+
+    @property
+    def ExecType(self):
+        return _STRUCT_1s.unpack_from(self._buffer, self._offset + 16)[0].rstrip(b'\x00')
+
+    @ExecType.setter
+    def ExecType(self, value):
+        _STRUCT_1s.pack_into(self._buffer, self._offset + 16, value)
+
+    @property
+    def OrdStatus(self):
+        return _STRUCT_1s.unpack_from(self._buffer, self._offset + 17)[0].rstrip(b'\x00')
+
+    @OrdStatus.setter
+    def OrdStatus(self, value):
+        _STRUCT_1s.pack_into(self._buffer, self._offset + 17, value)
+
+    @property
+    def Symbol(self):
+        return _STRUCT_8s.unpack_from(self._buffer, self._offset + 18)[0].rstrip(b'\x00')
+
+    @Symbol.setter
+    def Symbol(self, value):
+        _STRUCT_8s.pack_into(self._buffer, self._offset + 18, value)
+
+    @property
+    def MaturityMonthYear(self):
+        return MONTH_YEAR(self._buffer, self._offset + 26)
+
+    @property
+    def Side(self):
+        return _STRUCT_1s.unpack_from(self._buffer, self._offset + 31)[0].rstrip(b'\x00')
+
+    @Side.setter
+    def Side(self, value):
+        _STRUCT_1s.pack_into(self._buffer, self._offset + 31, value)
+
+    @property
+    def LeavesQty(self):
+        return qtyEncoding(self._buffer, self._offset + 32)
+
+    @property
+    def CumQty(self):
+        return qtyEncoding(self._buffer, self._offset + 36)
+
+    @property
+    def TradeDate(self):
+        return _STRUCT_H.unpack_from(self._buffer, self._offset + 40)[0]
+
+    @TradeDate.setter
+    def TradeDate(self, value):
+        _STRUCT_H.pack_into(self._buffer, self._offset + 40, value)
+
+    @property
+    def FillsGrp(self):
+        offset = self._offset + self._block_length
+        return _Group(self._buffer, offset, ExecutionReport_FillsGrp)
+
+    def _end(self):
+        offset = self._offset + self._block_length
+        offset = _skip_group(self._buffer, offset, ExecutionReport_FillsGrp)
+        return offset
+
+    def to_dict(self):
+        """ Decodes the message to a dictionary """
+        return self._decode()[0]
+
+    def _decode(self):
+        v = self.BLOCK.unpack_from(self._buffer, self._offset)
+        values = {'OrderID': v[0].rstrip(b'\x00'), 'ExecID': v[1].rstrip(b'\x00'), 'ExecType': v[2].rstrip(b'\x00'), 'OrdStatus': v[3].rstrip(b'\x00'), 'Symbol': v[4].rstrip(b'\x00'), 'MaturityMonthYear': {'year': v[5], 'month': v[6], 'day': v[7], 'week': v[8]}, 'Side': v[9].rstrip(b'\x00'), 'LeavesQty': {'mantissa': v[10], 'exponent': 0}, 'CumQty': {'mantissa': v[11], 'exponent': 0}, 'TradeDate': v[12]}
+        offset = self._offset + self._block_length
+        (values['FillsGrp'], offset) = _decode_group(self._buffer, offset, ExecutionReport_FillsGrp)
+        return values, offset
+
+    @classmethod
+    def encode(cls, values):
+        """ Encodes the message from a dictionary of values """
+        parts = []
+        cls._encode(values, parts)
+        return b''.join(parts)
+
+    @classmethod
+    def _encode(cls, values, parts):
+        parts.append(cls.BLOCK.pack(values['OrderID'], values['ExecID'], values['ExecType'], values['OrdStatus'], values['Symbol'], values['MaturityMonthYear']['year'], values['MaturityMonthYear']['month'], values['MaturityMonthYear']['day'], values['MaturityMonthYear']['week'], values['Side'], values['LeavesQty']['mantissa'], values['CumQty']['mantissa'], values['TradeDate']))
+        _encode_group(ExecutionReport_FillsGrp, values['FillsGrp'], parts)
+
+
+class NewOrderSingle(object):
+    """ Message NewOrderSingle """
+    __slots__ = ('_buffer', '_offset', '_block_length')
+    NAME = 'NewOrderSingle'
+    TEMPLATE_ID = 99
+    HEADER_VALUES = [54, 99, 91, 0]
+    BLOCK_LENGTH = 54
+    BLOCK = struct.Struct('<8s8s8s1sQi1sqq')
+    FIXED = True
+
+    def __init__(self, buffer, offset=0, block_length=BLOCK_LENGTH):
+        self._buffer = buffer
+        self._offset = offset
+        self._block_length = block_length
+
+    @property
+    def ClOrdId(self):
+        return _STRUCT_8s.unpack_from(self._buffer, self._offset)[0].rstrip(b'\x00')
+
+    @ClOrdId.setter
+    def ClOrdId(self, value):
+        _STRUCT_8s.pack_into(self._buffer, self._offset, value)
+
+    @property
+    def Account(self):
+        return _STRUCT_8s.unpack_from(self._buffer, self._offset + 8)[0].rstrip(b'\x00')
+
+    @Account.setter
+    def Account(self, value):
+        _STRUCT_8s.pack_into(self._buffer, self._offset + 8, value)
+
+    @property
+    def Symbol(self):
+        return _STRUCT_8s.unpack_from(self._buffer, self._offset + 16)[0].rstrip(b'\x00')
+
+    @Symbol.setter
+    def Symbol(self, value):
+        _STRUCT_8s.pack_into(self._buffer, self._offset + 16, value)
+
+    @property
+    def Side(self):
+        return _STRUCT_1s.unpack_from(self._buffer, self._offset + 24)[0].rstrip(b'\x00')
+
+    @Side.setter
+    def Side(self, value):
+        _STRUCT_1s.pack_into(self._buffer, self._offset + 24, value)
+
+    @property
+    def TransactTime(self):
+        return _STRUCT_Q.unpack_from(self._buffer, self._offset + 25)[0]
+
+    @TransactTime.setter
+    def TransactTime(self, value):
+        _STRUCT_Q.pack_into(self._buffer, self._offset + 25, value)
+
+    @property
+    def OrderQty(self):
+        return qtyEncoding(self._buffer, self._offset + 33)
+
+    @property
+    def OrdType(self):
+        return _STRUCT_1s.unpack_from(self._buffer, self._offset + 37)[0].rstrip(b'\x00')
+
+    @OrdType.setter
+    def OrdType(self, value):
+        _STRUCT_1s.pack_into(self._buffer, self._offset + 37, value)
+
+    @property
+    def Price(self):
+        return optionalDecimalEncoding(self._buffer, self._offset + 38)
+
+    @property
+    def StopPx(self):
+        return optionalDecimalEncoding(self._buffer, self._offset + 46)
+
+    def _end(self):
+        offset = self._offset + self._block_length
+        return offset
+
+    def to_dict(self):
+        """ Decodes the message to a dictionary """
+        return self._decode()[0]
+
+    def _decode(self):
+        v = self.BLOCK.unpack_from(self._buffer, self._offset)
+        values = {'ClOrdId': v[0].rstrip(b'\x00'), 'Account': v[1].rstrip(b'\x00'), 'Symbol': v[2].rstrip(b'\x00'), 'Side': v[3].rstrip(b'\x00'), 'TransactTime': v[4], 'OrderQty': {'mantissa': v[5], 'exponent': 0}, 'OrdType': v[6].rstrip(b'\x00'), 'Price': {'mantissa': v[7], 'exponent': -3}, 'StopPx': {'mantissa': v[8], 'exponent': -3}}
+        return values, self._offset + self._block_length
+
+    @classmethod
+    def encode(cls, values):
+        """ Encodes the message from a dictionary of values """
+        parts = []
+        cls._encode(values, parts)
+        return b''.join(parts)
+
+    @classmethod
+    def _encode(cls, values, parts):
+        parts.append(cls.BLOCK.pack(values['ClOrdId'], values['Account'], values['Symbol'], values['Side'], values['TransactTime'], values['OrderQty']['mantissa'], values['OrdType'], values['Price']['mantissa'], values['StopPx']['mantissa']))
+
+
+MESSAGES = {
+    97: BusinessMessageReject,
+    98: ExecutionReport,
+    99: NewOrderSingle,
+}
+
+MESSAGES_BY_NAME = {
+    'BusinessMessageReject': BusinessMessageReject,
+    'ExecutionReport': ExecutionReport,
+    'NewOrderSingle': NewOrderSingle,
+}
@@ -0,0 +1,66 @@
+import io
+import os
+import time
+
+import pytest
+
+from orchestratransposer import Orchestra
+from orchestratransposer.compactcodec import CompactCodec
+from orchestratransposer.sbe import SBE
+from orchestratransposer.sbe.sbe import SBE20
+from orchestratransposer.unified.unified import UnifiedPhrases
+
+XML_FILE_DIR = os.path.join(os.path.dirname(__file__), 'xml/')
+
+
+def output_dir():
+    path = os.path.join(os.path.dirname(__file__), 'out/')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def roundtrip(reader, xml_name: str, output_name: str, formats):
+    xml_path = os.path.join(XML_FILE_DIR, xml_name)
+    start = time.perf_counter()
+    (instance, errors) = reader.read_xml(xml_path)
+    decoded = time.perf_counter()
+    assert not errors
+    codec = CompactCodec()
+    expected = io.BytesIO()
+    reader.write_xml(instance, expected)
+    for fmt in formats:
+        output_path = os.path.join(output_dir(), output_name + '.' + fmt)
+        with open(output_path, 'wb') as f:
+            getattr(codec, 'dump_' + fmt)(instance, f)
+        with open(output_path, 'rb') as f:
+            load_start = time.perf_counter()
+            imported = getattr(codec, 'load_' + fmt)(f)
+            loaded = time.perf_counter()
+        assert loaded - load_start < decoded - start
+        assert type(imported) is type(instance)
+        root = 'phrases_root' if hasattr(instance, 'phrases_root') else 'root'
+        assert getattr(imported, root)() == getattr(instance, root)()
+        actual = io.BytesIO()
+        reader.write_xml(imported, actual)
+        assert actual.getvalue() == expected.getvalue()
+        assert os.path.getsize(output_path) < os.path.getsize(xml_path)
+
+
+def test_compact_json():
+    roundtrip(Orchestra(), 'OrchestraOrders.xml', 'OrchestraOrders-compact', ['json'])
+    roundtrip(SBE(), 'Examples.xml', 'Examples-compact', ['json'])
+    roundtrip(SBE20(), 'Examples20.xml', 'Examples20-compact', ['json'])
+    roundtrip(UnifiedPhrases(), 'FIX.Latest_EP269_en_phrases.xml', 'Phrases-compact', ['json'])
+
+
+def test_compact_msgpack():
+    pytest.importorskip('msgpack')
+    roundtrip(Orchestra(), 'OrchestraOrders.xml', 'OrchestraOrders-compact', ['msgpack'])
+    roundtrip(SBE20(), 'Examples20.xml', 'Examples20-compact', ['msgpack'])
+
+
+def test_compact_invalid():
+    with pytest.raises(ValueError):
+        CompactCodec().load_json(io.BytesIO(b'["fixr:repository", {}]'))
+    with pytest.raises(TypeError):
+        CompactCodec().dump_json(object(), io.BytesIO())
@@ -0,0 +1,86 @@
+import json
+import os
+import shutil
+
+from orchestratransposer.conversions import BatchConverter, convert
+from orchestratransposer.sbe.sbe import SBE10, SBE20
+
+XML_FILE_DIR = os.path.join(os.path.dirname(__file__), 'xml/')
+
+
+def output_dir():
+    path = os.path.join(os.path.dirname(__file__), 'out/')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def test_batch_converter():
+    batch_dir = os.path.join(output_dir(), 'batch/')
+    shutil.rmtree(batch_dir, ignore_errors=True)
+    os.makedirs(os.path.join(batch_dir, 'venues'))
+    for name in ['a.xml', 'b.xml']:
+        shutil.copy(os.path.join(XML_FILE_DIR, 'Examples.xml'), os.path.join(batch_dir, 'venues', name))
+    manifest_path = os.path.join(batch_dir, 'manifest.json')
+    with open(manifest_path, 'w') as f:
+        json.dump([{'from': 'sbe', 'to': 'orch', 'input': 'venues/*.xml', 'output': '{stem}-orch.xml'},
+                   {'from': 'orch', 'to': 'jsonl',
+                    'input': os.path.abspath(os.path.join(XML_FILE_DIR, 'OrchestraOrders.xml')),
+                    'output': 'OrchestraOrders.jsonl'},
+                   {'from': 'sbe', 'to': 'jsonl', 'input': 'venues/a.xml', 'output': 'a.jsonl'},
+                   {'from': 'unif', 'to': 'orch',
+                    'input': [os.path.abspath(os.path.join(XML_FILE_DIR, 'FixRepositorySides.xml')),
+                              os.path.abspath(os.path.join(XML_FILE_DIR, 'FIX.Latest_EP269_en_phrases.xml'))],
+                    'output': 'sides.xml', 'deduplicate_codesets': True}], f)
+    batch = BatchConverter()
+    jobs = batch.read_manifest(manifest_path)
+    assert [job['output'] for job in jobs] == [[os.path.join(batch_dir, 'a-orch.xml')],
+                                               [os.path.join(batch_dir, 'b-orch.xml')],
+                                               [os.path.join(batch_dir, 'OrchestraOrders.jsonl')],
+                                               [os.path.join(batch_dir, 'a.jsonl')],
+                                               [os.path.join(batch_dir, 'sides.xml')]]
+    assert jobs[4]['deduplicate_codesets']
+    results = batch.run(jobs, workers=1)
+    assert [result['errors'] for result in results] == [0, 0, 0, 1, 0]
+    assert all(os.path.getsize(path) > 0 for job in jobs[:3] for path in job['output'])
+    assert os.path.exists(os.path.join(batch_dir, 'a-orch.log'))
+    assert results[3]['log'] is None
+
+
+def test_batch_converter_missing_dir():
+    batch = BatchConverter()
+    jobs = [{'from': 'sbe', 'to': 'orch', 'input': [os.path.join(XML_FILE_DIR, 'Examples.xml')],
+             'output': [os.path.join(output_dir(), 'missing/Examples-orch.xml')]},
+            {'from': 'orch', 'to': 'jsonl', 'input': [os.path.join(XML_FILE_DIR, 'OrchestraOrders.xml')],
+             'output': [os.path.join(output_dir(), 'OrchestraOrders-batch.jsonl')]}]
+    for workers in [1, 2]:
+        results = batch.run(jobs, workers=workers)
+        assert results[0]['errors'] == 1 and results[0]['log'] is None and 'missing' in results[0]['messages'][0]
+        assert results[1]['errors'] == 0 and os.path.getsize(jobs[1]['output'][0]) > 0
+
+
+def test_convert_orchestra2sbe20():
+    output_path = os.path.join(output_dir(), 'Examples20-convert.xml')
+    if os.path.exists(output_path):
+        os.remove(output_path)
+    errors = convert('orch', 'sbe2', [os.path.join(XML_FILE_DIR, 'Examples202Orchestra.xml')], [output_path])
+    assert not errors
+    (instance, errors) = SBE20().read_xml(output_path)
+    assert not errors
+    with open(output_path) as f:
+        content = f.read()
+    assert all(f'name="{name}"' in content for name in ['NewOrderSingle', 'ExecutionReport', 'BusinessMessageReject'])
+
+
+def test_convert_read():
+    xml_path = os.path.join(XML_FILE_DIR, 'Examples.xml')
+    output_path = os.path.join(output_dir(), 'Examples-convert-read.xml')
+    read = []
+
+    def read_sbe(reader_class, path):
+        read.append((reader_class, path))
+        return reader_class().read_xml(path)
+
+    errors = convert('sbe', 'orch', [xml_path], [output_path], read=read_sbe)
+    assert not errors
+    assert read == [(SBE10, xml_path)]
+    assert os.path.getsize(output_path) > 0
@@ -0,0 +1,69 @@
+import os
+import shutil
+import tempfile
+import threading
+
+from orchestratransposer.daemon import ConversionDaemon, InstanceCache
+from orchestratransposer.daemonclient import ConversionClient
+from orchestratransposer.sbe.sbe import SBE10
+
+XML_FILE_DIR = os.path.join(os.path.dirname(__file__), 'xml/')
+
+
+def output_dir():
+    path = os.path.join(os.path.dirname(__file__), 'out/')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def test_instance_cache():
+    xml_path = os.path.join(output_dir(), 'Examples-cache.xml')
+    shutil.copy(os.path.join(XML_FILE_DIR, 'Examples.xml'), xml_path)
+    cache = InstanceCache(2)
+    (first, errors) = cache.read(SBE10, xml_path)
+    assert not errors
+    (second, errors) = cache.read(SBE10, xml_path)
+    assert (cache.hits, cache.misses) == (1, 1)
+    # each read returns a copy
+    assert second.root() == first.root() and second.root() is not first.root()
+    second.root().append(['extra'])
+    (third, errors) = cache.read(SBE10, xml_path)
+    assert third.root() == first.root()
+    stat = os.stat(xml_path)
+    os.utime(xml_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000))
+    cache.read(SBE10, xml_path)
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_conversion_daemon():
+    socket_path = os.path.join(tempfile.mkdtemp(), 'orchestratransposer.sock')
+    daemon = ConversionDaemon(socket_path, workers=1)
+    thread = threading.Thread(target=daemon.serve)
+    thread.start()
+    assert daemon.ready.wait(60)
+    xml_path = os.path.join(XML_FILE_DIR, 'Examples.xml')
+    output_path = os.path.join(output_dir(), 'Examples-daemon.xml')
+    try:
+        with ConversionClient(socket_path, timeout=60) as client:
+            for _ in range(2):
+                events = list(client.convert('sbe', 'orch', [xml_path], [output_path]))
+                assert events[-1]['result']['errors'] == 0
+                assert os.path.exists(events[-1]['result']['log'])
+            assert os.path.getsize(output_path) > 0
+            events = list(client.convert('sbe', 'jsonl', [xml_path], [output_path]))
+            assert events[-1]['result']['errors'] == 1
+            assert events[-1]['result']['log'] is None
+            events = list(client.convert('orch', 'sbe', [os.path.join(XML_FILE_DIR, 'Examples2Orchestra.xml')],
+                                         [os.path.join(output_dir(), 'Examples-daemon-sbe.xml')], narrow_enums=True))
+            assert [event['output'] for event in events[:-1]] == ['0 bytes saved by narrowed enums']
+            # a conversion that fails is answered, and the connection stays open
+            events = list(client.convert('sbe', 'orch', [xml_path], [os.path.join(output_dir(), 'missing/x.xml')]))
+            assert events[-1]['result']['errors'] == 1 and events[-1]['result']['log'] is None
+            events = list(client.convert('sbe', 'orch', [xml_path], [output_path]))
+            assert events[-1]['result']['errors'] == 0
+            list(client.stop())
+    finally:
+        daemon.stop()
+        thread.join(60)
+    assert not thread.is_alive()
+    assert not os.path.exists(socket_path)
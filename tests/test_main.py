@@ -38,3 +38,17 @@ def test_main_no_arguments():
 def test_main_help():
     # Run the main function without any arguments
     result = subprocess.run(["python", "-m", "orchestratransposer", "-h"], capture_output=False)
+
+
+def test_main_messages():
+    input_file = str(Path(__file__).parent / 'xml' / 'Examples2Orchestra.xml')
+    with tempfile.TemporaryDirectory() as output_dir:
+        output_file = os.path.join(output_dir, 'orders.xml')
+        # -m takes one selector, so that the input that follows it is not taken for a selector
+        result = subprocess.run(["python", "-m", "orchestratransposer", '-t', 'sbe', '-m', 'NewOrderSingle',
+                                 '-m', 'ExecutionReport', input_file, '-o', output_file])
+        assert result.returncode == 0
+        with open(output_file) as f:
+            content = f.read()
+        assert 'name="NewOrderSingle"' in content and 'name="ExecutionReport"' in content
+        assert 'name="BusinessMessageReject"' not in content
@@ -1,8 +1,13 @@
 import os
 from typing import List, Tuple
 
+import pytest
+
 from orchestratransposer import Orchestra
 from orchestratransposer.orchestra.orchestrainstance import OrchestraInstance10
+from orchestratransposer.orchestra.orchestraquery import OrchestraQuery
+from orchestratransposer.orchestra.orchestratags import OrchestraTagDictionary, OrchestraTagExporter
+from orchestratransposer.orchestra.orchestravalidator import OrchestraValidator
 
 XML_FILE_DIR = os.path.join(os.path.dirname(__file__), 'xml/')
 
@@ -66,3 +71,141 @@ def test_documentation():
     documentation: List[Tuple[str, str]] = OrchestraInstance10.documentation(code)
     assert documentation
 
+
+
+def test_lookup_after_append():
+    instance = OrchestraInstance10()
+    instance.fields().append(['fixr:field', {'id': 1, 'name': 'Account', 'type': 'String'}])
+    assert instance.field(1)
+    assert instance.field_by_name('account')
+    instance.fields().append(['fixr:field', {'id': 2, 'name': 'AdvId', 'type': 'String'}])
+    assert instance.field(2)[1]['name'] == 'AdvId'
+    assert not instance.field(3)
+    instance.fields().pop()
+    assert not instance.field(2)
+
+
+def test_lookup_after_change_in_place():
+    instance = OrchestraInstance10()
+    instance.fields().append(['fixr:field', {'id': 1, 'name': 'Account', 'type': 'String'}])
+    assert instance.field(1) and instance.field_by_name('Account')
+    # the former key of a renamed or re-identified element is detected
+    instance.field(1)[1].update({'id': 11, 'name': 'AccountType'})
+    assert not instance.field(1) and not instance.field_by_name('Account')
+    assert instance.field(11)[1]['name'] == 'AccountType'
+    # other changes in place require invalidate()
+    instance.fields().pop()
+    instance.fields().append(['fixr:field', {'id': 2, 'name': 'AdvId', 'type': 'String'}])
+    instance.invalidate()
+    assert not instance.field(11) and instance.field_by_name('AdvId')
+    instance.codesets().append(['fixr:codeSet', {'name': 'SideCodeSet', 'id': 54, 'type': 'char'},
+                                ['fixr:code', {'name': 'Buy', 'id': 54001, 'value': '1'}]])
+    assert instance.codeset_table('SideCodeSet').code_name('1') == 'Buy'
+    instance.codeset_by_name('SideCodeSet')[2][1]['name'] = 'Purchase'
+    instance.invalidate()
+    assert instance.codeset_table('SideCodeSet').code_name('1') == 'Purchase'
+
+
+ORDER = '8=FIX.4.4|9=100|35=D|49=A|56=B|34=1|52=20240101-12:00:00.000|11=X1|453=2|448=P1|447=D|452=1|802=1|523=S|' \
+        '803=2|448=P2|447=N|452=3|18=1 2|55=IBM|54=1|60=20240101-12:00:00|38=100|40=2|44=10.5|10=000|'
+
+
+def test_validator():
+    (instance, errors) = Orchestra().read_xml(os.path.join(XML_FILE_DIR, 'OrchestraOrders.xml'))
+    assert not errors
+    validator = OrchestraValidator(instance)
+    rules = validator.message_rules['D']
+    assert 60 in rules.required and 38 not in rules.required
+    assert rules.groups[453].delimiter == 448
+    assert rules.groups[453].groups[802].delimiter == 523
+    assert not validator.validate_message(ORDER, '|')
+    errors = validator.validate_message(ORDER.replace('54=1', '54=7').replace('|60=20240101-12:00:00', '')
+                                        .replace('453=2', '453=3').replace('18=1 2', '18=1 9') + '999=1|', '|')
+    messages = [str(error) for error in errors]
+    assert "Invalid value '7' of Side(54)" in messages
+    assert "Invalid value '1 9' of ExecInst(18)" in messages
+    assert 'Missing required TransactTime(60) in NewOrderSingle' in messages
+    assert 'Group Parties has 2 entries but NumInGroup is 3' in messages
+    assert 'Undefined tag 999' in messages
+    errors = validator.validate_message(ORDER.replace('|453=2|448=P1|447=D', '|453=2|447=D|448=P1'), '|')
+    assert [str(error) for error in errors] == ['Group Parties does not start with delimiter 448']
+    assert validator.validate_message(ORDER.replace('35=D', '35=ZZ'), '|')
+
+
+def test_tag_dictionary():
+    (instance, errors) = Orchestra().read_xml(os.path.join(XML_FILE_DIR, 'OrchestraOrders.xml'))
+    output_path = os.path.join(output_dir(), 'OrchestraOrders.tags')
+    # tags from 100 are looked up by perfect hash
+    OrchestraTagExporter().export_file(instance, output_path, direct_size=100)
+    tags = OrchestraTagDictionary.load(output_path)
+    fields = [field for field in instance.fields() if isinstance(field, list) and len(field) > 1]
+    assert len(tags) == len(fields)
+    for field in fields:
+        assert tags.name(field[1]['id']) == field[1]['name']
+        assert tags.field_type(field[1]['id']) == field[1]['type']
+    assert tags.name(999) is None and 999 not in tags and 453 in tags
+    assert tags.datatype(452) == 'int' and tags.codeset(452) == 'PartyRoleCodeSet'
+    assert tags.code_name(452, '3') == 'ClientID' and tags.code_name(452, '9') is None
+    assert tags.base_type(38) == 'float' and tags.base_type(453) == 'int'
+    assert tags.codeset(38) is None and tags.codes(38) == {}
+    sparse = OrchestraInstance10()
+    for tag in range(5000, 400000, 97):
+        sparse.fields().append(['fixr:field', {'id': tag, 'name': 'Field%d' % tag, 'type': 'int'}])
+    tags = OrchestraTagExporter().export_dict(sparse)
+    assert all(tags.name(tag) == 'Field%d' % tag for tag in range(5000, 400000, 97))
+    assert not any(tag in tags for tag in range(5001, 400000, 97))
+
+
+def test_codeset_table():
+    (instance, errors) = Orchestra().read_xml(os.path.join(XML_FILE_DIR, 'OrchestraOrders.xml'))
+    table = instance.codeset_table('SideCodeSet')
+    assert instance.codeset_table('SideCodeSet') is table
+    assert table.code_name('2') == 'Sell' and table.code_name(b'1') == 'Buy' and table.code_name(2) == 'Sell'
+    assert table.code_value('Buy') == '1' and table.code_name('9') is None
+    assert table.code('1')[1]['id'] == 54001
+    assert table.code_names(['1', '2', '3']) == ['Buy', 'Sell', None]
+    assert table.code_values(['Sell', 'Short']) == ['2', None]
+    source = instance.codeset_table('PartyIDSourceCodeSet')
+    assert source.int_names is None and source.code_name(ord('N')) == 'LegalEntityIdentifier'
+    instance.codeset_by_name('SideCodeSet').append(['fixr:code', {'name': 'SellShort', 'id': 54005, 'value': '5'}])
+    assert instance.codeset_table('SideCodeSet').code_name('5') == 'SellShort'
+    translated = instance.translate_columns({'Side': ['1', '5'], 'Parties.PartyRole': [3], 'Price': [10.5]})
+    assert translated == {'Side': ['Buy', 'SellShort'], 'Parties.PartyRole': ['ClientID'], 'Price': [10.5]}
+
+
+def test_codeset_table_columns():
+    np = pytest.importorskip('numpy')
+    (instance, errors) = Orchestra().read_xml(os.path.join(XML_FILE_DIR, 'OrchestraOrders.xml'))
+    table = instance.codeset_table('PartyRoleCodeSet')
+    roles = np.tile(np.array([1, 3, 7], dtype=np.uint8), 100000)
+    names = table.code_names(roles)
+    assert [table.code_name(role) for role in roles.tolist()] == list(names)
+    assert list(names[:3]) == ['ExecutingFirm', 'ClientID', None]
+    sides = instance.codeset_table('SideCodeSet').code_names(np.array([b'2', b'1', b'X'], dtype='S1'))
+    assert list(sides) == ['Sell', 'Buy', None]
+
+
+def test_query():
+    (instance, errors) = Orchestra().read_xml(os.path.join(XML_FILE_DIR, 'OrchestraOrders.xml'))
+    instance.categories().append(['fixr:category', {'name': 'SingleGeneralOrderHandling', 'section': 'Trade'}])
+    instance.messages()[1][1]['category'] = 'SingleGeneralOrderHandling'
+    instance.messages()[2][1].update({'category': 'SingleGeneralOrderHandling', 'updatedEP': 269})
+    instance.codeset_by_name('SideCodeSet').append(['fixr:code', {'name': 'SellShort', 'id': 54005, 'value': '5',
+                                                                  'addedEP': 269}])
+    query = OrchestraQuery(instance)
+    assert [f[1]['name'] for f in query.select(kind='field', type='Qty')] == ['CumQty', 'OrderQty', 'LeavesQty']
+    assert [f[1]['name'] for f in query.select(kind='field', type=['Price', 'Currency'])] == ['AvgPx', 'Currency',
+                                                                                           'Price']
+    assert len(query.select(kind='message', section='Trade')) == 2
+    assert query.select(kind='message', msgType='D', category='SingleGeneralOrderHandling')[0][1]['name'] == \
+           'NewOrderSingle'
+    assert [e[1]['name'] for e in query.changed_in(269)] == ['SellShort', 'NewOrderSingle']
+    assert [g[1]['name'] for g in query.select(kind='group', contains_group=2019)] == ['Parties']
+    assert query.select(kind='message', contains_field=448) == []
+    assert [m[1]['name'] for m in query.select(kind='message', contains_field=448, transitive=True)] == \
+           ['ExecutionReport', 'NewOrderSingle']
+    assert [c[1]['name'] for c in query.select(contains_field=35)] == ['StandardHeader']
+    assert len(query.select(kind='code', value='1')) == 4
+    assert query.select(kind='field', type='Qty', name='Price') == []
+    with pytest.raises(KeyError):
+        query.keys(lengthId=1)
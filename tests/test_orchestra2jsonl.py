@@ -0,0 +1,54 @@
+import io
+import json
+import os
+
+import pytest
+
+from orchestratransposer import Orchestra
+from orchestratransposer.orchestra2jsonl import Orchestra2JSONL
+
+XML_FILE_DIR = os.path.join(os.path.dirname(__file__), 'xml/')
+
+
+def output_dir():
+    path = os.path.join(os.path.dirname(__file__), 'out/')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def test_orchestra2jsonl_xml():
+    xml_path = os.path.join(XML_FILE_DIR, 'OrchestraOrders.xml')
+    output_path = os.path.join(output_dir(), 'OrchestraOrders.jsonl')
+    translator = Orchestra2JSONL()
+    with open(output_path, 'wb') as f:
+        errors = translator.orch2jsonl_xml(xml_path, f)
+    assert not errors
+    with open(output_path, 'rb') as f:
+        records = [json.loads(line) for line in f]
+    assert len(records) == 13 + 6 + 13 + 30 + 4 + 2 + 2
+    code = next(record for record in records if record['kind'] == 'code' and record['name'] == 'Sell')
+    assert code['codeSet'] == 'SideCodeSet' and code['codeSetId'] == 54 and code['value'] == '2'
+    message = next(record for record in records if record['kind'] == 'message' and record['msgType'] == 'D')
+    parties = next(member for member in message['members'] if member['name'] == 'Parties')
+    assert parties['kind'] == 'group' and parties['numInGroup'] == {'id': 453, 'name': 'NoPartyIDs'}
+    assert [member['name'] for member in parties['members']] == ['PartyID', 'PartyIDSource', 'PartyRole',
+                                                                 'PtysSubGrp']
+    assert parties['members'][3]['members'][0] == {'kind': 'field', 'id': 523, 'name': 'PartySubID',
+                                                   'type': 'String', 'presence': 'optional'}
+
+
+def test_orchestra2jsonl_records():
+    xml_path = os.path.join(XML_FILE_DIR, 'OrchestraOrders.xml')
+    (orch_instance, errors) = Orchestra().read_xml(xml_path)
+    orch_instance.fields()[1].append(['fixr:annotation', ['fixr:documentation', {'purpose': 'SYNOPSIS'},
+                                                          'Calculated average price']])
+    translator = Orchestra2JSONL()
+    records = translator.records(orch_instance, kinds=['field'])
+    assert next(records) == {'kind': 'field', 'id': 6, 'name': 'AvgPx', 'type': 'Price', 'documentation': [
+        {'purpose': 'SYNOPSIS', 'text': 'Calculated average price'}]}
+    assert sum(1 for _ in records) == 29
+    stream = io.BytesIO()
+    assert translator.orch2jsonl_dict(orch_instance, stream, kinds=['message']) == 2
+    assert stream.getvalue().count(b'\n') == 2
+    with pytest.raises(ValueError):
+        next(translator.records(orch_instance, kinds=['enum']))
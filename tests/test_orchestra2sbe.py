@@ -49,3 +49,110 @@ def test_orchestra2sbe20_dict():
     with open(output_path, 'w') as f:
         print(str(sbe_instance), file=f)
 
+
+def test_orchestra2sbe_memoize():
+    xml_path = os.path.join(XML_FILE_DIR, 'Examples2Orchestra.xml')
+    orchestra = Orchestra()
+    (orch_instance, errors) = orchestra.read_xml(xml_path)
+    for components_to_datatypes in [True, False]:
+        output = {}
+        for memoize in [False, True]:
+            translator = Orchestra2SBE()
+            translator.memoize = memoize
+            output[memoize] = str(translator.orch2sbe_dict(orch_instance, components_to_datatypes))
+        assert output[True] == output[False]
+
+
+def test_orchestra2sbe_subset():
+    xml_path = os.path.join(XML_FILE_DIR, 'Examples2Orchestra.xml')
+    orchestra = Orchestra()
+    (orch_instance, errors) = orchestra.read_xml(xml_path)
+    translator = Orchestra2SBE()
+    sbe_instance = translator.orch2sbe_dict(orch_instance, messages=['D'])
+    assert [msg[1]['name'] for msg in sbe_instance.messages() if isinstance(msg, list)] == ['NewOrderSingle']
+    assert sbe_instance.composite_by_name('messageHeader')
+    assert sbe_instance.enum_by_name('sideEnum')
+    assert not sbe_instance.enum_by_name('execTypeEnum')
+    output_path = os.path.join(output_dir(), 'Examples-subset.xml')
+    with open(output_path, 'wb') as f:
+        errors = translator.orch2sbe_xml(xml_path, f, messages=['NewOrderSingle'])
+        assert not errors
+
+
+def test_orchestra2sbe_workers():
+    for (file_name, translator_class) in [('Examples2Orchestra.xml', Orchestra2SBE),
+                                          ('Examples202Orchestra.xml', Orchestra2SBE10_20)]:
+        xml_path = os.path.join(XML_FILE_DIR, file_name)
+        orchestra = Orchestra()
+        (orch_instance, errors) = orchestra.read_xml(xml_path)
+        for components_to_datatypes in [True, False]:
+            sequential = translator_class().orch2sbe_dict(orch_instance, components_to_datatypes)
+            parallel = translator_class().orch2sbe_dict(orch_instance, components_to_datatypes, workers=2)
+            assert str(parallel) == str(sequential)
+
+
+def test_orchestra2sbe_reorder_fields():
+    xml_path = os.path.join(XML_FILE_DIR, 'Examples2Orchestra.xml')
+    orchestra = Orchestra()
+    (orch_instance, errors) = orchestra.read_xml(xml_path)
+    translator = Orchestra2SBE()
+    sbe_instance = translator.orch2sbe_dict(orch_instance, reorder_fields=8)
+    assert translator.block_length_saved['NewOrderSingle'] > 0
+    new_order_single = next(msg for msg in sbe_instance.messages() if msg[1]['name'] == 'NewOrderSingle')
+    fields = sbe_instance.fields(new_order_single)
+    assert fields[-1][1]['name'] == 'OrdType'
+    assert fields[-1][1]['description'].endswith('original SBE field position 6')
+    output_path = os.path.join(output_dir(), 'Examples-reordered.xml')
+    with open(output_path, 'wb') as f:
+        errors = translator.orch2sbe_xml(xml_path, f, reorder_fields=8)
+        assert not errors
+
+
+def test_orchestra2sbe_reorder_fields_narrow_enums():
+    xml_path = os.path.join(XML_FILE_DIR, 'OrchestraOrders.xml')
+    orchestra = Orchestra()
+    (orch_instance, errors) = orchestra.read_xml(xml_path)
+    translator = Orchestra2SBE()
+    # bytes saved by narrowed enums are counted before fields are reordered
+    sbe_instance = translator.orch2sbe_dict(orch_instance, False, narrow_enums=True, reorder_fields=8)
+    execution_report = next(msg for msg in sbe_instance.messages() if msg[1]['name'] == 'ExecutionReport')
+    fields = sbe_instance.fields(execution_report)
+    assert fields[0][1]['name'] == 'Side'
+    assert [field for (path, field) in sbe_instance.iter_fields(execution_report)][:len(fields)] == fields
+
+
+def test_orchestra2sbe_components2datatypes():
+    xml_path = os.path.join(XML_FILE_DIR, 'OrchestraOrders.xml')
+    orchestra = Orchestra()
+    (orch_instance, errors) = orchestra.read_xml(xml_path)
+    assert not errors
+    translator = Orchestra2SBE()
+    sbe_instance = translator.orch2sbe_dict(orch_instance)
+    # composites from components are found by lookups of the message schema
+    assert sbe_instance.composite_by_name('Instrument')
+    assert not sbe_instance.composite_by_name('StandardHeader')
+
+
+def test_orchestra2sbe_narrow_enums():
+    xml_path = os.path.join(XML_FILE_DIR, 'Examples2Orchestra.xml')
+    orchestra = Orchestra()
+    (orch_instance, errors) = orchestra.read_xml(xml_path)
+    # encodings mapped from Orchestra datatypes are kept
+    translator = Orchestra2SBE()
+    sbe_instance = translator.orch2sbe_dict(orch_instance, narrow_enums=True)
+    assert sbe_instance.enum_by_name('businessRejectReasonEnum')[1]['encodingType'] == 'intEnumEncoding'
+    assert not any(translator.enum_bytes_saved.values())
+    # FIX datatypes without an SBE mapping are narrowed
+    for codeset in orch_instance.codesets():
+        if isinstance(codeset, list) and codeset[1]['name'] == 'businessRejectReasonEnum':
+            codeset[1]['type'] = 'int'
+        elif isinstance(codeset, list) and codeset[1]['name'] == 'sideEnum':
+            codeset[1]['type'] = 'String'
+        elif isinstance(codeset, list) and codeset[1]['name'] == 'ordTypeEnum':
+            codeset[1]['type'] = 'MultipleCharValue'
+    sbe_instance = translator.orch2sbe_dict(orch_instance, narrow_enums=True)
+    assert sbe_instance.enum_by_name('businessRejectReasonEnum')[1]['encodingType'] == 'uint8'
+    assert sbe_instance.enum_by_name('sideEnum')[1]['encodingType'] == 'char'
+    # a field of a multiple value datatype may hold several values, which do not fit a char
+    assert sbe_instance.enum_by_name('ordTypeEnum')[1]['encodingType'] == 'MultipleCharValue'
+    assert translator.enum_bytes_saved['BusinessMessageReject'] == 3
@@ -0,0 +1,67 @@
+import os
+import sqlite3
+
+from orchestratransposer import Orchestra
+from orchestratransposer.orchestra2sqlite import Orchestra2SQLite
+
+XML_FILE_DIR = os.path.join(os.path.dirname(__file__), 'xml/')
+
+
+def output_dir():
+    path = os.path.join(os.path.dirname(__file__), 'out/')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def test_orchestra2sqlite_xml():
+    xml_path = os.path.join(XML_FILE_DIR, 'OrchestraOrders.xml')
+    db_path = os.path.join(output_dir(), 'OrchestraOrders.db')
+    output_path = os.path.join(output_dir(), 'OrchestraOrders-sqlite.xml')
+    translator = Orchestra2SQLite()
+    errors = translator.orch2sqlite_xml(xml_path, db_path)
+    assert not errors
+    # a second export replaces the tables of the first
+    errors = translator.orch2sqlite_xml(xml_path, db_path)
+    assert not errors
+    with open(output_path, 'wb') as f:
+        errors = translator.sqlite2orch_xml(db_path, f)
+    assert not errors
+    orchestra = Orchestra()
+    (orch_instance, errors) = orchestra.read_xml(xml_path)
+    (roundtrip_instance, errors) = orchestra.read_xml(output_path)
+    assert not errors
+    assert roundtrip_instance.root() == orch_instance.root()
+
+
+def test_orchestra2sqlite_dict():
+    xml_path = os.path.join(XML_FILE_DIR, 'OrchestraOrders.xml')
+    orchestra = Orchestra()
+    (orch_instance, errors) = orchestra.read_xml(xml_path)
+    codeset = orch_instance.codeset_by_name('SideCodeSet')
+    codeset.append(['fixr:code', {'name': 'SellShort', 'id': 54005, 'value': '5', 'addedEP': 269},
+                    ['fixr:annotation', ['fixr:documentation', {'purpose': 'SYNOPSIS'}, 'Sell short']]])
+    connection = sqlite3.connect(':memory:')
+    translator = Orchestra2SQLite()
+    translator.orch2sqlite_dict(orch_instance, connection)
+    assert connection.execute('SELECT count(*) FROM fields').fetchone()[0] == 30
+    # messages that contain PartyID, directly or in a component or group at any depth
+    rows = connection.execute('''
+        WITH RECURSIVE containers(owner, id) AS (
+            SELECT owner, owner_position FROM members WHERE kind = 'fieldRef' AND ref_id = 448
+            UNION
+            SELECT members.owner, members.owner_position FROM members JOIN containers
+            ON members.kind = CASE containers.owner WHEN 'groups' THEN 'groupRef' ELSE 'componentRef' END
+            AND members.ref_id = (SELECT id FROM groups WHERE position = containers.id AND containers.owner = 'groups'
+                                  UNION ALL
+                                  SELECT id FROM components WHERE position = containers.id
+                                  AND containers.owner = 'components'))
+        SELECT DISTINCT messages.name FROM containers JOIN messages
+        ON containers.owner = 'messages' AND containers.id = messages.position ORDER BY messages.name''').fetchall()
+    assert rows == [('ExecutionReport',), ('NewOrderSingle',)]
+    rows = connection.execute('''
+        SELECT codes.name, documentation.text FROM codes JOIN codesets ON codes.codeset_position = codesets.position
+        LEFT JOIN documentation ON documentation.owner = 'codes' AND documentation.owner_key = codes.code_key
+        WHERE codesets.name = 'SideCodeSet' AND codes.addedEP = 269''').fetchall()
+    assert rows == [('SellShort', 'Sell short')]
+    roundtrip_instance = translator.sqlite2orch_dict(connection)
+    assert roundtrip_instance.root() == orch_instance.root()
@@ -1,7 +1,15 @@
 import os
+import struct
+
+import pytest
 
 from orchestratransposer import SBE
 from orchestratransposer.sbe.sbe import SBE20
+from orchestratransposer.sbe.sbebatch import SBEBatchDecoder
+from orchestratransposer.sbe.sbecodec import SBECodec
+from orchestratransposer.sbe.sbeinclude import fragment_cache
+from orchestratransposer.sbe.sbedtype import SBEDtype
+from orchestratransposer.sbe.sbelayout import SBELayout
 
 XML_FILE_DIR = os.path.join(os.path.dirname(__file__), 'xml/')
 
@@ -71,3 +79,308 @@ def test20_to_dict():
         (instance, errors) = sbe.read_xml(xml_path)
         print(str(instance), file=f)
         assert not errors
+
+
+def test_lookup_indexes():
+    sbe = SBE()
+    xml_path = os.path.join(XML_FILE_DIR, 'Examples.xml')
+    (instance, errors) = sbe.read_xml(xml_path)
+    assert not errors
+    assert instance.composite_by_name('month_year')[1]['name'] == 'MONTH_YEAR'
+    assert instance.enum_by_name('businessRejectReasonEnum')
+    assert not instance.type_by_name('MONTH_YEAR')
+    assert instance.valid_value_by_name('businessRejectReasonEnum', 'UnknownID')[2] == '1'
+    execution_report = next(msg for msg in instance.messages() if msg[1]['name'] == 'ExecutionReport')
+    assert instance.field_by_name(execution_report, 'fillqty')[1]['id'] == 1365
+    assert instance.field_by_type(execution_report, 'qtyEncoding')[1]['name'] == 'LeavesQty'
+    assert not instance.first_field_by_type('TimeUnit')
+    # appends of types update views and indexes, appends of messages invalidate them
+    all_types = instance.all_types()
+    instance.append_composite(['composite', {'name': 'TimeUnit'}, ['type', {'name': 'unit', 'primitiveType': 'uint8'}]])
+    assert instance.composite_by_name('TimeUnit')
+    assert len(instance.composites()) == 7
+    instance.append_enum(['enum', {'name': 'timeUnitEnum', 'encodingType': 'uint8'},
+                          ['validValue', {'name': 'second'}, '0'], ['validValue', {'name': 'nanosecond'}, '9']])
+    assert instance.valid_value_by_name('TimeUnitEnum', 'Nanosecond')[2] == '9'
+    # an enum does not replace one of the same name
+    instance.append_enum(['enum', {'name': 'TimeUnitEnum', 'encodingType': 'char'},
+                          ['validValue', {'name': 'day'}, 'D']])
+    assert instance.enum_by_name('timeunitenum')[1]['encodingType'] == 'uint8'
+    assert not instance.valid_value_by_name('timeUnitEnum', 'day')
+    assert instance.all_types() is all_types
+    instance.append_message(['sbe:message', {'name': 'Heartbeat', 'id': 100},
+                             ['field', {'id': 999, 'name': 'Unit', 'type': 'TimeUnit'}]])
+    assert instance.first_field_by_type('timeunit')[1]['id'] == 999
+
+
+
+def test_iter_members():
+    sbe = SBE()
+    xml_path = os.path.join(XML_FILE_DIR, 'Examples.xml')
+    (instance, errors) = sbe.read_xml(xml_path)
+    execution_report = next(msg for msg in instance.messages() if msg[1]['name'] == 'ExecutionReport')
+    all_sbe_fields = []
+    instance.all_fields(execution_report, all_sbe_fields)
+    assert [field for (path, field) in instance.iter_fields(execution_report)] == all_sbe_fields
+    assert [path for (path, field) in instance.iter_fields(execution_report)][-1] == ('FillsGrp',)
+    assert [(path, group[1]['name']) for (path, group) in instance.iter_groups(execution_report)] == \
+           [((), 'FillsGrp')]
+    # a change of a nested group is detected
+    fills_grp = next(group for (path, group) in instance.iter_groups(execution_report))
+    instance.append_field(fills_grp, ['field', {'id': 1366, 'name': 'FillID', 'type': 'idString'}])
+    assert instance.field_by_name(execution_report, 'FillID')
+    assert len(list(instance.iter_fields(execution_report))) == len(all_sbe_fields) + 1
+    # so is a swap of fields in place
+    fields = [i for (i, member) in enumerate(execution_report) if isinstance(member, list) and member[0] == 'field']
+    (first, second) = fields[:2]
+    (execution_report[first], execution_report[second]) = (execution_report[second], execution_report[first])
+    all_sbe_fields = []
+    instance.all_fields(execution_report, all_sbe_fields)
+    assert [field for (path, field) in instance.iter_fields(execution_report)] == all_sbe_fields
+    assert instance.field_by_name(execution_report, all_sbe_fields[0][1]['name']) is all_sbe_fields[0]
+
+
+def test_layout():
+    for (sbe, file_name) in [(SBE(), 'Examples.xml'), (SBE20(), 'Examples20.xml')]:
+        xml_path = os.path.join(XML_FILE_DIR, file_name)
+        (instance, errors) = sbe.read_xml(xml_path)
+        # recomputed layout matches the offsets and block lengths declared in the examples
+        layout = SBELayout(instance, use_schema_offsets=False).layout()
+        for (message, message_layout) in zip(instance.messages(), layout['messages']):
+            assert message_layout['blockLength'] == message[1]['blockLength']
+            assert [field_layout['offset'] for field_layout in message_layout['fields']] == \
+                   [field[1]['offset'] for field in instance.fields(message)]
+            for (group, group_layout) in zip(instance.groups(message), message_layout['groups']):
+                assert group_layout['blockLength'] == group[1]['blockLength']
+                assert group_layout['dimension']['kind'] == 'composite'
+    (instance, errors) = SBE().read_xml(os.path.join(XML_FILE_DIR, 'Examples.xml'))
+    layout = SBELayout(instance).layout()
+    assert layout['header']['size'] == 8
+    business_message_reject = layout['messages'][0]
+    assert business_message_reject['data'][0]['lengthSize'] == 2
+
+
+def test_layout_alignment():
+    (instance, errors) = SBE().read_xml(os.path.join(XML_FILE_DIR, 'Examples.xml'))
+    layout = SBELayout(instance, alignment=8, use_schema_offsets=False).layout(write_back=True)
+    new_order_single = next(message for message in layout['messages'] if message['name'] == 'NewOrderSingle')
+    transact_time = next(field for field in new_order_single['fields'] if field['name'] == 'TransactTime')
+    assert transact_time['offset'] == 32
+    assert new_order_single['blockLength'] == 64
+    message = next(message for message in instance.messages() if message[1]['name'] == 'NewOrderSingle')
+    assert message[1]['blockLength'] == 64
+    output_path = os.path.join(output_dir(), 'Examples-aligned.xml')
+    with open(output_path, 'wb') as f:
+        errors = SBE().write_xml(instance, f)
+        assert not errors
+
+
+def test_dtype():
+    np = pytest.importorskip('numpy')
+    (instance, errors) = SBE().read_xml(os.path.join(XML_FILE_DIR, 'Examples.xml'))
+    generator = SBEDtype(instance)
+    dtypes = generator.message_dtypes()
+    assert dtypes['NewOrderSingle'].itemsize == 54
+    assert dtypes['NewOrderSingle'].fields['TransactTime'][1] == 25
+    assert generator.header_dtype().itemsize == 8
+    execution_report = next(message for message in instance.messages() if message[1]['name'] == 'ExecutionReport')
+    assert generator.group_dtypes(execution_report)['FillsGrp'].itemsize == 12
+    # decode several root blocks at once
+    root_block = struct.Struct('<8s8s8scQicqq')
+    buffer = b''.join(root_block.pack(b'ORD%d' % i, b'ACCT', b'SYM', b'1', 1000 + i, 100 * i, b'2', 12345, -1)
+                      for i in range(3))
+    blocks = np.frombuffer(buffer, dtype=dtypes['NewOrderSingle'])
+    assert list(blocks['TransactTime']) == [1000, 1001, 1002]
+    assert list(blocks['OrderQty']['mantissa']) == [0, 100, 200]
+    assert blocks['ClOrdId'][2] == b'ORD2'
+
+
+def codec_examples(codecs, timestamp) -> list:
+    return [('NewOrderSingle',
+             {'ClOrdId': b'ORD1', 'Account': b'ACCT', 'Symbol': b'MSFT', 'Side': codecs.sideEnum.Buy,
+              'TransactTime': timestamp, 'OrderQty': {'mantissa': 100, 'exponent': 0},
+              'OrdType': codecs.ordTypeEnum.Limit, 'Price': {'mantissa': 123450, 'exponent': -3},
+              'StopPx': {'mantissa': -2 ** 63, 'exponent': -3}}),
+            ('ExecutionReport',
+             {'OrderID': b'O1', 'ExecID': b'E1', 'ExecType': codecs.execTypeEnum.Trade,
+              'OrdStatus': codecs.ordStatusEnum.Filled, 'Symbol': b'MSFT',
+              'MaturityMonthYear': {'year': 2026, 'month': 10, 'day': 255, 'week': 255}, 'Side': b'1',
+              'LeavesQty': {'mantissa': 0, 'exponent': 0}, 'CumQty': {'mantissa': 100, 'exponent': 0},
+              'TradeDate': 20000,
+              'FillsGrp': [
+                  {'FillPx': {'mantissa': 123000, 'exponent': -3}, 'FillQty': {'mantissa': 60, 'exponent': 0}},
+                  {'FillPx': {'mantissa': 123500, 'exponent': -3}, 'FillQty': {'mantissa': 40, 'exponent': 0}}]}),
+            ('BusinessMessageReject',
+             {'BusinesRejectRefId': b'X1', 'BusinessRejectReason': 4, 'Text': b'Application not available'})]
+
+
+def test_codec():
+    for (sbe, file_name, timestamp) in [(SBE(), 'Examples.xml', 1234),
+                                        (SBE20(), 'Examples20.xml', {'time': 1234, 'unit': 9})]:
+        xml_path = os.path.join(XML_FILE_DIR, file_name)
+        (instance, errors) = sbe.read_xml(xml_path)
+        generator = SBECodec(instance)
+        output_path = os.path.join(output_dir(), file_name.replace('.xml', '_sbe.py'))
+        generator.write(output_path)
+        codecs = generator.load()
+        examples = codec_examples(codecs, timestamp)
+        buffer = b''.join(codecs.encode(name, values) for (name, values) in examples)
+        # round trip a stream of messages
+        offset = 0
+        for (name, values) in examples:
+            (decoded_name, decoded, end) = codecs.decode(buffer, offset)
+            assert decoded_name == name
+            assert decoded == values
+            assert codecs.encode(name, decoded) == buffer[offset:end]
+            offset = end
+        assert offset == len(buffer)
+        # block lengths agree with the declared schema
+        assert codecs.NewOrderSingle.BLOCK.size == 54
+        assert codecs.ExecutionReport_FillsGrp.BLOCK.size == 12
+        # flyweights read and write in place
+        buffer = bytearray(buffer)
+        order = codecs.wrap(buffer)
+        assert order.Symbol == b'MSFT'
+        assert order.Price.exponent == -3
+        order.OrderQty.mantissa = 200
+        order.Symbol = b'IBM'
+        assert codecs.decode(buffer)[1]['OrderQty']['mantissa'] == 200
+        assert codecs.decode(buffer)[1]['Symbol'] == b'IBM'
+        report = codecs.wrap(buffer, len(codecs.encode(*examples[0])))
+        assert len(report.FillsGrp) == 2
+        assert [fill.FillQty.mantissa for fill in report.FillsGrp] == [60, 40]
+        reject = codecs.wrap(buffer, len(codecs.encode(*examples[0])) + len(codecs.encode(*examples[1])))
+        assert isinstance(reject.Text, memoryview)
+        assert reject.Text.tobytes() == b'Application not available'
+
+
+def sofh_capture(codecs, examples, repeat) -> bytes:
+    frames = []
+    for (name, values) in examples:
+        message = codecs.encode(name, values)
+        frames.append(struct.pack('>IH', len(message) + 6, 0xEB50) + message)
+    return b''.join(frames) * repeat
+
+
+def test_batch_decoder():
+    pytest.importorskip('numpy')
+    for (sbe, file_name, timestamp) in [(SBE(), 'Examples.xml', 1234),
+                                        (SBE20(), 'Examples20.xml', {'time': 1234, 'unit': 9})]:
+        (instance, errors) = sbe.read_xml(os.path.join(XML_FILE_DIR, file_name))
+        codecs = SBECodec(instance).load()
+        examples = codec_examples(codecs, timestamp)
+        examples[2][1]['Text'] = b''
+        capture_path = os.path.join(output_dir(), file_name.replace('.xml', '.sofh'))
+        with open(capture_path, 'wb') as f:
+            f.write(sofh_capture(codecs, examples, 3))
+        decoded = SBEBatchDecoder(instance).decode_file(capture_path)
+        orders = decoded['NewOrderSingle']
+        assert orders['count'] == 3
+        assert list(orders['columns']['ClOrdId']) == [b'ORD1'] * 3
+        assert list(orders['columns']['OrderQty.mantissa']) == [100] * 3
+        assert list(orders['columns']['StopPx.mantissa']) == [-2 ** 63] * 3
+        fills = decoded['ExecutionReport']['groups']['FillsGrp']
+        assert list(fills['parent']) == [0, 0, 1, 1, 2, 2]
+        assert list(fills['columns']['FillQty.mantissa']) == [60, 40] * 3
+        assert list(decoded['BusinessMessageReject']['data']['Text']['lengths']) == [0] * 3
+        # consecutive messages without framing headers
+        buffer = b''.join(codecs.encode(name, values) for (name, values) in codec_examples(codecs, timestamp))
+        decoded = SBEBatchDecoder(instance, framing=None).decode(buffer)
+        text = decoded['BusinessMessageReject']['data']['Text']
+        assert buffer[text['offsets'][0]:text['offsets'][0] + text['lengths'][0]] == b'Application not available'
+        assert decoded['ExecutionReport']['columns']['MaturityMonthYear.year'][0] == 2026
+
+
+def test_batch_decoder_truncated():
+    pytest.importorskip('numpy')
+    (instance, errors) = SBE().read_xml(os.path.join(XML_FILE_DIR, 'Examples.xml'))
+    codecs = SBECodec(instance).load()
+    examples = codec_examples(codecs, 1234)
+    decoder = SBEBatchDecoder(instance)
+    # an empty capture has no messages
+    capture_path = os.path.join(output_dir(), 'Empty.sofh')
+    open(capture_path, 'wb').close()
+    decoded = decoder.decode_file(capture_path)
+    assert decoded['NewOrderSingle']['count'] == 0
+    assert len(decoded['NewOrderSingle']['columns']['ClOrdId']) == 0
+    # a truncated last frame is dropped
+    decoded = decoder.decode(sofh_capture(codecs, examples, 2)[:-5])
+    assert [decoded[name]['count'] for (name, values) in examples] == [2, 2, 1]
+    assert len(decoded['BusinessMessageReject']['data']['Text']['lengths']) == 1
+    # so is a message truncated in a repeating group, with the entries already scanned
+    order = codecs.encode(*examples[0])
+    buffer = order + codecs.encode(*examples[1])[:-4]
+    decoded = SBEBatchDecoder(instance, framing=None).decode(buffer)
+    assert decoded['NewOrderSingle']['count'] == 1
+    assert decoded['ExecutionReport']['count'] == 0
+    assert decoded['ExecutionReport']['groups']['FillsGrp']['count'] == 0
+    # a last block shorter than the blockLength of its schema cannot be decoded
+    header_size = len(order) - codecs.NewOrderSingle.BLOCK.size
+    short_order = bytearray(order[:header_size + 10])
+    struct.pack_into('<H', short_order, 0, 10)
+    with pytest.raises(ValueError):
+        SBEBatchDecoder(instance, framing=None).decode(bytes(short_order))
+
+
+def test_read_xml_include():
+    sbe = SBE20()
+    fragment_cache.clear()
+    (expected, errors) = sbe.read_xml(os.path.join(XML_FILE_DIR, 'Examples20.xml'))
+    (instance, errors) = sbe.read_xml(os.path.join(XML_FILE_DIR, 'Examples20Include.xml'))
+    assert not errors
+    assert instance.root()[2:] == expected.root()[2:]
+    assert [message[1]['name'] for message in instance.messages()][-1] == 'BusinessMessageReject'
+    assert instance.composite_by_name('MONTH_YEAR')
+
+
+def test_read_xml_include_cache():
+    sbe = SBE20()
+    fragment_cache.clear()
+    parse_count = fragment_cache.parse_count
+    types_path = os.path.join(output_dir(), 'venue-types.xml')
+    with open(os.path.join(XML_FILE_DIR, 'types-include.xml'), 'rb') as src, open(types_path, 'wb') as dst:
+        dst.write(src.read())
+    with open(os.path.join(XML_FILE_DIR, 'Examples20Include.xml'), 'r') as f:
+        schema = f.read().replace('types-include.xml', 'venue-types.xml')
+    # a batch of venue schemas that share one types file
+    for i in range(50):
+        schema_path = os.path.join(output_dir(), 'venue%d.xml' % i)
+        with open(schema_path, 'w') as f:
+            f.write(schema.replace('messages-include.xml', os.path.abspath(
+                os.path.join(XML_FILE_DIR, 'messages-include.xml'))).replace('id="91"', 'id="%d"' % (100 + i)))
+        (instance, errors) = sbe.read_xml(schema_path)
+        assert not errors
+        assert instance.composite_by_name('MONTH_YEAR')
+    assert fragment_cache.parse_count - parse_count == 2
+    # a modified fragment is parsed again
+    stat = os.stat(types_path)
+    os.utime(types_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+    (instance, errors) = sbe.read_xml(os.path.join(output_dir(), 'venue0.xml'))
+    assert fragment_cache.parse_count - parse_count == 3
+    # a missing fragment is reported
+    with open(os.path.join(output_dir(), 'venue-missing.xml'), 'w') as f:
+        f.write(schema.replace('venue-types.xml', 'missing-types.xml'))
+    (instance, errors) = sbe.read_xml(os.path.join(output_dir(), 'venue-missing.xml'))
+    assert any(isinstance(error, OSError) for error in errors)
+    # errors of a cached fragment are reported on each read until its missing include is created
+    late_path = os.path.join(output_dir(), 'late-composite.xml')
+    if os.path.exists(late_path):
+        os.remove(late_path)
+    with open(os.path.join(XML_FILE_DIR, 'types-include.xml'), 'r') as f:
+        types = f.read().replace('</types>', '<xi:include xmlns:xi="http://www.w3.org/2001/XInclude" '
+                                             'href="late-composite.xml"/></types>')
+    with open(os.path.join(output_dir(), 'venue-late-types.xml'), 'w') as f:
+        f.write(types)
+    schema_path = os.path.join(output_dir(), 'venue-late.xml')
+    with open(schema_path, 'w') as f:
+        f.write(schema.replace('venue-types.xml', 'venue-late-types.xml').replace(
+            'messages-include.xml', os.path.abspath(os.path.join(XML_FILE_DIR, 'messages-include.xml'))))
+    for _ in range(2):
+        (instance, errors) = sbe.read_xml(schema_path)
+        assert len(errors) == 1 and isinstance(errors[0], OSError)
+    with open(late_path, 'w') as f:
+        f.write('<composite xmlns="http://fixprotocol.io/2017/sbe" name="LATE">'
+                '<type name="value" primitiveType="uint8"/></composite>')
+    (instance, errors) = sbe.read_xml(schema_path)
+    assert not errors
+    assert instance.composite_by_name('LATE')
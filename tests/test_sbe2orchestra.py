@@ -1,6 +1,9 @@
 import os
+import re
 
 from orchestratransposer import SBE2Orchestra, SBE
+from orchestratransposer.orchestra.orchestra import Orchestra10
+from orchestratransposer.orchestra.orchestrainstance import OrchestraInstance10
 from orchestratransposer.sbe.sbe import SBE20
 from orchestratransposer.sbe2orchestra import SBE2Orchestra20_10
 
@@ -51,3 +54,79 @@ def test_sbe202orchestra_dict():
     orch_instance = translator.sbe2orch_dict(sbe_instance)
     with open(output_path, 'w') as f:
         print(str(orch_instance), file=f)
+
+
+def test_sbe2orchestra_merge_xml():
+    xml_paths = [os.path.join(XML_FILE_DIR, 'Examples.xml'), os.path.join(XML_FILE_DIR, 'Examples20.xml')]
+    output_paths = [os.path.join(output_dir(), 'ExamplesMerged-%d.xml' % workers) for workers in [1, 2]]
+    translator = SBE2Orchestra()
+    for (workers, output_path) in zip([1, 2], output_paths):
+        with open(output_path, 'wb') as f:
+            errors = translator.sbe2orch_merge_xml(xml_paths, f, workers=workers, name='venues')
+            assert not errors
+    with open(output_paths[0], 'rb') as f1, open(output_paths[1], 'rb') as f2:
+        assert f1.read() == f2.read()
+    (orch_instance, errors) = Orchestra10().read_xml(output_paths[0])
+    assert not errors
+    assert orch_instance.repository()['name'] == 'venues'
+    # identical fields are merged; a field with a different codeset is a variant in the scenario of its package
+    fields = [(f[1]['name'], f[1].get('scenario', 'base')) for f in orch_instance.fields()[1:] if isinstance(f, list)]
+    assert fields.count(('Account', 'base')) == 1
+    assert ('Side', 'examples') in fields
+    side = next(f for f in orch_instance.fields()[1:] if isinstance(f, list) and f[1]['name'] == 'Side' and
+                f[1].get('scenario', None) == 'examples')
+    assert side[1]['type'] == 'sideEnum_examples'
+    messages = [(m[1]['name'], m[1].get('scenario', 'base')) for m in orch_instance.messages()[1:] if
+                isinstance(m, list)]
+    assert ('NewOrderSingle', 'base') in messages and ('NewOrderSingle', 'examples') in messages
+
+
+def test_sbe2orchestra_merge_same():
+    xml_path = os.path.join(XML_FILE_DIR, 'Examples.xml')
+    output_path = os.path.join(output_dir(), 'ExamplesMergedSame.xml')
+    translator = SBE2Orchestra()
+    with open(output_path, 'wb') as f:
+        errors = translator.sbe2orch_merge_xml([xml_path, xml_path], f, workers=1)
+        assert not errors
+    sbe = SBE()
+    (sbe_instance, errors) = sbe.read_xml(xml_path)
+    orch_instance = translator.sbe2orch_dict(sbe_instance)
+    (merged_instance, errors) = Orchestra10().read_xml(output_path)
+    assert not errors
+    for category in ['datatypes', 'codesets', 'fields', 'components', 'groups', 'messages']:
+        assert len(getattr(merged_instance, category)()) == len(getattr(orch_instance, category)())
+
+
+def test_sbe2orchestra_merge_invalid():
+    xml_paths = [os.path.join(XML_FILE_DIR, 'Examples.xml'), os.path.join(XML_FILE_DIR, 'BadExamples.xml')]
+    translator = SBE2Orchestra()
+    messages = []
+    for workers in [1, 2]:
+        output_path = os.path.join(output_dir(), 'ExamplesMergedInvalid-%d.xml' % workers)
+        with open(output_path, 'wb') as f:
+            errors = translator.sbe2orch_merge_xml(xml_paths, f, workers=workers)
+        # errors of a worker process are returned as those of a sequential merge
+        assert errors
+        assert all(str(error).startswith(xml_paths[1]) for error in errors)
+        messages.append([re.sub(' at 0x[0-9a-f]+', '', str(error)) for error in errors])
+    assert messages[0] == messages[1]
+
+
+def test_sbe2orchestra_merge_variant_ids():
+    repositories = []
+    for (name, fields) in [('venue1', [(1, 'Account', 'String'), (54, 'Side', 'char')]),
+                           ('venue2', [(1, 'Side', 'int'), (2, 'Price', 'Price')])]:
+        orch_instance = OrchestraInstance10()
+        orch_instance.repository()['name'] = name
+        for (field_id, field_name, field_type) in fields:
+            orch_instance.fields().append(['fixr:field', {'id': field_id, 'name': field_name, 'type': field_type}])
+        orch_instance.messages().append(['fixr:message', {'id': 1, 'name': 'Order', 'msgType': 'D'},
+                                         ['fixr:structure', ['fixr:fieldRef', {'id': 1}]]])
+        repositories.append(orch_instance)
+    merged_instance = SBE2Orchestra().sbe2orch_merge_dict(repositories)
+    fields = {(f[1]['name'], f[1].get('scenario', 'base')): f[1]['id'] for f in merged_instance.fields()[1:] if
+              isinstance(f, list)}
+    # a variant takes the id of the field of the same name, not that of the field with its local id
+    assert fields == {('Account', 'base'): 1, ('Side', 'base'): 54, ('Side', 'venue2'): 54, ('Price', 'base'): 2}
+    refs = [m[2][1][1] for m in merged_instance.messages()[1:] if isinstance(m, list)]
+    assert refs == [{'id': 1}, {'id': 54, 'scenario': 'venue2'}]
@@ -1,6 +1,8 @@
 import os
 
 from orchestratransposer import Unified2Orchestra, Unified
+from orchestratransposer.orchestra.orchestra import Orchestra10WithAppinfo
+from orchestratransposer.unified2orchestra import ALL_VERSIONS
 
 XML_FILE_DIR = os.path.join(os.path.dirname(__file__), 'xml/')
 
@@ -32,3 +34,92 @@ def test_unified2orchestra_dict():
     orch_instance = translator.unified2orch_dict(unified_instance, "FIX.Latest_EP269")
     with open(output_path, 'w') as f:
         print(str(orch_instance), file=f)
+
+
+def test_unified2orchestra_versions_xml():
+    xml_path = os.path.join(XML_FILE_DIR, 'FixRepository.xml')
+    phrases_xml_path = os.path.join(XML_FILE_DIR, 'FIX.Latest_EP269_en_phrases.xml')
+    output_path = os.path.join(output_dir(), 'FixRepository2Orchestra.xml')
+    translator = Unified2Orchestra()
+    results = translator.unified2orch_versions_xml(xml_path, phrases_xml_path, output_path,
+                                                   ["FIX.Latest_EP269", "FIX.0.0", "FIX.Latest_EP269"], workers=2)
+    assert list(results) == ["FIX.Latest_EP269", "FIX.0.0"]
+    assert not results["FIX.Latest_EP269"]
+    assert results["FIX.0.0"]
+    assert os.path.exists(Unified2Orchestra.version_output_path(output_path, "FIX.Latest_EP269"))
+
+
+def test_unified2orchestra_versions_xml_invalid():
+    xml_path = os.path.join(output_dir(), 'InvalidFixRepository.xml')
+    with open(xml_path, 'w') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<fixRepository bogus="1"/>\n')
+    phrases_xml_path = os.path.join(XML_FILE_DIR, 'FIX.Latest_EP269_en_phrases.xml')
+    output_path = os.path.join(output_dir(), 'InvalidFixRepository2Orchestra.xml')
+    translator = Unified2Orchestra()
+    # errors are reported when all versions are translated, though none are known
+    results = translator.unified2orch_versions_xml(xml_path, phrases_xml_path, output_path)
+    assert list(results) == [ALL_VERSIONS]
+    assert results[ALL_VERSIONS]
+
+
+def test_unified2orchestra_deduplicate_codesets():
+    xml_path = os.path.join(XML_FILE_DIR, 'FixRepository.xml')
+    phrases_xml_path = os.path.join(XML_FILE_DIR, 'FIX.Latest_EP269_en_phrases.xml')
+    unified = Unified()
+    (unified_instance, errors) = unified.read_xml_all(xml_path, phrases_xml_path)
+    assert not errors
+    translator = Unified2Orchestra()
+    orch_instance = translator.unified2orch_dict(unified_instance, "FIX.Latest_EP269", deduplicate_codesets=True)
+    codeset_names = {codeset[1]['name'] for codeset in orch_instance.codesets() if isinstance(codeset, list)}
+    for field in filter(lambda l: isinstance(l, list), orch_instance.fields()):
+        if field[1]['type'].endswith('CodeSet'):
+            assert field[1]['type'] in codeset_names
+
+
+
+def test_unified2orchestra_deduplicate_codesets_merged():
+    xml_path = os.path.join(XML_FILE_DIR, 'FixRepositorySides.xml')
+    phrases_xml_path = os.path.join(XML_FILE_DIR, 'FIX.Latest_EP269_en_phrases.xml')
+    unified = Unified()
+    (unified_instance, errors) = unified.read_xml_all(xml_path, phrases_xml_path)
+    assert not errors
+    translator = Unified2Orchestra()
+    orch_instance = translator.unified2orch_dict(unified_instance, deduplicate_codesets=True)
+    # LegSide has the same enums as Side
+    assert translator.codesets_merged == {'FIX.Latest_EP269': 1}
+    assert orch_instance.field_by_name('LegSide')[1]['type'] == 'SideCodeSet'
+    assert orch_instance.codeset_by_name('LegSideCodeSet') is None
+
+
+def test_unified2orchestra_deduplicate_codesets_off():
+    xml_path = os.path.join(XML_FILE_DIR, 'FixRepositorySides.xml')
+    phrases_xml_path = os.path.join(XML_FILE_DIR, 'FIX.Latest_EP269_en_phrases.xml')
+    output_path = os.path.join(output_dir(), 'FixRepositorySides2Orchestra.xml')
+    translator = Unified2Orchestra()
+    with open(output_path, 'wb') as f:
+        errors = translator.unified2orch_xml(xml_path, phrases_xml_path, f)
+    assert not errors
+    assert not translator.codesets_merged
+    # same translation as before deduplication of codesets, but for the time of creation
+    orchestra = Orchestra10WithAppinfo()
+    (actual, errors) = orchestra.read_xml(output_path)
+    assert not errors
+    (expected, errors) = orchestra.read_xml(os.path.join(XML_FILE_DIR, 'FixRepositorySides2Orchestra.xml'))
+    assert not errors
+    for instance in [actual, expected]:
+        instance.metadata()[:] = [term for term in instance.metadata()
+                                  if not (isinstance(term, list) and term[0] == 'dcterms:created')]
+    assert actual.root() == expected.root()
+
+def test_enum_fingerprint():
+    side = ['field', {'id': 54, 'name': 'Side', 'type': 'char'},
+            ['enum', {'value': '1', 'symbolicName': 'Buy', 'textId': 'ENUM_54_1'}],
+            ['enum', {'value': '2', 'symbolicName': 'Sell', 'textId': 'ENUM_54_2'}]]
+    leg_side = ['field', {'id': 624, 'name': 'LegSide', 'type': 'char'},
+                ['enum', {'value': '1', 'symbolicName': 'Buy', 'textId': 'ENUM_624_1'}],
+                ['enum', {'value': '2', 'symbolicName': 'Sell', 'textId': 'ENUM_624_2'}]]
+    side_int = ['field', {'id': 9999, 'name': 'SideInt', 'type': 'int'},
+                ['enum', {'value': '1', 'symbolicName': 'Buy'}],
+                ['enum', {'value': '2', 'symbolicName': 'Sell'}]]
+    assert Unified2Orchestra.enum_fingerprint(side) == Unified2Orchestra.enum_fingerprint(leg_side)
+    assert Unified2Orchestra.enum_fingerprint(side) != Unified2Orchestra.enum_fingerprint(side_int)